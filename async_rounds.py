@@ -0,0 +1,206 @@
+import asyncio
+import time
+from typing import Dict, List, Any, Callable, Optional, Tuple
+import numpy as np
+
+from neuronet_core import NeuroNet, train_local_weights
+
+class RoundRecord:
+    def __init__(self, round_id: int, dispatched: int):
+        self.round_id = round_id
+        self.dispatched = dispatched
+        self.on_time = 0
+        self.failed = 0  # Clients whose training raised
+        self.quorum_met = False
+        self.finalized = False
+        self.latency = 0.0
+
+    @property
+    def participation(self) -> float:
+        return self.on_time / self.dispatched if self.dispatched else 0.0
+
+class AsyncRoundScheduler:
+    # Deadline/quorum rounds over NeuroNet: stragglers keep training and are merged later with a staleness penalty
+    def __init__(self, neuronet: NeuroNet, deadline: float = 1.0, min_quorum: int = 1,
+                 staleness_exponent: float = 0.5, max_staleness: int = 5, buffer_size: int = 1,
+                 server_learning_rate: float = 1.0, latency_fn: Optional[Callable[[str], float]] = None,
+                 seed: Optional[int] = None):
+        self.neuronet = neuronet
+        self.deadline = deadline
+        self.min_quorum = min_quorum
+        self.staleness_exponent = staleness_exponent
+        self.max_staleness = max_staleness
+        self.buffer_size = buffer_size  # Late updates are applied FedBuff-style once this many are buffered
+        self.server_learning_rate = server_learning_rate
+        self.latency_fn = latency_fn or (lambda client_id: 0.0)  # Simulated network + compute delay
+        self._seeds = np.random.SeedSequence(seed)
+
+        self.records: List[RoundRecord] = []
+        self.late_merged = 0
+        self.stale_dropped = 0
+        self.discarded_dropped = 0  # Late updates of rounds that were never applied
+        self.failed_updates = 0
+        self._busy: Dict[str, asyncio.Task] = {}
+        self._snapshots: Dict[int, Dict[str, np.ndarray]] = {}  # Base weights of rounds with outstanding clients
+        self._outstanding: Dict[int, int] = {}
+        self._discarded: set = set()  # Rounds with outstanding clients whose result never became global weights
+        self._late_buffer: List[Tuple[Dict[str, np.ndarray], int, float]] = []  # (delta, base round, weight)
+
+    async def run(self, n_rounds: int) -> List[RoundRecord]:
+        for _ in range(n_rounds):
+            await self.run_round()
+        return self.records
+
+    async def run_round(self) -> RoundRecord:
+        # A client whose training raises is counted as failed and simply doesn't participate; if the round
+        # itself is interrupted, the model round is discarded so the next one can start
+        model = self.neuronet.model
+        round_id = model.begin_round()
+        snapshot = dict(model.global_weights)
+        self._snapshots[round_id] = snapshot
+        start = time.perf_counter()
+        tasks: Dict[asyncio.Task, Dict] = {}
+        pending = set()
+        finalized = False
+        try:
+            idle_clients = [c for c in self.neuronet.clients if c["id"] not in self._busy]
+            seeds = self._seeds.spawn(1)[0].generate_state(max(len(idle_clients), 1))
+            for client, client_seed in zip(idle_clients, seeds):
+                task = asyncio.create_task(self._train_client(client, snapshot, int(client_seed)))
+                tasks[task] = client
+                self._busy[client["id"]] = task
+            record = RoundRecord(round_id, len(tasks))
+
+            pending = set(tasks)
+            loop = asyncio.get_running_loop()
+            cutoff = loop.time() + self.deadline
+            while pending:
+                timeout = cutoff - loop.time()
+                if timeout <= 0 and record.on_time >= self.min_quorum:
+                    break  # Deadline passed with quorum: leave the rest as stragglers
+                done, pending = await asyncio.wait(
+                    pending, timeout=timeout if timeout > 0 else None, return_when=asyncio.FIRST_COMPLETED
+                )
+                for task in done:
+                    client = tasks[task]
+                    del self._busy[client["id"]]
+                    if task.cancelled() or task.exception() is not None:
+                        record.failed += 1
+                        self.failed_updates += 1
+                        continue
+                    self.neuronet.submit_local_update(client, task.result())
+                    record.on_time += 1
+
+            record.quorum_met = record.on_time >= self.min_quorum
+            if record.quorum_met:
+                record.finalized = finalized = model.finalize_round()
+            else:
+                model.discard_round()
+        except BaseException:
+            model.discard_round()
+            raise
+        finally:
+            # Unfinished clients become stragglers whatever happened to the round
+            if pending:
+                self._outstanding[round_id] = len(pending)
+                if not finalized:
+                    self._discarded.add(round_id)
+            else:
+                self._snapshots.pop(round_id)
+            for task in pending:
+                task.add_done_callback(lambda t, client=tasks[task]: self._on_straggler_done(t, client, round_id))
+
+        self._flush_late_updates(force=False)
+        record.latency = time.perf_counter() - start
+        self.records.append(record)
+        return record
+
+    async def drain(self):
+        # Waits for outstanding stragglers and merges whatever is still buffered
+        if self._busy:
+            await asyncio.gather(*self._busy.values(), return_exceptions=True)
+        self._flush_late_updates(force=True)
+
+    def metrics(self) -> Dict[str, Any]:
+        latencies = np.array([r.latency for r in self.records])
+        return {
+            "rounds": len(self.records),
+            "finalized_rounds": sum(r.finalized for r in self.records),
+            "mean_round_latency": float(latencies.mean()) if len(latencies) else 0.0,
+            "p95_round_latency": float(np.percentile(latencies, 95)) if len(latencies) else 0.0,
+            "mean_participation": float(np.mean([r.participation for r in self.records])) if self.records else 0.0,
+            "late_updates_merged": self.late_merged,
+            "stale_updates_dropped": self.stale_dropped,
+            "discarded_round_updates_dropped": self.discarded_dropped,
+            "failed_updates": self.failed_updates,
+            "clients_in_flight": len(self._busy),
+        }
+
+    async def _train_client(self, client: Dict, base_weights: Dict[str, np.ndarray], seed: int) -> Dict[str, np.ndarray]:
+        await asyncio.sleep(self.latency_fn(client["id"]))
+        arena = self.neuronet.arena
+        return await asyncio.to_thread(
+            train_local_weights, base_weights, arena.features, arena.labels,
+            self.neuronet.local_epochs, self.neuronet.batch_size, self.neuronet.learning_rate, seed,
+            client["local_data"].indices
+        )
+
+    def _on_straggler_done(self, task: asyncio.Task, client: Dict, base_round: int):
+        self._busy.pop(client["id"], None)
+        base = self._snapshots[base_round]
+        discarded = base_round in self._discarded
+        self._outstanding[base_round] -= 1
+        if not self._outstanding[base_round]:
+            del self._outstanding[base_round]
+            del self._snapshots[base_round]
+            self._discarded.discard(base_round)
+        if task.cancelled() or task.exception() is not None:
+            self.failed_updates += 1
+            return
+        if discarded:
+            self.discarded_dropped += 1
+            return
+
+        delta = {layer: weights - base[layer] for layer, weights in task.result().items()}
+        self._late_buffer.append((delta, base_round, len(client["local_data"])))
+        if not self.neuronet.model.round_in_progress:
+            self._flush_late_updates(force=False)
+
+    def _flush_late_updates(self, force: bool):
+        if not self._late_buffer or (len(self._late_buffer) < self.buffer_size and not force):
+            return
+        model = self.neuronet.model
+        weighted = {layer: np.zeros_like(w) for layer, w in model.global_weights.items()}
+        total_samples = 0.0
+        for delta, base_round, num_samples in self._late_buffer:
+            staleness = model.round_id - base_round
+            if staleness > self.max_staleness or num_samples <= 0:
+                self.stale_dropped += 1
+                continue
+            factor = num_samples * (1 + staleness) ** -self.staleness_exponent
+            for layer, layer_delta in delta.items():
+                weighted[layer] += layer_delta * factor
+            total_samples += num_samples
+            self.late_merged += 1
+        self._late_buffer = []
+        if total_samples:
+            model.apply_delta(weighted, self.server_learning_rate / total_samples)
+
+# Example usage
+if __name__ == "__main__":
+    neuronet = NeuroNet(learning_rate=1e-6)
+    for i in range(10):
+        neuronet.register_client(f"client_{i}")
+        for _ in range(50):
+            neuronet.receive_client_data(f"client_{i}", np.random.randn(100), np.random.randint(2))
+
+    # Every third client is a straggler that misses the deadline
+    latency = lambda client_id: 0.3 if int(client_id.split("_")[1]) % 3 == 0 else 0.01
+    scheduler = AsyncRoundScheduler(neuronet, deadline=0.1, min_quorum=5, buffer_size=2, latency_fn=latency, seed=0)
+
+    async def main():
+        await scheduler.run(5)
+        await scheduler.drain()
+
+    asyncio.run(main())
+    print(scheduler.metrics())
@@ -0,0 +1,440 @@
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import random
+import shutil
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+from typing import Dict, List, Any, Callable, Optional, Tuple
+
+import numpy as np
+
+from high_quality_data_storage import HighQualityDataPoint, HighQualityDataStorage
+from low_quality_data_storage import LowQualityDataPoint, LowQualityDataStorage
+from neuro_privacy import PrivacyManager
+from neuro_token_exchange import NeuroExchange
+from neuronet_core import DataPoint, FeatureArena, NeuroChain, NeuroNet, RoundAggregator
+from update_compression import UpdateEncoder
+
+# Benchmark suite for the chain, the federated model, the data storages, privacy and the exchange.
+# Every benchmark is seeded and returns flat metrics; "*_per_second" metrics are better when higher,
+# every other metric (seconds, bytes) is better when lower. Results are JSON and can be compared
+# against a saved baseline, failing on regressions beyond a threshold.
+PROFILES = {
+    # cleanup_sizes: LowQualityDataStorage sizes for the expiry benchmark; compression_clients: updates per round
+    # in the update compression benchmark
+    "quick": {"repeat": 1, "chain_points": 2_000, "clients": 4, "rows_per_client": 500, "predictions": 2_000,
+              "storage_points": 2_000, "cleanup_sizes": (10_000,), "privacy_users": 4, "messages": 1_000,
+              "contributions": 5_000, "compression_clients": 20},
+    "standard": {"repeat": 3, "chain_points": 20_000, "clients": 8, "rows_per_client": 2_000, "predictions": 10_000,
+                 "storage_points": 20_000, "cleanup_sizes": (10_000, 100_000, 1_000_000), "privacy_users": 16,
+                 "messages": 10_000, "contributions": 50_000, "compression_clients": 100},
+}
+
+BENCHMARKS: Dict[str, Callable[[Dict[str, Any], int], Dict[str, float]]] = {}
+
+def benchmark(name: str):
+    def register(fn):
+        BENCHMARKS[name] = fn
+        return fn
+    return register
+
+def best_of(repeat: int, run: Callable[[Any], Any], setup: Callable[[], Any] = lambda: None,
+            teardown: Callable[[Any], Any] = lambda state: None) -> float:
+    # Fastest of repeat timed runs, each on a fresh setup(); setup and teardown are not timed
+    best = float("inf")
+    for _ in range(repeat):
+        state = setup()
+        try:
+            start = time.perf_counter()
+            run(state)
+            best = min(best, time.perf_counter() - start)
+        finally:
+            teardown(state)
+    return best
+
+@contextlib.contextmanager
+def quiet():
+    # Several of the benchmarked classes print on every call
+    with contextlib.redirect_stdout(io.StringIO()):
+        yield
+
+# --- synthetic data ---
+
+def synthetic_features(rng: np.random.Generator, rows: int, n_features: int = 100) -> Tuple[np.ndarray, np.ndarray]:
+    features = rng.standard_normal((rows, n_features))
+    labels = (features[:, 0] + 0.5 * rng.standard_normal(rows) > 0).astype(np.float64)
+    return features, labels
+
+def synthetic_records(rng: np.random.Generator, count: int, score_range: Tuple[float, float],
+                      max_age_days: int = 0) -> List[Tuple[Any, Dict[str, Any], float, datetime]]:
+    # (data, metadata, quality_score, timestamp) tuples with a few low-cardinality metadata fields to search on
+    sources = ["web", "app", "sensor", "partner"]
+    kinds = ["text", "image", "tabular"]
+    scores = rng.uniform(*score_range, size=count)
+    ages = rng.uniform(0, max_age_days, size=count) if max_age_days else np.zeros(count)
+    now = datetime.now()
+    return [(f"record {i} " + "x" * int(rng.integers(32, 256)),
+             {"source": sources[i % len(sources)], "type": kinds[i % len(kinds)], "batch": i // 1000},
+             float(scores[i]), now - timedelta(days=float(ages[i])))
+            for i in range(count)]
+
+def build_points(point_class, records) -> List[Any]:
+    data_points = point_class.create_many([(data, metadata, score) for data, metadata, score, _ in records])
+    for data_point, (_, _, _, timestamp) in zip(data_points, records):
+        data_point.timestamp = timestamp
+    return data_points
+
+# --- benchmarks ---
+
+@benchmark("neurochain")
+def bench_neurochain(profile: Dict[str, Any], seed: int) -> Dict[str, float]:
+    features, labels = synthetic_features(np.random.default_rng(seed), profile["chain_points"])
+
+    def setup():
+        arena = FeatureArena(features.shape[1], capacity=len(features))
+        return NeuroChain(), [DataPoint(features[i], labels[i], arena=arena) for i in range(len(features))]
+
+    def add_all(state):
+        chain, data_points = state
+        for data_point in data_points:
+            chain.add_data(data_point)
+
+    def add_batch(state):
+        chain, data_points = state
+        chain.add_data_batch(data_points)
+
+    add_seconds = best_of(profile["repeat"], add_all, setup)
+    batch_seconds = best_of(profile["repeat"], add_batch, setup)
+    blocks = len(features) // NeuroChain.block_size
+    return {
+        "add_data_per_second": len(features) / add_seconds,
+        "blocks_sealed_per_second": blocks / add_seconds,
+        "add_data_batch_per_second": len(features) / batch_seconds,
+    }
+
+@benchmark("neuronet")
+def bench_neuronet(profile: Dict[str, Any], seed: int) -> Dict[str, float]:
+    rng = np.random.default_rng(seed)
+    clients, rows = profile["clients"], profile["rows_per_client"]
+    features, labels = synthetic_features(rng, clients * rows)
+    queries, _ = synthetic_features(rng, profile["predictions"])
+
+    def setup():
+        np.random.seed(seed)
+        neuronet = NeuroNet(learning_rate=1e-4)
+        for c in range(clients):
+            neuronet.register_client(f"client_{c}")
+        return neuronet
+
+    def receive(neuronet):
+        for i in range(len(features)):
+            neuronet.receive_client_data(f"client_{i % clients}", features[i], labels[i])
+
+    receive_seconds = best_of(profile["repeat"], receive, setup)
+    neuronet = setup()
+    receive(neuronet)
+    round_seconds = best_of(profile["repeat"], lambda _: neuronet.train_federated_model(seed=seed))
+
+    def predict(_):
+        for query in queries:
+            neuronet.get_model_prediction(query)
+
+    predict_seconds = best_of(profile["repeat"], predict)
+    return {
+        "receive_client_data_per_second": len(features) / receive_seconds,
+        "train_round_seconds": round_seconds,
+        "train_rows_per_second": len(features) / round_seconds,
+        "get_model_prediction_per_second": len(queries) / predict_seconds,
+    }
+
+@benchmark("precision")
+def bench_precision(profile: Dict[str, Any], seed: int) -> Dict[str, float]:
+    # float64 against float32 NeuroNet on the same data: memory held by weights and client features,
+    # training round time and batch prediction throughput
+    rng = np.random.default_rng(seed)
+    clients, rows = profile["clients"], profile["rows_per_client"]
+    features, labels = synthetic_features(rng, clients * rows)
+    queries, _ = synthetic_features(rng, profile["predictions"])
+    metrics = {}
+    for dtype in (np.float64, np.float32):
+        name = np.dtype(dtype).name
+        np.random.seed(seed)
+        neuronet = NeuroNet(learning_rate=1e-4, dtype=dtype)
+        for c in range(clients):
+            neuronet.register_client(f"client_{c}")
+            neuronet.receive_client_batch(f"client_{c}", features[c * rows:(c + 1) * rows],
+                                          labels[c * rows:(c + 1) * rows])
+        round_seconds = best_of(profile["repeat"], lambda _: neuronet.train_federated_model(seed=seed))
+        queries_cast = queries.astype(dtype)
+        neuronet.predict_batch(queries_cast[:1024])  # Warm the activation buffers
+        predict_seconds = best_of(profile["repeat"], lambda _: neuronet.predict_batch(queries_cast))
+        metrics.update({
+            f"{name}_weight_bytes": sum(w.nbytes for w in neuronet.model.global_weights.values()),
+            f"{name}_feature_bytes": neuronet.arena.features.nbytes,
+            f"{name}_train_round_seconds": round_seconds,
+            f"{name}_predict_batch_per_second": len(queries) / predict_seconds,
+        })
+    return metrics
+
+@benchmark("update_compression")
+def bench_update_compression(profile: Dict[str, Any], seed: int) -> Dict[str, float]:
+    # Bytes sent and aggregation time for one round of client updates per encoding mode, and the largest
+    # deviation from the dense aggregate
+    rng = np.random.default_rng(seed)
+    np.random.seed(seed)
+    global_weights = NeuroNet().model.global_weights
+    n_clients = profile["compression_clients"]
+    updates = [{layer: w + rng.normal(scale=0.01, size=w.shape) for layer, w in global_weights.items()}
+               for _ in range(n_clients)]
+    sample_counts = rng.integers(1, 100, size=n_clients)
+
+    def aggregate(payloads):
+        aggregator = RoundAggregator(global_weights)
+        for i, (payload, num_samples) in enumerate(zip(payloads, sample_counts)):
+            aggregator.add_update(i, payload, num_samples)
+        return aggregator.result()
+
+    expected = aggregate(updates)
+    metrics = {}
+    for mode in ("dense",) + UpdateEncoder.MODES:
+        if mode == "dense":
+            payloads = updates
+            total_bytes = sum(w.nbytes for update in updates for w in update.values())
+        else:
+            encoder = UpdateEncoder(mode)
+            payloads = [encoder.encode(i, update, global_weights) for i, update in enumerate(updates)]
+            total_bytes = sum(payload.nbytes for payload in payloads)
+        aggregated = aggregate(payloads)
+        metrics.update({
+            f"{mode}_bytes_per_round": total_bytes,
+            f"{mode}_aggregation_seconds": best_of(profile["repeat"], lambda _: aggregate(payloads)),
+            f"{mode}_max_abs_error": max(float(np.max(np.abs(aggregated[layer] - w))) for layer, w in expected.items()),
+        })
+    return metrics
+
+@benchmark("high_quality_storage")
+def bench_high_quality_storage(profile: Dict[str, Any], seed: int) -> Dict[str, float]:
+    records = synthetic_records(np.random.default_rng(seed), profile["storage_points"], (0.8, 1.0))
+    metrics = {}
+    for engine in ("json", "segment"):
+        directories = []
+
+        def setup():
+            directories.append(tempfile.mkdtemp(prefix="bench_hq_"))
+            return HighQualityDataStorage(directories[-1], engine=engine, metadata_indexes=["source"],
+                                          range_indexes=["quality_score"]), build_points(HighQualityDataPoint, records)
+
+        def add(state):
+            storage, data_points = state
+            storage.add_data_points(data_points)
+            storage.close()
+
+        metrics[f"{engine}_add_per_second"] = len(records) / best_of(profile["repeat"], add, setup)
+
+        def load(_):
+            storage = HighQualityDataStorage(directories[-1], engine=engine, metadata_indexes=["source"],
+                                             range_indexes=["quality_score"])
+            storage.load_from_disk()
+            storage.close()
+
+        metrics[f"{engine}_load_per_second"] = len(records) / best_of(profile["repeat"], load)
+
+        storage = HighQualityDataStorage(directories[-1], engine=engine, metadata_indexes=["source"],
+                                         range_indexes=["quality_score"])
+        storage.load_from_disk()
+        queries = [({"source": "web"}, None), ({"type": "image"}, None), ({"source": "app"}, (0.9, 0.95))]
+
+        def search(_):
+            for query, quality_range in queries:
+                storage.search_by_metadata(query, quality_range)
+
+        metrics[f"{engine}_search_per_second"] = len(queries) / best_of(profile["repeat"], search)
+        storage.close()
+        for directory in directories:
+            shutil.rmtree(directory, ignore_errors=True)
+    return metrics
+
+@benchmark("low_quality_cleanup")
+def bench_low_quality_cleanup(profile: Dict[str, Any], seed: int) -> Dict[str, float]:
+    # Half of the points are past the 30-day retention period
+    metrics = {}
+    for size in profile["cleanup_sizes"]:
+        records = synthetic_records(np.random.default_rng(seed), size, (0.0, 0.8), max_age_days=62)
+
+        def setup():
+            directory = tempfile.mkdtemp(prefix="bench_lq_")
+            storage = LowQualityDataStorage(directory, retention_period=30)
+            for start in range(0, size, 10_000):
+                storage.add_data_points(build_points(LowQualityDataPoint, records[start:start + 10_000]))
+            return directory, storage
+
+        def cleanup(state):
+            expired.append(state[1].cleanup_expired_data())
+
+        def teardown(state):
+            state[1].close()
+            shutil.rmtree(state[0], ignore_errors=True)
+
+        expired: List[int] = []
+        seconds = best_of(profile["repeat"], cleanup, setup, teardown)
+        metrics[f"cleanup_{size}_seconds"] = seconds
+        metrics[f"cleanup_{size}_expired_per_second"] = expired[-1] / seconds
+    return metrics
+
+@benchmark("privacy")
+def bench_privacy(profile: Dict[str, Any], seed: int) -> Dict[str, float]:
+    users = [f"user_{i}" for i in range(profile["privacy_users"])]
+    rng = random.Random(seed)
+    messages = ["".join(rng.choices("abcdefghijklmnopqrstuvwxyz ", k=rng.randint(16, 512)))
+                for _ in range(profile["messages"])]
+
+    def derive(manager):
+        with quiet():
+            for user_id in users:
+                manager.create_user_privacy_settings(user_id)
+
+    derive_seconds = best_of(profile["repeat"], derive, PrivacyManager)
+    manager = PrivacyManager()
+    derive(manager)
+    tokens: List[str] = []
+
+    def encrypt(_):
+        tokens[:] = [manager.encrypt_data(users[i % len(users)], m) for i, m in enumerate(messages)]
+
+    def decrypt(_):
+        for i, token in enumerate(tokens):
+            manager.decrypt_data(users[i % len(users)], token)
+
+    encrypt_seconds = best_of(profile["repeat"], encrypt)
+    decrypt_seconds = best_of(profile["repeat"], decrypt)
+    return {
+        "key_derivations_per_second": len(users) / derive_seconds,
+        "encrypt_per_second": len(messages) / encrypt_seconds,
+        "decrypt_per_second": len(messages) / decrypt_seconds,
+    }
+
+@benchmark("exchange")
+def bench_exchange(profile: Dict[str, Any], seed: int) -> Dict[str, float]:
+    users = [f"user_{i}" for i in range(100)]
+    kinds = ["image", "text", "audio"]
+
+    def setup():
+        random.seed(seed)  # NeuroExchange draws quality scores from the random module
+        exchange = NeuroExchange()
+        exchange.token_supply = float("inf")  # Keep every contribution on the minting path
+        with quiet():
+            for user_id in users:
+                exchange.register_user(user_id)
+        return exchange
+
+    def contribute(exchange):
+        with quiet():
+            for i in range(profile["contributions"]):
+                exchange.contribute_data(users[i % len(users)], kinds[i % len(kinds)], 100 + i % 900)
+
+    return {"contribute_data_per_second": profile["contributions"] / best_of(profile["repeat"], contribute, setup)}
+
+# --- running and comparing ---
+
+def run_suite(profile_name: str = "standard", names: Optional[List[str]] = None, seed: int = 0,
+              overrides: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+    profile = {**PROFILES[profile_name], **(overrides or {})}
+    unknown = set(names or ()) - set(BENCHMARKS)
+    if unknown:
+        raise ValueError(f"Unknown benchmarks {sorted(unknown)}, expected some of {sorted(BENCHMARKS)}")
+    results = {}
+    for name in names or BENCHMARKS:
+        start = time.perf_counter()
+        results[name] = BENCHMARKS[name](profile, seed)
+        print(f"{name}: done in {time.perf_counter() - start:.1f}s", file=sys.stderr)
+    return {
+        "meta": {
+            "profile": profile_name,
+            "settings": {key: list(value) if isinstance(value, tuple) else value for key, value in profile.items()},
+            "seed": seed,
+            "created": datetime.now().isoformat(),
+            "python": platform.python_version(),
+            "numpy": np.__version__,
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+        },
+        "results": results,
+    }
+
+def higher_is_better(metric: str) -> bool:
+    return metric.endswith("_per_second")
+
+def compare(current: Dict[str, Any], baseline: Dict[str, Any], threshold: float = 0.1) -> List[Dict[str, Any]]:
+    # One row per metric present in both runs; "regressed" is set when it is more than threshold worse
+    rows = []
+    for name, metrics in baseline["results"].items():
+        for metric, base in metrics.items():
+            value = current["results"].get(name, {}).get(metric)
+            if value is None or not base:
+                continue
+            change = value / base - 1
+            worse = -change if higher_is_better(metric) else change
+            rows.append({"benchmark": name, "metric": metric, "baseline": base, "current": value,
+                         "change": change, "regressed": worse > threshold})
+    return rows
+
+def print_comparison(rows: List[Dict[str, Any]]):
+    for row in rows:
+        flag = "REGRESSED" if row["regressed"] else ""
+        print(f"{row['benchmark']:>22} {row['metric']:<36} {row['baseline']:>14.4g} {row['current']:>14.4g} "
+              f"{row['change']:>+8.1%} {flag}")
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Run the benchmark suite or compare two result files")
+    commands = parser.add_subparsers(dest="command", required=True)
+    run = commands.add_parser("run", help="Run benchmarks and write JSON results")
+    run.add_argument("--profile", choices=sorted(PROFILES), default="standard")
+    run.add_argument("--only", nargs="+", choices=sorted(BENCHMARKS), help="Benchmarks to run (default: all)")
+    run.add_argument("--seed", type=int, default=0)
+    run.add_argument("--cleanup-sizes", type=int, nargs="+", help="Override the profile's cleanup sizes")
+    run.add_argument("--output", help="Result file (default: stdout)")
+    run.add_argument("--baseline", help="Compare against this result file after running")
+    run.add_argument("--threshold", type=float, default=0.1, help="Allowed relative slowdown (default: 0.1)")
+    check = commands.add_parser("compare", help="Compare a result file against a baseline")
+    check.add_argument("current")
+    check.add_argument("baseline")
+    check.add_argument("--threshold", type=float, default=0.1)
+    args = parser.parse_args(argv)
+
+    if args.command == "run":
+        overrides = {"cleanup_sizes": tuple(args.cleanup_sizes)} if args.cleanup_sizes else None
+        current = run_suite(args.profile, args.only, args.seed, overrides)
+        if args.output:
+            with open(args.output, "w") as f:
+                json.dump(current, f, indent=2)
+        else:
+            print(json.dumps(current, indent=2))
+        if not args.baseline:
+            return 0
+        baseline_path = args.baseline
+    else:
+        with open(args.current) as f:
+            current = json.load(f)
+        baseline_path = args.baseline
+    with open(baseline_path) as f:
+        baseline = json.load(f)
+    rows = compare(current, baseline, args.threshold)
+    print_comparison(rows)
+    regressions = [row for row in rows if row["regressed"]]
+    if regressions:
+        print(f"{len(regressions)} metric(s) regressed by more than {args.threshold:.0%}", file=sys.stderr)
+        return 1
+    return 0
+
+# Usage:
+#   python benchmarks.py run --profile quick --output baseline.json
+#   python benchmarks.py run --profile quick --baseline baseline.json --threshold 0.15
+#   python benchmarks.py compare current.json baseline.json
+if __name__ == "__main__":
+    sys.exit(main())
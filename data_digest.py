@@ -0,0 +1,97 @@
+import hashlib
+import json
+import struct
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Any, Callable, Iterable, Optional, Tuple
+
+import numpy as np
+
+# Content digests for data points. Every algorithm yields 32 bytes, the key width of segment records
+# and reference journal entries. The algorithm is chosen per storage and recorded in its manifest
+# (see storage_base), since hashes from different algorithms never match.
+ALGORITHMS: Dict[str, Callable[[], Any]] = {
+    "sha256": hashlib.sha256,
+    "blake2b": lambda: hashlib.blake2b(digest_size=32),
+    "blake2s": hashlib.blake2s,
+    "sha3_256": hashlib.sha3_256,
+}
+DEFAULT_ALGORITHM = "sha256"
+
+_LENGTH = struct.Struct("<Q")
+_encode_json = json.JSONEncoder(sort_keys=True, separators=(",", ":"), ensure_ascii=False).encode  # Built once, not per call
+PARALLEL_MIN_BYTES = 64 * 1024  # Smaller payloads are hashed inline; thread hand-off would cost more than it saves
+
+def check_algorithm(name: str):
+    if name not in ALGORITHMS:
+        raise ValueError(f"Unknown digest algorithm {name!r}, expected one of {sorted(ALGORITHMS)}")
+
+def encode_value(value: Any, chunks: List[bytes]):
+    # Canonical encoding as (type tag, length, bytes) chunks. Text, bytes and arrays are used as-is;
+    # anything else is one compact, key-sorted JSON document.
+    if isinstance(value, str):
+        raw = value.encode("utf-8", "surrogatepass")
+        chunks += (b"S", _LENGTH.pack(len(raw)), raw)
+    elif isinstance(value, (bytes, bytearray, memoryview)):
+        raw = memoryview(value).cast("B")
+        chunks += (b"B", _LENGTH.pack(raw.nbytes), raw)
+    elif isinstance(value, np.ndarray):
+        header = f"{value.dtype.str}{value.shape}".encode()
+        raw = memoryview(np.ascontiguousarray(value).reshape(-1).view(np.uint8))  # cast("B") rejects empty shapes
+        chunks += (b"A", _LENGTH.pack(len(header)), header, _LENGTH.pack(raw.nbytes), raw)
+    else:
+        raw = _encode_json(value).encode("utf-8", "surrogatepass")
+        chunks += (b"J", _LENGTH.pack(len(raw)), raw)
+
+def encode_content(data: Any, metadata: Dict[str, Any]) -> List[bytes]:
+    chunks: List[bytes] = []
+    encode_value(data, chunks)
+    encode_value(metadata, chunks)
+    return chunks
+
+def _hash_chunks(chunks: List[bytes], algorithm: str, size: int) -> str:
+    hasher = ALGORITHMS[algorithm]()
+    if size < PARALLEL_MIN_BYTES:
+        hasher.update(b"".join(chunks))  # One call beats several for small content
+    else:
+        for chunk in chunks:
+            hasher.update(chunk)
+    return hasher.hexdigest()
+
+def content_digest(data: Any, metadata: Dict[str, Any], algorithm: str = DEFAULT_ALGORITHM) -> str:
+    chunks = encode_content(data, metadata)
+    return _hash_chunks(chunks, algorithm, sum(map(len, chunks)))
+
+def content_digests(items: Iterable[Tuple[Any, Dict[str, Any]]], algorithm: str = DEFAULT_ALGORITHM,
+                    max_workers: Optional[int] = None) -> List[str]:
+    # Batch form of content_digest. Encoding holds the GIL, but hashlib releases it while hashing large
+    # buffers, so payloads of PARALLEL_MIN_BYTES or more are hashed on a thread pool.
+    digests: List[Optional[str]] = []
+    large = []  # (position, chunks, size)
+    for data, metadata in items:
+        chunks = encode_content(data, metadata)
+        size = sum(map(len, chunks))
+        if size < PARALLEL_MIN_BYTES:
+            digests.append(_hash_chunks(chunks, algorithm, size))
+        else:
+            large.append((len(digests), chunks, size))
+            digests.append(None)
+    if len(large) > 1:
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            hashed = executor.map(lambda job: _hash_chunks(job[1], algorithm, job[2]), large)
+            for (i, _, _), digest in zip(large, hashed):
+                digests[i] = digest
+    else:
+        for i, chunks, size in large:
+            digests[i] = _hash_chunks(chunks, algorithm, size)
+    return digests
+
+# Example usage
+if __name__ == "__main__":
+    import time
+
+    items = [(f"sample {i}", {"type": "text", "id": i}) for i in range(50_000)]
+    items += [(np.random.rand(256 * 1024), {"type": "tensor", "id": i}) for i in range(32)]
+    for name in ("sha256", "blake2b"):
+        start = time.perf_counter()
+        digests = content_digests(items, algorithm=name)
+        print(f"{name}: {len(digests)} digests in {time.perf_counter() - start:.3f}s")
@@ -0,0 +1,151 @@
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+from typing import Dict, List, Optional, Tuple
+import numpy as np
+
+from neuronet_core import ArenaRows, train_local_weights
+
+# (name, shape, dtype, byte offset) for each array packed into a shared block
+ArrayLayout = List[Tuple[str, Tuple[int, ...], str, int]]
+
+def _pack_layout(arrays: Dict[str, np.ndarray]) -> Tuple[ArrayLayout, int]:
+    layout = []
+    offset = 0
+    for name, array in arrays.items():
+        layout.append((name, array.shape, array.dtype.str, offset))
+        offset += array.nbytes
+    return layout, offset
+
+def _views(buffer, layout: ArrayLayout) -> Dict[str, np.ndarray]:
+    return {
+        name: np.ndarray(shape, dtype=np.dtype(dtype), buffer=buffer, offset=offset)
+        for name, shape, dtype, offset in layout
+    }
+
+def _attach_shared_memory(name: str) -> shared_memory.SharedMemory:
+    # Workers only borrow the block; the parent process owns and unlinks it.
+    # Before 3.13 attaching re-registers the name with the parent's (shared) resource tracker, which is harmless.
+    try:
+        return shared_memory.SharedMemory(name=name, track=False)  # Python 3.13+
+    except TypeError:
+        return shared_memory.SharedMemory(name=name)
+
+def _train_client_task(weights_block: str, weights_layout: ArrayLayout,
+                       data_block: str, data_layout: ArrayLayout,
+                       output_block: str, output_layout: ArrayLayout,
+                       seed: Optional[int], epochs: int, batch_size: int, learning_rate: float):
+    weights_shm = _attach_shared_memory(weights_block)
+    data_shm = _attach_shared_memory(data_block)
+    output_shm = _attach_shared_memory(output_block)
+    try:
+        global_weights = _views(weights_shm.buf, weights_layout)
+        data = _views(data_shm.buf, data_layout)
+        output = _views(output_shm.buf, output_layout)
+        local_weights = train_local_weights(
+            global_weights, data["features"], data["labels"],
+            epochs=epochs, batch_size=batch_size, learning_rate=learning_rate, seed=seed
+        )
+        for layer, weights in local_weights.items():
+            output[layer][...] = weights
+        # Views must be released before the blocks can be closed
+        del global_weights, data, output, local_weights
+    finally:
+        weights_shm.close()
+        data_shm.close()
+        output_shm.close()
+
+class ParallelRoundExecutor:
+    def __init__(self, max_workers: Optional[int] = None):
+        self.max_workers = max_workers
+        self._pool: Optional[ProcessPoolExecutor] = None
+        # client_id -> (shared block, layout, rows published); reused while the dataset is unchanged
+        self._client_blocks: Dict[str, Tuple[shared_memory.SharedMemory, ArrayLayout, int]] = {}
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def run_round(self, global_weights: Dict[str, np.ndarray], datasets: List[Tuple[str, ArenaRows]],
+                  seeds: List[Optional[int]], epochs: int = 1, batch_size: int = 32,
+                  learning_rate: float = 1e-4) -> List[Dict[str, np.ndarray]]:
+        if self._pool is None:
+            self._pool = ProcessPoolExecutor(max_workers=self.max_workers)
+
+        weights_shm, weights_layout = self._publish(global_weights)
+        output_layouts = []
+        per_client, client_bytes = _pack_layout(global_weights)
+        output_shm = shared_memory.SharedMemory(create=True, size=max(client_bytes * len(datasets), 1))
+        try:
+            futures = []
+            for i, ((client_id, dataset), seed) in enumerate(zip(datasets, seeds)):
+                data_shm, data_layout = self._publish_client(client_id, dataset)
+                output_layout = [(name, shape, dtype, offset + i * client_bytes)
+                                 for name, shape, dtype, offset in per_client]
+                output_layouts.append(output_layout)
+                futures.append(self._pool.submit(
+                    _train_client_task, weights_shm.name, weights_layout,
+                    data_shm.name, data_layout, output_shm.name, output_layout,
+                    seed, epochs, batch_size, learning_rate
+                ))
+            for future in futures:
+                future.result()
+
+            return [
+                {layer: array.copy() for layer, array in _views(output_shm.buf, layout).items()}
+                for layout in output_layouts
+            ]
+        finally:
+            weights_shm.close()
+            weights_shm.unlink()
+            output_shm.close()
+            output_shm.unlink()
+
+    def _publish(self, arrays: Dict[str, np.ndarray]) -> Tuple[shared_memory.SharedMemory, ArrayLayout]:
+        layout, size = _pack_layout(arrays)
+        shm = shared_memory.SharedMemory(create=True, size=max(size, 1))
+        views = _views(shm.buf, layout)
+        for name, array in arrays.items():
+            views[name][...] = array
+        del views
+        return shm, layout
+
+    def _publish_client(self, client_id: str, dataset: ArenaRows) -> Tuple[shared_memory.SharedMemory, ArrayLayout]:
+        published = self._client_blocks.get(client_id)
+        if published is not None:
+            shm, layout, rows = published
+            if rows == dataset.size:
+                return shm, layout
+            shm.close()
+            shm.unlink()
+
+        shm, layout = self._publish({"features": dataset.features, "labels": dataset.labels})
+        self._client_blocks[client_id] = (shm, layout, dataset.size)
+        return shm, layout
+
+    def close(self):
+        if self._pool is not None:
+            self._pool.shutdown()
+            self._pool = None
+        for shm, _, _ in self._client_blocks.values():
+            shm.close()
+            shm.unlink()
+        self._client_blocks.clear()
+
+# Example usage
+if __name__ == "__main__":
+    from neuronet_core import NeuroNet
+
+    neuronet = NeuroNet(local_epochs=2)
+    for i in range(8):
+        neuronet.register_client(f"client_{i}")
+        for _ in range(50):
+            neuronet.receive_client_data(f"client_{i}", np.random.randn(100), np.random.randint(2))
+
+    with ParallelRoundExecutor(max_workers=4) as executor:
+        neuronet.train_federated_model(seed=42, executor=executor)
+        neuronet.train_federated_model(seed=43, executor=executor)
+
+    prediction = neuronet.get_model_prediction(np.random.randn(100))
+    print(f"Model prediction after parallel rounds: {prediction}")
@@ -1,103 +1,133 @@
-import hashlib
-from typing import Dict, List, Any
-from datetime import datetime
-import json
+from typing import Dict, List, Any, Callable, Iterable, Optional
 import os
+from functools import partial
 
-class HighQualityDataPoint:
-    def __init__(self, data: Any, metadata: Dict[str, Any], quality_score: float):
-        self.data = data
-        self.metadata = metadata
-        self.quality_score = quality_score
-        self.timestamp = datetime.now()
-        self.hash = self._generate_hash()
-
-    def _generate_hash(self) -> str:
-        data_string = json.dumps(self.data, sort_keys=True)
-        metadata_string = json.dumps(self.metadata, sort_keys=True)
-        hash_input = f"{data_string}{metadata_string}{self.quality_score}{self.timestamp}"
-        return hashlib.sha256(hash_input.encode()).hexdigest()
-
-class HighQualityDataStorage:
-    def __init__(self, storage_path: str):
-        self.storage_path = storage_path
-        self.data_points: List[HighQualityDataPoint] = []
-        self.index: Dict[str, int] = {}  # Hash to index mapping
-
-    def add_data_point(self, data_point: HighQualityDataPoint) -> bool:
-        if data_point.quality_score < 0.8:  # Threshold for high-quality data
-            return False
-        
-        self.data_points.append(data_point)
-        self.index[data_point.hash] = len(self.data_points) - 1
-        self._persist_data_point(data_point)
-        return True
-
-    def get_data_point(self, hash_value: str) -> HighQualityDataPoint:
-        if hash_value in self.index:
-            return self.data_points[self.index[hash_value]]
-        return None
-
-    def update_data_point(self, hash_value: str, new_data: Any, new_metadata: Dict[str, Any]) -> bool:
-        if hash_value not in self.index:
-            return False
-        
-        index = self.index[hash_value]
-        data_point = self.data_points[index]
-        data_point.data = new_data
-        data_point.metadata.update(new_metadata)
-        data_point.timestamp = datetime.now()
-        data_point.hash = data_point._generate_hash()
-        
-        self.index.pop(hash_value)
-        self.index[data_point.hash] = index
-        
-        self._persist_data_point(data_point)
-        return True
-
-    def _persist_data_point(self, data_point: HighQualityDataPoint):
-        file_path = os.path.join(self.storage_path, f"{data_point.hash}.json")
-        with open(file_path, 'w') as f:
-            json.dump({
-                'data': data_point.data,
-                'metadata': data_point.metadata,
-                'quality_score': data_point.quality_score,
-                'timestamp': data_point.timestamp.isoformat(),
-                'hash': data_point.hash
-            }, f)
-
-    def load_from_disk(self):
-        for filename in os.listdir(self.storage_path):
-            if filename.endswith('.json'):
-                with open(os.path.join(self.storage_path, filename), 'r') as f:
-                    data = json.load(f)
-                    data_point = HighQualityDataPoint(
-                        data['data'],
-                        data['metadata'],
-                        data['quality_score']
-                    )
-                    data_point.timestamp = datetime.fromisoformat(data['timestamp'])
-                    data_point.hash = data['hash']
-                    self.data_points.append(data_point)
-                    self.index[data_point.hash] = len(self.data_points) - 1
-
-    def get_all_data_points(self) -> List[HighQualityDataPoint]:
-        return self.data_points
-
-    def search_by_metadata(self, query: Dict[str, Any]) -> List[HighQualityDataPoint]:
-        results = []
-        for data_point in self.data_points:
-            if all(data_point.metadata.get(k) == v for k, v in query.items()):
-                results.append(data_point)
-        return results
-
-    def get_data_point_count(self) -> int:
-        return len(self.data_points)
-
-    def get_average_quality_score(self) -> float:
-        if not self.data_points:
-            return 0.0
-        return sum(dp.quality_score for dp in self.data_points) / len(self.data_points)
+from data_digest import DEFAULT_ALGORITHM
+from storage_base import BaseDataPoint, BaseDataStorage
+from storage_loader import parallel_map
+from storage_records import RECORD_SUFFIXES, convert_record, decode_header, decode_payload, decode_record, is_binary_record
+from storage_segments import SegmentRecordLog
+from storage_writer import OP_DELETE, OP_PUT, WriteOp
+
+class HighQualityDataPoint(BaseDataPoint):
+    pass
+
+class HighQualityDataStorage(BaseDataStorage):
+    point_class = HighQualityDataPoint
+
+    def __init__(self, storage_path: str, engine: str = "json", segment_size: int = 256 * 1024 * 1024,
+                 compaction_interval: float = None, metadata_indexes: Iterable[str] = (),
+                 range_indexes: Iterable[str] = (), stats_keys: Iterable[str] = (), stats_flush_interval: int = 1000,
+                 quality_threshold: float = 0.8, compaction_ratio: float = 0.25, record_format: str = "json",
+                 compression: Optional[str] = None, digest_algorithm: str = DEFAULT_ALGORITHM):
+        # engine="json" keeps one file per data point; engine="segment" appends records to a SegmentRecordLog.
+        # quality_threshold is the lowest accepted quality_score.
+        if engine not in ("json", "segment"):
+            raise ValueError(f"Unknown storage engine: {engine}")
+        super().__init__(storage_path, metadata_indexes=metadata_indexes, range_indexes=range_indexes,
+                         stats_keys=stats_keys, stats_flush_interval=stats_flush_interval,
+                         quality_threshold=quality_threshold, compaction_ratio=compaction_ratio,
+                         record_format=record_format, compression=compression,
+                         digest_algorithm=digest_algorithm)
+        self.engine = engine
+        self.segment_log = SegmentRecordLog(storage_path, segment_size) if engine == "segment" else None
+        if self.segment_log is not None and compaction_interval:
+            self.segment_log.start_background_compaction(compaction_interval)
+
+    def _accepts(self, data_point: HighQualityDataPoint) -> bool:
+        return data_point.quality_score >= self.quality_threshold
+
+    # --- segment engine ---
+
+    def _put_op(self, data_point: HighQualityDataPoint) -> WriteOp:
+        if self.segment_log is None:
+            return super()._put_op(data_point)
+        return (OP_PUT, bytes.fromhex(data_point.hash), self._encode(data_point, self.record_format))
+
+    def _delete_op(self, hash_value: str) -> WriteOp:
+        if self.segment_log is None:
+            return super()._delete_op(hash_value)
+        return (OP_DELETE, bytes.fromhex(hash_value), None)
+
+    def _write_batch(self, ops: List[WriteOp], fsync: bool):
+        if self.segment_log is None:
+            super()._write_batch(ops, fsync)
+        else:
+            self.segment_log.write_batch(ops, fsync)
+
+    def _detach_record(self, hash_value: str) -> Any:
+        # A segment record leaves as raw bytes and is tombstoned here
+        if self.segment_log is None:
+            return super()._detach_record(hash_value)
+        record = self.segment_log.get(bytes.fromhex(hash_value))
+        self._write([self._delete_op(hash_value)], timeout=None)
+        return record
+
+    def _attach_record(self, hash_value: str, record: Any) -> Callable[[], Any]:
+        if self.segment_log is None:
+            return super()._attach_record(hash_value, record)
+        key = bytes.fromhex(hash_value)
+        if isinstance(record, str):
+            with open(record, 'rb') as f:
+                self.segment_log.put(key, f.read())
+            os.remove(record)
+        else:
+            self.segment_log.put(key, record)
+        return partial(self._read_segment_payload, key)
+
+    def _load_records(self, max_workers: Optional[int]):
+        if self.segment_log is None:
+            return super()._load_records(max_workers)
+        # Offsets come from the on-disk index; segments are never scanned end to end
+        keys = [key for key in self.segment_log.keys() if key.hex() not in self.index]
+        for key, header in zip(keys, parallel_map(self._read_segment_header, keys, max_workers)):
+            self._load_header(header, partial(self._read_segment_payload, key))
+
+    def _read_segment_header(self, key: bytes) -> Dict[str, Any]:
+        return decode_header(self.segment_log.get(key))
+
+    def _read_segment_payload(self, key: bytes) -> Any:
+        return decode_payload(self.segment_log.get(key))
+
+    def migrate_json_directory(self, source_path: str = None, remove_source: bool = True) -> int:
+        # Moves a one-file-per-point directory (by default this storage's own) into the segment log,
+        # converting records to this storage's record_format on the way
+        if self.segment_log is None:
+            raise ValueError("migrate_json_directory requires engine='segment'")
+        source_path = source_path or self.storage_path
+        self.flush_writes()
+        migrated = 0
+        for filename in sorted(os.listdir(source_path)):
+            if not filename.endswith(RECORD_SUFFIXES):
+                continue
+            file_path = os.path.join(source_path, filename)
+            with open(file_path, 'rb') as f:
+                payload = f.read()
+            record = decode_record(payload)
+            if bytes.fromhex(record['hash']) not in self.segment_log:
+                if is_binary_record(payload) != (self.record_format == "binary") or self.compression:
+                    payload = convert_record(payload, self.record_format, self.compression)
+                self.segment_log.put(bytes.fromhex(record['hash']), payload)
+                if record['hash'] not in self.index:
+                    header = {key: record[key] for key in ('hash', 'metadata', 'quality_score', 'timestamp')}
+                    self._load_header(header, loader=None).data = record['data']
+            migrated += 1
+        self.segment_log.checkpoint()
+        if remove_source:
+            for filename in os.listdir(source_path):
+                if filename.endswith(RECORD_SUFFIXES):
+                    os.remove(os.path.join(source_path, filename))
+        return migrated
+
+    def compact(self, min_garbage_ratio: float = 0.5) -> int:
+        # Drops tombstones from memory and rewrites mostly-dead segments; returns the segments compacted
+        super().compact()
+        return self.segment_log.compact(min_garbage_ratio) if self.segment_log is not None else 0
+
+    def close(self):
+        super().close()
+        if self.segment_log is not None:
+            self.segment_log.close()
 
 # Example usage (not functional, just for illustration)
 if __name__ == "__main__":
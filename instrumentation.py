@@ -0,0 +1,220 @@
+import functools
+import os
+import sys
+import threading
+import time
+from bisect import bisect_left
+from collections import Counter
+from typing import Dict, List, Any, Callable, Optional
+
+# Process-wide counters, latency histograms and spans. Disabled by default: an instrumented call then
+# costs one flag check, and span() hands back a shared no-op context manager.
+_enabled = False
+_lock = threading.Lock()
+_counters: Dict[str, float] = {}
+_histograms: Dict[str, "LatencyHistogram"] = {}
+_active_spans: Dict[int, List[str]] = {}  # Thread id -> open span names, innermost last (read by the profiler)
+_profiler: Optional["SamplingProfiler"] = None
+
+def enable():
+    global _enabled
+    _enabled = True
+
+def disable():
+    global _enabled
+    _enabled = False
+
+def is_enabled() -> bool:
+    return _enabled
+
+def reset():
+    with _lock:
+        _counters.clear()
+        _histograms.clear()
+
+class LatencyHistogram:
+    # Log-spaced buckets from 1 microsecond doubling up to ~134 seconds; quantiles report the bucket's upper bound
+    BOUNDS = [1e-6 * 2 ** i for i in range(28)]
+
+    def __init__(self):
+        self.buckets = [0] * (len(self.BOUNDS) + 1)
+        self.count = 0
+        self.total = 0.0
+        self.min = float("inf")
+        self.max = 0.0
+
+    def observe(self, seconds: float):
+        self.buckets[bisect_left(self.BOUNDS, seconds)] += 1
+        self.count += 1
+        self.total += seconds
+        self.min = min(self.min, seconds)
+        self.max = max(self.max, seconds)
+
+    def quantile(self, q: float) -> float:
+        target = q * self.count
+        seen = 0
+        for i, n in enumerate(self.buckets):
+            seen += n
+            if seen >= target:
+                return min(self.BOUNDS[i] if i < len(self.BOUNDS) else self.max, self.max)
+        return self.max
+
+    def summary(self) -> Dict[str, float]:
+        return {
+            "count": self.count,
+            "total_seconds": self.total,
+            "mean_seconds": self.total / self.count if self.count else 0.0,
+            "min_seconds": self.min if self.count else 0.0,
+            "max_seconds": self.max,
+            "p50_seconds": self.quantile(0.5),
+            "p90_seconds": self.quantile(0.9),
+            "p99_seconds": self.quantile(0.99),
+        }
+
+def count(name: str, value: float = 1):
+    if _enabled:
+        with _lock:
+            _counters[name] = _counters.get(name, 0) + value
+
+def observe(name: str, seconds: float):
+    if _enabled:
+        with _lock:
+            histogram = _histograms.get(name)
+            if histogram is None:
+                histogram = _histograms[name] = LatencyHistogram()
+            histogram.observe(seconds)
+
+class _Span:
+    __slots__ = ("name", "start", "stack")
+
+    def __init__(self, name: str):
+        self.name = name
+
+    def __enter__(self):
+        self.stack = _active_spans.setdefault(threading.get_ident(), [])
+        self.stack.append(self.name)
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        elapsed = time.perf_counter() - self.start
+        self.stack.pop()
+        observe(self.name, elapsed)
+        if exc_type is not None:
+            count(self.name + ".errors")
+        return False
+
+class _NoSpan:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+_NO_SPAN = _NoSpan()
+
+def span(name: str):
+    # with span("chain.seal_block"): ... records the block's latency under name
+    return _Span(name) if _enabled else _NO_SPAN
+
+def instrumented(name: str):
+    # Decorator form of span(); while disabled the wrapped function is called straight through
+    def decorate(fn: Callable) -> Callable:
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            if not _enabled:
+                return fn(*args, **kwargs)
+            with _Span(name):
+                return fn(*args, **kwargs)
+        return wrapper
+    return decorate
+
+class SamplingProfiler:
+    # Samples every thread's current frame each interval and attributes it to the innermost open span,
+    # so a hot span can be broken down by function without tracing every call
+    def __init__(self, interval: float = 0.005):
+        self.interval = interval
+        self.samples: Counter = Counter()  # (span, function) -> samples
+        self._samples_lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self):
+        if self._thread is None:
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name="sampling-profiler", daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        if self._thread is not None:
+            self._stop.set()
+            self._thread.join()
+            self._thread = None
+
+    def _run(self):
+        own = threading.get_ident()
+        while not self._stop.wait(self.interval):
+            for thread_id, frame in sys._current_frames().items():
+                if thread_id == own:
+                    continue
+                spans = _active_spans.get(thread_id)
+                code = frame.f_code
+                function = f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+                with self._samples_lock:
+                    self.samples[(spans[-1] if spans else None, function)] += 1
+
+    def top(self, n: int = 20) -> List[Dict[str, Any]]:
+        with self._samples_lock:
+            total = sum(self.samples.values()) or 1
+            top = self.samples.most_common(n)
+        return [{"span": span_name, "function": function, "samples": samples, "share": samples / total}
+                for (span_name, function), samples in top]
+
+def start_profiler(interval: float = 0.005) -> SamplingProfiler:
+    # Optional: spans are only attributed while instrumentation is enabled
+    global _profiler
+    if _profiler is None:
+        _profiler = SamplingProfiler(interval)
+        _profiler.start()
+    return _profiler
+
+def stop_profiler() -> Optional[SamplingProfiler]:
+    global _profiler
+    profiler, _profiler = _profiler, None
+    if profiler is not None:
+        profiler.stop()
+    return profiler
+
+def snapshot(top_functions: int = 20) -> Dict[str, Any]:
+    with _lock:
+        result = {
+            "enabled": _enabled,
+            "counters": dict(_counters),
+            "histograms": {name: histogram.summary() for name, histogram in _histograms.items()},
+        }
+    if _profiler is not None:
+        result["profile"] = _profiler.top(top_functions)
+    return result
+
+# Example usage
+if __name__ == "__main__":
+    import json
+
+    enable()
+    start_profiler(interval=0.001)
+    for i in range(200):
+        with span("example.work"):
+            sum(x * x for x in range(2000))
+        count("example.items", 2000)
+    profiler = stop_profiler()
+    print(json.dumps(snapshot(), indent=2))
+    print(json.dumps(profiler.top(5), indent=2))
+
+    disable()
+    start = time.perf_counter()
+    for _ in range(1_000_000):
+        with span("example.disabled"):
+            pass
+    print(f"Disabled span cost: {(time.perf_counter() - start) * 1e3:.0f} ns per with-block")
@@ -1,126 +1,60 @@
-import hashlib
-from typing import Dict, List, Any
-from datetime import datetime
-import json
-import os
-
-class LowQualityDataPoint:
-    def __init__(self, data: Any, metadata: Dict[str, Any], quality_score: float):
-        self.data = data
-        self.metadata = metadata
-        self.quality_score = quality_score
-        self.timestamp = datetime.now()
-        self.hash = self._generate_hash()
-
-    def _generate_hash(self) -> str:
-        data_string = json.dumps(self.data, sort_keys=True)
-        metadata_string = json.dumps(self.metadata, sort_keys=True)
-        hash_input = f"{data_string}{metadata_string}{self.quality_score}{self.timestamp}"
-        return hashlib.sha256(hash_input.encode()).hexdigest()
-
-class LowQualityDataStorage:
-    def __init__(self, storage_path: str, retention_period: int = 30):
-        self.storage_path = storage_path
-        self.retention_period = retention_period  # in days
-        self.data_points: List[LowQualityDataPoint] = []
-        self.index: Dict[str, int] = {}  # Hash to index mapping
-
-    def add_data_point(self, data_point: LowQualityDataPoint) -> bool:
-        if data_point.quality_score >= 0.8:  # Threshold for low-quality data
-            return False
-        
-        self.data_points.append(data_point)
-        self.index[data_point.hash] = len(self.data_points) - 1
-        self._persist_data_point(data_point)
-        return True
-
-    def get_data_point(self, hash_value: str) -> LowQualityDataPoint:
-        if hash_value in self.index:
-            return self.data_points[self.index[hash_value]]
-        return None
-
-    def update_data_point(self, hash_value: str, new_data: Any, new_metadata: Dict[str, Any]) -> bool:
-        if hash_value not in self.index:
-            return False
-        
-        index = self.index[hash_value]
-        data_point = self.data_points[index]
-        data_point.data = new_data
-        data_point.metadata.update(new_metadata)
-        data_point.timestamp = datetime.now()
-        data_point.hash = data_point._generate_hash()
-        
-        self.index.pop(hash_value)
-        self.index[data_point.hash] = index
-        
-        self._persist_data_point(data_point)
-        return True
-
-    def _persist_data_point(self, data_point: LowQualityDataPoint):
-        file_path = os.path.join(self.storage_path, f"{data_point.hash}.json")
-        with open(file_path, 'w') as f:
-            json.dump({
-                'data': data_point.data,
-                'metadata': data_point.metadata,
-                'quality_score': data_point.quality_score,
-                'timestamp': data_point.timestamp.isoformat(),
-                'hash': data_point.hash
-            }, f)
-
-    def load_from_disk(self):
-        for filename in os.listdir(self.storage_path):
-            if filename.endswith('.json'):
-                with open(os.path.join(self.storage_path, filename), 'r') as f:
-                    data = json.load(f)
-                    data_point = LowQualityDataPoint(
-                        data['data'],
-                        data['metadata'],
-                        data['quality_score']
-                    )
-                    data_point.timestamp = datetime.fromisoformat(data['timestamp'])
-                    data_point.hash = data['hash']
-                    self.data_points.append(data_point)
-                    self.index[data_point.hash] = len(self.data_points) - 1
-
-    def cleanup_expired_data(self):
-        current_time = datetime.now()
-        expired_hashes = []
-        
-        for data_point in self.data_points:
-            if (current_time - data_point.timestamp).days > self.retention_period:
-                expired_hashes.append(data_point.hash)
-        
-        for hash_value in expired_hashes:
-            self._remove_data_point(hash_value)
-
-    def _remove_data_point(self, hash_value: str):
-        if hash_value in self.index:
-            index = self.index[hash_value]
-            del self.data_points[index]
-            del self.index[hash_value]
-            os.remove(os.path.join(self.storage_path, f"{hash_value}.json"))
-            
-            # Update indices for remaining data points
-            for i, dp in enumerate(self.data_points[index:], start=index):
-                self.index[dp.hash] = i
-
-    def get_all_data_points(self) -> List[LowQualityDataPoint]:
-        return self.data_points
-
-    def search_by_metadata(self, query: Dict[str, Any]) -> List[LowQualityDataPoint]:
-        results = []
-        for data_point in self.data_points:
-            if all(data_point.metadata.get(k) == v for k, v in query.items()):
-                results.append(data_point)
-        return results
-
-    def get_data_point_count(self) -> int:
-        return len(self.data_points)
-
-    def get_average_quality_score(self) -> float:
-        if not self.data_points:
-            return 0.0
-        return sum(dp.quality_score for dp in self.data_points) / len(self.data_points)
+from typing import Iterable, Optional
+from datetime import datetime, timedelta
+
+from data_digest import DEFAULT_ALGORITHM
+from instrumentation import instrumented
+from storage_base import BaseDataPoint, BaseDataStorage
+from storage_indexes import ExpiryIndex
+
+class LowQualityDataPoint(BaseDataPoint):
+    pass
+
+class LowQualityDataStorage(BaseDataStorage):
+    point_class = LowQualityDataPoint
+
+    def __init__(self, storage_path: str, retention_period: Optional[int] = 30, metadata_indexes: Iterable[str] = (),
+                 range_indexes: Iterable[str] = (), stats_keys: Iterable[str] = (), compaction_ratio: float = 0.25,
+                 stats_flush_interval: int = 1000, quality_threshold: float = 0.8, record_format: str = "json",
+                 compression: Optional[str] = None, digest_algorithm: str = DEFAULT_ALGORITHM):
+        # quality_score must be below quality_threshold
+        self.retention_period = retention_period  # in days; None keeps data forever
+        self.expiry_index = ExpiryIndex()
+        super().__init__(storage_path, metadata_indexes=metadata_indexes, range_indexes=range_indexes,
+                         stats_keys=stats_keys, stats_flush_interval=stats_flush_interval,
+                         quality_threshold=quality_threshold, compaction_ratio=compaction_ratio,
+                         record_format=record_format, compression=compression,
+                         digest_algorithm=digest_algorithm)
+
+    def _accepts(self, data_point: LowQualityDataPoint) -> bool:
+        return data_point.quality_score < self.quality_threshold
+
+    def _index_data_point(self, position: int, data_point: LowQualityDataPoint):
+        super()._index_data_point(position, data_point)
+        self.expiry_index.add(position, data_point.timestamp)
+
+    def _unindex_data_point(self, position: int, data_point: LowQualityDataPoint):
+        super()._unindex_data_point(position, data_point)
+        self.expiry_index.remove(position, data_point.timestamp)
+
+    def _compact_tombstones(self):
+        super()._compact_tombstones()
+        self.expiry_index.rebuild(enumerate(self.data_points))
+
+    @instrumented("storage.expire")
+    def cleanup_expired_data(self) -> int:
+        # A point expires once it is more than retention_period whole days old, whatever its reference count;
+        # only day buckets at or before the cutoff are visited, and files are removed in one batch at the end
+        if self.retention_period is None:
+            return 0
+        cutoff = datetime.now() - timedelta(days=self.retention_period + 1)
+        expired, boundary = self.expiry_index.candidates(cutoff)
+        expired.extend(i for i in boundary if self.data_points[i].timestamp <= cutoff)
+
+        hash_values = [self._unlink(position).hash for position in expired]
+        self._remove_records(hash_values)
+        self._maybe_compact()
+        self.flush_stats()
+        return len(hash_values)
 
 # Example usage (not functional, just for illustration)
 if __name__ == "__main__":
@@ -0,0 +1,246 @@
+import json
+import os
+import struct
+import zlib
+from typing import Dict, List, Optional
+import numpy as np
+
+# File layout: header, JSON layer table, zero padding, then one 64-byte aligned payload per layer.
+# Full snapshots store raw little-endian weights (loadable with np.memmap); deltas store the XOR of each
+# layer's bit pattern against the previous round, byte-shuffled (all first bytes, then all second bytes, ...)
+# so the mostly-zero sign/exponent planes form long runs, then zlib-compressed. Deltas are lossless.
+CHECKPOINT_MAGIC = b"NNCKPT01"
+HEADER = struct.Struct("<8sIqqI")  # magic, kind, round, base round, table length
+KIND_FULL = 0
+KIND_DELTA = 1  # Unshuffled XOR; still readable, no longer written
+KIND_SHUFFLED_DELTA = 2
+ALIGNMENT = 64
+
+# LATEST names the newest round; startup reads it, then the last full snapshot and the deltas after it
+LATEST_MAGIC = b"NNLATEST"
+LATEST = struct.Struct("<8sq")
+
+def _aligned(offset: int) -> int:
+    return (offset + ALIGNMENT - 1) // ALIGNMENT * ALIGNMENT
+
+def _bit_view(array: np.ndarray) -> np.ndarray:
+    # Reinterprets the weights as unsigned integers of the same width for XOR deltas
+    return np.ascontiguousarray(array).view(np.dtype(f"<u{array.dtype.itemsize}"))
+
+def _shuffle(bits: np.ndarray) -> bytes:
+    return bits.reshape(-1).view(np.uint8).reshape(-1, bits.dtype.itemsize).T.tobytes()
+
+def _unshuffle(raw: bytes, itemsize: int) -> np.ndarray:
+    planes = np.frombuffer(raw, dtype=np.uint8).reshape(itemsize, -1)
+    return np.ascontiguousarray(planes.T).view(f"<u{itemsize}").reshape(-1)
+
+class ModelCheckpointStore:
+    def __init__(self, directory: str, snapshot_interval: int = 10, compression_level: int = 1):
+        self.directory = directory
+        self.snapshot_interval = snapshot_interval
+        self.compression_level = compression_level
+        os.makedirs(directory, exist_ok=True)
+        self._last_round: Optional[int] = None
+        self._last_weights: Optional[Dict[str, np.ndarray]] = None
+        self._last_full: Optional[int] = None  # Newest full snapshot, the base of the current delta chain
+
+    def rounds(self) -> List[int]:
+        return sorted(
+            int(name[len("round_"):-len(".ckpt")]) for name in os.listdir(self.directory)
+            if name.startswith("round_") and name.endswith(".ckpt")
+        )
+
+    def latest_round(self) -> Optional[int]:
+        if os.path.exists(self._latest_path()):
+            with open(self._latest_path(), "rb") as f:
+                magic, round_id = LATEST.unpack(f.read(LATEST.size))
+            if magic != LATEST_MAGIC:
+                raise ValueError(f"{self._latest_path()} is not a checkpoint manifest")
+            return round_id
+        if os.path.exists(self._legacy_latest_path()):  # Stores written before LATEST existed
+            with open(self._legacy_latest_path(), "rb") as f:
+                return self._read_header(f)[1]
+        return None
+
+    def save(self, round_id: int, weights: Dict[str, np.ndarray]):
+        # Writes only the round's file (a delta unless a snapshot is due) and repoints LATEST at it
+        previous = self._previous_weights()
+        if (previous is None or self._last_full is None or round_id - self._last_full >= self.snapshot_interval
+                or weights.keys() != previous.keys()
+                or any(np.shape(w) != previous[layer].shape for layer, w in weights.items())):
+            self._write(self._round_path(round_id), KIND_FULL, round_id, -1, weights)
+            self._last_full = round_id
+        else:
+            self._write(self._round_path(round_id), KIND_SHUFFLED_DELTA, round_id, self._last_round, weights,
+                        base=previous)
+        self._set_latest(round_id)
+        self._last_round = round_id
+        self._last_weights = {layer: np.array(w) for layer, w in weights.items()}
+
+    def load(self, round_id: Optional[int] = None) -> Dict[str, np.ndarray]:
+        # A full snapshot is memory-mapped read-only (zero copy); a delta round is rebuilt from the nearest
+        # full snapshot plus at most snapshot_interval deltas
+        if round_id is None:
+            round_id = self.latest_round()
+            if round_id is None:
+                raise ValueError("No checkpoints stored")
+        path = self._round_path(round_id)
+        if not os.path.exists(path):
+            raise ValueError(f"No checkpoint stored for round {round_id}")
+
+        chain = []
+        while True:
+            with open(path, "rb") as f:
+                kind, _, base_round, _ = self._read_header(f)
+            if kind == KIND_FULL:
+                break
+            chain.append(path)
+            path = self._round_path(base_round)
+        weights = self._read_full(path)
+        if chain:
+            weights = {layer: np.array(w) for layer, w in weights.items()}
+        for delta_path in reversed(chain):
+            weights = self._apply_delta(delta_path, weights)
+        return weights
+
+    def rollback(self, round_id: int) -> Dict[str, np.ndarray]:
+        # Drops every later round and makes round_id the latest checkpoint again
+        weights = self.load(round_id)
+        self._set_latest(round_id)  # Repoint first: a crash mid-way must not leave LATEST at a deleted round
+        for later in [r for r in self.rounds() if r > round_id]:
+            os.remove(self._round_path(later))
+        self._last_round = round_id
+        self._last_weights = {layer: np.array(w) for layer, w in weights.items()}
+        self._last_full = self._full_base(round_id)
+        return self.load(round_id)
+
+    def _previous_weights(self) -> Optional[Dict[str, np.ndarray]]:
+        if self._last_weights is None and self.latest_round() is not None:
+            self._last_round = self.latest_round()
+            self._last_weights = {layer: np.array(w) for layer, w in self.load(self._last_round).items()}
+            self._last_full = self._full_base(self._last_round)
+        return self._last_weights
+
+    def _full_base(self, round_id: int) -> int:
+        # Round of the full snapshot that round_id's delta chain starts from
+        while True:
+            with open(self._round_path(round_id), "rb") as f:
+                kind, _, base_round, _ = self._read_header(f)
+            if kind == KIND_FULL:
+                return round_id
+            round_id = base_round
+
+    def _set_latest(self, round_id: int):
+        tmp_path = self._latest_path() + ".tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(LATEST.pack(LATEST_MAGIC, round_id))
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self._latest_path())
+        if os.path.exists(self._legacy_latest_path()):
+            os.remove(self._legacy_latest_path())
+
+    def _write(self, path: str, kind: int, round_id: int, base_round: int, weights: Dict[str, np.ndarray],
+               base: Optional[Dict[str, np.ndarray]] = None):
+        payloads = []
+        for layer, w in weights.items():
+            w = np.asarray(w)
+            w = w.astype(w.dtype.newbyteorder("<"), copy=False)
+            if kind == KIND_FULL:
+                payloads.append((layer, w, memoryview(np.ascontiguousarray(w)).cast("B")))
+            else:
+                xor = np.bitwise_xor(_bit_view(w), _bit_view(base[layer].astype(w.dtype, copy=False)))
+                payloads.append((layer, w, zlib.compress(_shuffle(xor), self.compression_level)))
+
+        # Payload offsets in the table are relative to the aligned end of the table
+        table = []
+        offset = 0
+        for layer, w, payload in payloads:
+            table.append({"name": layer, "shape": list(w.shape), "dtype": w.dtype.str,
+                          "offset": offset, "nbytes": len(payload)})
+            offset = _aligned(offset + len(payload))
+        table_bytes = json.dumps(table).encode()
+        data_start = _aligned(HEADER.size + len(table_bytes))
+
+        tmp_path = path + ".tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(HEADER.pack(CHECKPOINT_MAGIC, kind, round_id, base_round, len(table_bytes)))
+            f.write(table_bytes)
+            for entry, (_, _, payload) in zip(table, payloads):
+                f.write(b"\0" * (data_start + entry["offset"] - f.tell()))
+                f.write(payload)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+
+    def _read_header(self, f):
+        # Returns the table with absolute payload offsets
+        magic, kind, round_id, base_round, table_length = HEADER.unpack(f.read(HEADER.size))
+        if magic != CHECKPOINT_MAGIC:
+            raise ValueError(f"{f.name} is not a model checkpoint")
+        table = json.loads(f.read(table_length))
+        data_start = _aligned(HEADER.size + table_length)
+        for entry in table:
+            entry["offset"] += data_start
+        return kind, round_id, base_round, table
+
+    def _read_full(self, path: str) -> Dict[str, np.ndarray]:
+        with open(path, "rb") as f:
+            _, _, _, table = self._read_header(f)
+        return {
+            entry["name"]: np.memmap(path, dtype=np.dtype(entry["dtype"]), mode="r",
+                                     offset=entry["offset"], shape=tuple(entry["shape"]))
+            for entry in table
+        }
+
+    def _apply_delta(self, path: str, base: Dict[str, np.ndarray]) -> Dict[str, np.ndarray]:
+        with open(path, "rb") as f:
+            kind, _, _, table = self._read_header(f)
+            weights = {}
+            for entry in table:
+                f.seek(entry["offset"])
+                dtype = np.dtype(entry["dtype"])
+                raw = zlib.decompress(f.read(entry["nbytes"]))
+                if kind == KIND_SHUFFLED_DELTA:
+                    xor = _unshuffle(raw, dtype.itemsize)
+                else:
+                    xor = np.frombuffer(raw, dtype=f"<u{dtype.itemsize}")
+                bits = np.bitwise_xor(_bit_view(base[entry["name"]].astype(dtype, copy=False)).reshape(-1), xor)
+                weights[entry["name"]] = bits.view(dtype).reshape(entry["shape"])
+        return weights
+
+    def _round_path(self, round_id: int) -> str:
+        return os.path.join(self.directory, f"round_{round_id:08d}.ckpt")
+
+    def _latest_path(self) -> str:
+        return os.path.join(self.directory, "LATEST")
+
+    def _legacy_latest_path(self) -> str:
+        return os.path.join(self.directory, "latest.ckpt")
+
+# Example usage
+if __name__ == "__main__":
+    import tempfile
+    from neuronet_core import NeuroNet
+
+    directory = tempfile.mkdtemp()
+    neuronet = NeuroNet(learning_rate=1e-6)
+    neuronet.model.checkpoints = ModelCheckpointStore(directory, snapshot_interval=4)
+    neuronet.register_client("client_1")
+    neuronet.receive_client_batch("client_1", np.random.randn(200, 100), np.random.randint(2, size=200))
+    for _ in range(6):
+        neuronet.train_federated_model()
+
+    sizes = {name: os.path.getsize(os.path.join(directory, name)) for name in sorted(os.listdir(directory))}
+    print(f"Checkpoint files: {sizes}")
+    full_size = sizes["round_00000001.ckpt"]
+    delta_sizes = [size for name, size in sizes.items() if name.startswith("round_") and size < full_size]
+    print(f"Mean delta size: {np.mean(delta_sizes) / full_size:.1%} of a full snapshot")
+
+    # A fresh process starts from the latest round (last snapshot plus its deltas) instead of random weights
+    restarted = NeuroNet()
+    restarted.model.load_checkpoint(ModelCheckpointStore(directory))
+    print(f"Restarted at round {restarted.model.round_id}")
+
+    restarted.model.rollback(3)
+    print(f"Rolled back to round {restarted.model.round_id}")
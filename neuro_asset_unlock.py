@@ -1,7 +1,12 @@
 from typing import Dict, List, Any
 import hashlib
+import logging
 from datetime import datetime, timedelta
 
+from instrumentation import instrumented
+
+logger = logging.getLogger(__name__)  # Per-call messages; configure logging (INFO) to see them
+
 class NeuroAsset:
     def __init__(self, asset_id: str, asset_type: str, unlock_cost: float, duration: int):
         self.asset_id = asset_id
@@ -26,28 +31,29 @@ class NeuroAssetPlatform:
 
     def add_asset(self, asset: NeuroAsset):
         self.assets[asset.asset_id] = asset
-        print(f"Added new asset: {asset}")
+        logger.info("Added new asset: %s", asset)
 
     def register_user(self, user_id: str, initial_balance: float = 0):
         if user_id not in self.user_balances:
             self.user_balances[user_id] = initial_balance
             self.user_asset_access[user_id] = []
-            print(f"Registered user {user_id} with initial balance of {initial_balance} NEURO")
+            logger.info("Registered user %s with initial balance of %s NEURO", user_id, initial_balance)
         else:
-            print(f"User {user_id} already registered")
+            logger.warning("User %s already registered", user_id)
 
+    @instrumented("assets.unlock")
     def unlock_asset(self, user_id: str, asset_id: str):
         if user_id not in self.user_balances:
-            print(f"User {user_id} not found")
+            logger.warning("User %s not found", user_id)
             return
 
         if asset_id not in self.assets:
-            print(f"Asset {asset_id} not found")
+            logger.warning("Asset %s not found", asset_id)
             return
 
         asset = self.assets[asset_id]
         if self.user_balances[user_id] < asset.unlock_cost:
-            print(f"Insufficient balance to unlock {asset.asset_type}")
+            logger.warning("Insufficient balance to unlock %s", asset.asset_type)
             return
 
         self.user_balances[user_id] -= asset.unlock_cost
@@ -55,8 +61,8 @@ class NeuroAssetPlatform:
         access = UserAssetAccess(user_id, asset_id, expiry_date)
         self.user_asset_access[user_id].append(access)
 
-        print(f"User {user_id} unlocked {asset.asset_type} until {expiry_date}")
-        print(f"Remaining balance: {self.user_balances[user_id]} NEURO")
+        logger.info("User %s unlocked %s until %s", user_id, asset.asset_type, expiry_date)
+        logger.info("Remaining balance: %s NEURO", self.user_balances[user_id])
 
     def check_asset_access(self, user_id: str, asset_id: str) -> bool:
         if user_id not in self.user_asset_access:
@@ -68,16 +74,19 @@ class NeuroAssetPlatform:
 
         return False
 
-    def list_user_assets(self, user_id: str):
+    def list_user_assets(self, user_id: str) -> List[UserAssetAccess]:
+        # Returns the user's unexpired accesses and logs them at INFO
         if user_id not in self.user_asset_access:
-            print(f"User {user_id} not found")
-            return
+            logger.warning("User %s not found", user_id)
+            return []
 
-        print(f"Assets unlocked by user {user_id}:")
-        for access in self.user_asset_access[user_id]:
-            if access.expiry_date > datetime.now():
-                asset = self.assets[access.asset_id]
-                print(f"- {asset.asset_type} (ID: {asset.asset_id}), Expires: {access.expiry_date}")
+        logger.info("Assets unlocked by user %s:", user_id)
+        now = datetime.now()
+        active = [access for access in self.user_asset_access[user_id] if access.expiry_date > now]
+        for access in active:
+            asset = self.assets[access.asset_id]
+            logger.info("- %s (ID: %s), Expires: %s", asset.asset_type, asset.asset_id, access.expiry_date)
+        return active
 
 class AIModelAsset(NeuroAsset):
     def __init__(self, asset_id: str, model_name: str, unlock_cost: float, duration: int, performance_score: float):
@@ -97,28 +106,30 @@ class PlatformFeatureAsset(NeuroAsset):
         self.feature_name = feature_name
 
 # Example usage
-platform = NeuroAssetPlatform()
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
 
-# Add assets
-platform.add_asset(AIModelAsset("model1", "Advanced Image Classifier", 100, 30, 0.95))
-platform.add_asset(AIModelAsset("model2", "Natural Language Processor", 150, 30, 0.92))
-platform.add_asset(DatasetAsset("data1", "Large Scale Image Dataset", 50, 60, 1000000))
-platform.add_asset(PlatformFeatureAsset("feature1", "Advanced Analytics Dashboard", 75, 90))
+    platform = NeuroAssetPlatform()
 
-# Register users
-platform.register_user("alice", 500)
-platform.register_user("bob", 300)
+    # Add assets
+    platform.add_asset(AIModelAsset("model1", "Advanced Image Classifier", 100, 30, 0.95))
+    platform.add_asset(AIModelAsset("model2", "Natural Language Processor", 150, 30, 0.92))
+    platform.add_asset(DatasetAsset("data1", "Large Scale Image Dataset", 50, 60, 1000000))
+    platform.add_asset(PlatformFeatureAsset("feature1", "Advanced Analytics Dashboard", 75, 90))
 
-# Unlock assets
-platform.unlock_asset("alice", "model1")
-platform.unlock_asset("alice", "data1")
-platform.unlock_asset("bob", "model2")
+    # Register users
+    platform.register_user("alice", 500)
+    platform.register_user("bob", 300)
 
-# Check asset access
-print(f"Alice has access to model1: {platform.check_asset_access('alice', 'model1')}")
-print(f"Bob has access to data1: {platform.check_asset_access('bob', 'data1')}")
+    # Unlock assets
+    platform.unlock_asset("alice", "model1")
+    platform.unlock_asset("alice", "data1")
+    platform.unlock_asset("bob", "model2")
 
-# List user assets
-platform.list_user_assets("alice")
-platform.list_user_assets("bob")
+    # Check asset access
+    print(f"Alice has access to model1: {platform.check_asset_access('alice', 'model1')}")
+    print(f"Bob has access to data1: {platform.check_asset_access('bob', 'data1')}")
 
+    # List user assets
+    platform.list_user_assets("alice")
+    platform.list_user_assets("bob")
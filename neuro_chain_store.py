@@ -0,0 +1,243 @@
+import json
+import mmap
+import os
+import struct
+import zlib
+from typing import Dict, List, Any, Iterator, Optional, Tuple
+import numpy as np
+
+from neuronet_core import NeuroBlock
+
+# Record layout (little-endian, every record starts 8-byte aligned):
+#   header: magic, body length, crc32(body)
+#   body:   block hash, previous hash, merkle root, timestamp, n_points, n_features, labels length,
+#           features (n_points x n_features float64), timestamps (n_points float64),
+#           data point digests (n_points x 32 bytes), labels as JSON, zero padding
+RECORD_MAGIC = b"NBLK"
+HEADER = struct.Struct("<4sQI")
+META = struct.Struct("<32s32s32sdIII4x")
+GENESIS_HASH = "0" * 64
+
+def _padded(length: int) -> int:
+    return (length + 7) & ~7
+
+class StoredBlock:
+    # Read-only block view; features/timestamps are slices of the mapped segment, not copies
+    def __init__(self, height: int, hash: str, previous_hash: str, merkle_root: str, timestamp: float,
+                 features: np.ndarray, timestamps: np.ndarray, data_hashes: List[str], labels: List[Any]):
+        self.height = height
+        self.hash = hash
+        self.previous_hash = previous_hash
+        self.merkle_root = merkle_root
+        self.timestamp = timestamp
+        self.features = features
+        self.timestamps = timestamps
+        self.data_hashes = data_hashes
+        self.labels = labels
+
+def _close_map(segment_map: mmap.mmap):
+    try:
+        segment_map.close()
+    except BufferError:
+        pass  # Block views are still alive; the map is released with them
+
+class ChainSegmentLog:
+    def __init__(self, directory: str, segment_size: int = 64 * 1024 * 1024,
+                 checkpoint_interval: int = 100, fsync: bool = False):
+        self.directory = directory
+        self.segment_size = segment_size
+        self.checkpoint_interval = checkpoint_interval
+        self.fsync = fsync
+        os.makedirs(directory, exist_ok=True)
+
+        self.height = 0
+        self.last_hash = GENESIS_HASH
+        self._maps: Dict[int, Tuple[mmap.mmap, int]] = {}  # segment -> (map, mapped size)
+        self._blocks_since_checkpoint = 0
+        self._recover()
+        self._writer = open(self._segment_path(self._segment), "ab")
+
+    # --- writing ---
+
+    def append_block(self, block: NeuroBlock):
+        if block.previous_hash != self.last_hash:
+            raise ValueError(f"Block {block.hash} does not extend the stored chain tip {self.last_hash}")
+        body = self._encode_block(block)
+        header = HEADER.pack(RECORD_MAGIC, len(body), zlib.crc32(body))
+
+        if self._offset and self._offset + len(header) + len(body) > self.segment_size:
+            self._roll_segment()
+        self._writer.write(header)
+        self._writer.write(body)
+        self._writer.flush()
+        if self.fsync:
+            os.fsync(self._writer.fileno())
+
+        self._offset += len(header) + len(body)
+        self.height += 1
+        self.last_hash = block.hash
+        self._blocks_since_checkpoint += 1
+        if self._blocks_since_checkpoint >= self.checkpoint_interval:
+            self.checkpoint()
+
+    def checkpoint(self):
+        # Everything before the checkpoint is trusted on recovery and never re-verified
+        self._writer.flush()
+        os.fsync(self._writer.fileno())
+        state = {"segment": self._segment, "offset": self._offset, "height": self.height, "last_hash": self.last_hash}
+        tmp_path = os.path.join(self.directory, "CHECKPOINT.tmp")
+        with open(tmp_path, "w") as f:
+            json.dump(state, f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, os.path.join(self.directory, "CHECKPOINT"))
+        self._blocks_since_checkpoint = 0
+
+    def close(self):
+        if self._writer.closed:
+            return
+        self.checkpoint()
+        self._writer.close()
+        for segment_map, _ in self._maps.values():
+            _close_map(segment_map)
+        self._maps.clear()
+
+    def _roll_segment(self):
+        self._writer.close()
+        self._segment += 1
+        self._offset = 0
+        self._writer = open(self._segment_path(self._segment), "ab")
+
+    def _encode_block(self, block: NeuroBlock) -> bytes:
+        n_points = len(block.data)
+        features = np.stack([dp.features for dp in block.data]).astype("<f8", copy=False) if n_points \
+            else np.empty((0, 0), dtype="<f8")
+        timestamps = np.array([dp.timestamp for dp in block.data], dtype="<f8")
+        digests = b"".join(bytes.fromhex(dp.hash) for dp in block.data)
+        labels = json.dumps([dp.label.item() if hasattr(dp.label, "item") else dp.label for dp in block.data]).encode()
+        meta = META.pack(
+            bytes.fromhex(block.hash), bytes.fromhex(block.previous_hash), bytes.fromhex(block.merkle_root),
+            block.timestamp, n_points, features.shape[1], len(labels)
+        )
+        body = b"".join([meta, features.tobytes(), timestamps.tobytes(), digests, labels])
+        return body + b"\0" * (_padded(len(body)) - len(body))
+
+    # --- reading ---
+
+    def iter_blocks(self, start_height: int = 0) -> Iterator[StoredBlock]:
+        # Walks record headers only; block payloads are decoded as views when yielded
+        height = 0
+        for segment in self._segments():
+            offset = 0
+            segment_map = self._map(segment)
+            if segment_map is None:
+                continue
+            end = self._offset if segment == self._segment else len(segment_map)
+            while offset < end:
+                _, body_length, _ = HEADER.unpack_from(segment_map, offset)
+                if height >= start_height:
+                    yield self._decode_block(segment_map, offset + HEADER.size, height)
+                offset += HEADER.size + body_length
+                height += 1
+
+    def _decode_block(self, segment_map: mmap.mmap, offset: int, height: int) -> StoredBlock:
+        block_hash, previous_hash, merkle_root, timestamp, n_points, n_features, labels_length = \
+            META.unpack_from(segment_map, offset)
+        offset += META.size
+        features = np.frombuffer(segment_map, dtype="<f8", count=n_points * n_features, offset=offset)
+        offset += features.nbytes
+        timestamps = np.frombuffer(segment_map, dtype="<f8", count=n_points, offset=offset)
+        offset += timestamps.nbytes
+        data_hashes = [segment_map[offset + 32 * i:offset + 32 * (i + 1)].hex() for i in range(n_points)]
+        offset += 32 * n_points
+        labels = json.loads(segment_map[offset:offset + labels_length])
+        return StoredBlock(height, block_hash.hex(), previous_hash.hex(), merkle_root.hex(), timestamp,
+                           features.reshape(n_points, n_features), timestamps, data_hashes, labels)
+
+    def _map(self, segment: int) -> Optional[mmap.mmap]:
+        # The active segment keeps growing, so its map is refreshed when the file outgrows it
+        size = os.path.getsize(self._segment_path(segment))
+        if not size:
+            return None
+        cached = self._maps.get(segment)
+        if cached is None or cached[1] < size:
+            if cached is not None:
+                _close_map(cached[0])
+            with open(self._segment_path(segment), "rb") as f:
+                self._maps[segment] = (mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ), size)
+        return self._maps[segment][0]
+
+    # --- recovery ---
+
+    def _recover(self):
+        segments = self._segments()
+        state = {"segment": segments[0] if segments else 0, "offset": 0, "height": 0, "last_hash": GENESIS_HASH}
+        checkpoint_path = os.path.join(self.directory, "CHECKPOINT")
+        if os.path.exists(checkpoint_path):
+            with open(checkpoint_path) as f:
+                state = json.load(f)
+
+        self.height = state["height"]
+        self.last_hash = state["last_hash"]
+        self._segment = state["segment"]
+        self._offset = state["offset"]
+        for segment in [s for s in segments if s >= state["segment"]]:
+            path = self._segment_path(segment)
+            offset = state["offset"] if segment == state["segment"] else 0
+            valid_end = self._scan_segment(path, offset)
+            self._segment, self._offset = segment, valid_end
+            if valid_end < os.path.getsize(path):
+                # Torn or corrupt tail: drop it and everything written after it
+                with open(path, "r+b") as f:
+                    f.truncate(valid_end)
+                for later in [s for s in segments if s > segment]:
+                    os.remove(self._segment_path(later))
+                break
+
+    def _scan_segment(self, path: str, offset: int) -> int:
+        size = os.path.getsize(path)
+        if offset >= size:
+            return offset
+        with open(path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as segment_map:
+            while offset + HEADER.size <= size:
+                magic, body_length, crc = HEADER.unpack_from(segment_map, offset)
+                body_start = offset + HEADER.size
+                if magic != RECORD_MAGIC or body_start + body_length > size:
+                    break
+                body = segment_map[body_start:body_start + body_length]
+                if zlib.crc32(body) != crc:
+                    break
+                block_hash, previous_hash = body[:32].hex(), body[32:64].hex()
+                if previous_hash != self.last_hash:
+                    break
+                self.last_hash = block_hash
+                self.height += 1
+                offset = body_start + body_length
+        return offset
+
+    def _segments(self) -> List[int]:
+        return sorted(
+            int(name[len("segment_"):-len(".log")]) for name in os.listdir(self.directory)
+            if name.startswith("segment_") and name.endswith(".log")
+        )
+
+    def _segment_path(self, segment: int) -> str:
+        return os.path.join(self.directory, f"segment_{segment:08d}.log")
+
+# Example usage
+if __name__ == "__main__":
+    import tempfile
+    from neuronet_core import DataPoint, NeuroChain
+
+    directory = tempfile.mkdtemp()
+    chain = NeuroChain(store=ChainSegmentLog(directory, checkpoint_interval=5))
+    for _ in range(95):
+        chain.add_data(DataPoint(np.random.randn(100), np.random.randint(2)))
+    chain.store.close()
+
+    # Reopen: recovery only scans records written after the last checkpoint
+    store = ChainSegmentLog(directory)
+    print(f"Recovered {store.height} blocks, tip {store.last_hash[:16]}...")
+    for stored_block in store.iter_blocks(start_height=store.height - 2):
+        print(stored_block.height, stored_block.features.shape, stored_block.labels[:3])
+    store.close()
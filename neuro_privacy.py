@@ -1,69 +1,224 @@
 import hashlib
-from typing import Dict, List, Any
+import json
+import logging
+import os
+import threading
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, Any, Iterable, Optional, Sequence, Tuple
 from datetime import datetime, timedelta
 import secrets
 import base64
-from cryptography.fernet import Fernet
+from cryptography.fernet import Fernet, InvalidToken, MultiFernet
 from cryptography.hazmat.primitives import hashes
+from cryptography.hazmat.primitives.kdf.hkdf import HKDF
 from cryptography.hazmat.primitives.kdf.pbkdf2 import PBKDF2HMAC
 
+from instrumentation import count, instrumented
+from storage_loader import parallel_map
+
+logger = logging.getLogger(__name__)  # Per-call messages; configure logging (INFO) to see them
+
+PBKDF2_ITERATIONS = 100000
+MIN_MASTER_KEY_BYTES = 32
+
+def _pbkdf2_key(user_id: str) -> bytes:
+    # Module level so provision_users can run it in a process pool
+    salt = secrets.token_bytes(16)
+    kdf = PBKDF2HMAC(
+        algorithm=hashes.SHA256(),
+        length=32,
+        salt=salt,
+        iterations=PBKDF2_ITERATIONS,
+    )
+    return base64.urlsafe_b64encode(kdf.derive(user_id.encode()))
+
+def _hkdf_key(master_key: bytes, info: str) -> bytes:
+    # One HMAC expansion instead of 100k PBKDF2 rounds; safe because the master key is already high-entropy
+    kdf = HKDF(algorithm=hashes.SHA256(), length=32, salt=None, info=info.encode())
+    return base64.urlsafe_b64encode(kdf.derive(master_key))
+
+def _default_privacy_settings() -> Dict[str, Any]:
+    return {
+        "data_sharing": False,
+        "anonymize_contributions": True,
+        "third_party_access": False,
+        "notification_preferences": {
+            "email": True,
+            "push": False,
+            "in_app": True
+        }
+    }
+
+class EncryptedKeyStore:
+    # Append-only file of Fernet tokens, one per line, each wrapping a user's key and key version.
+    # Later lines win, so provisioning and rotation are appends; the wrapping key itself is never written.
+    def __init__(self, path: str, wrapping_key: bytes):
+        self.path = path
+        self._fernet = Fernet(wrapping_key)
+
+    def load(self) -> Dict[str, Tuple[bytes, int]]:
+        entries: Dict[str, Tuple[bytes, int]] = {}
+        if not os.path.exists(self.path):
+            return entries
+        with open(self.path, "rb") as f:
+            lines = f.read().split(b"\n")
+        for i, line in enumerate(lines):
+            if not line:
+                continue
+            try:
+                entry = json.loads(self._fernet.decrypt(line))
+            except InvalidToken:
+                if i == len(lines) - 1:
+                    break  # A torn trailing entry is ignored
+                raise ValueError(f"Key store {self.path} cannot be decrypted with this key")
+            entries[entry["user_id"]] = (entry["key"].encode(), entry["version"])
+        return entries
+
+    def append(self, entries: Iterable[Tuple[str, bytes, int]]):
+        lines = [
+            self._fernet.encrypt(json.dumps({"user_id": user_id, "key": key.decode(), "version": version}).encode())
+            for user_id, key, version in entries
+        ]
+        if lines:
+            with open(self.path, "ab") as f:
+                f.write(b"\n".join(lines) + b"\n")
+                f.flush()
+                os.fsync(f.fileno())
+
 class PrivacyManager:
-    def __init__(self):
+    # With a master_key, per-user keys are HKDF-derived (key_scheme "hkdf") instead of PBKDF2 over the user id.
+    # With a key_store_path, every key is persisted encrypted under key_store_key (default: HKDF of the master
+    # key) and restored on startup, so restarts don't re-derive anything.
+    def __init__(self, master_key: Optional[bytes] = None, key_store_path: Optional[str] = None,
+                 key_store_key: Optional[bytes] = None, cipher_cache_size: int = 1024):
+        if master_key is not None and len(master_key) < MIN_MASTER_KEY_BYTES:
+            raise ValueError(f"master_key must be at least {MIN_MASTER_KEY_BYTES} bytes")
+        if cipher_cache_size < 1:
+            raise ValueError("cipher_cache_size must be at least 1")
         self.user_privacy_settings: Dict[str, Dict[str, Any]] = {}
         self.data_access_logs: List[Dict[str, Any]] = []
         self.encryption_keys: Dict[str, bytes] = {}
+        self.key_versions: Dict[str, int] = {}  # Bumped by rotate_encryption_key
+        self.master_key = master_key
+        self.cipher_cache_size = cipher_cache_size
+        self._ciphers: "OrderedDict[str, Fernet]" = OrderedDict()  # LRU of per-user Fernet objects
+        self._cipher_lock = threading.Lock()  # Guards encryption_keys updates and the cipher cache together
+
+        self.key_store: Optional[EncryptedKeyStore] = None
+        if key_store_path is not None:
+            if key_store_key is None:
+                if master_key is None:
+                    raise ValueError("key_store_path requires key_store_key or master_key")
+                key_store_key = _hkdf_key(master_key, "neuro-privacy/key-store")
+            self.key_store = EncryptedKeyStore(key_store_path, key_store_key)
+            for user_id, (key, version) in self.key_store.load().items():
+                self.encryption_keys[user_id] = key
+                self.key_versions[user_id] = version
+
+    @property
+    def key_scheme(self) -> str:
+        return "hkdf" if self.master_key is not None else "pbkdf2"
 
     def create_user_privacy_settings(self, user_id: str):
         if user_id not in self.user_privacy_settings:
-            self.user_privacy_settings[user_id] = {
-                "data_sharing": False,
-                "anonymize_contributions": True,
-                "third_party_access": False,
-                "notification_preferences": {
-                    "email": True,
-                    "push": False,
-                    "in_app": True
-                }
-            }
-            self._generate_encryption_key(user_id)
-            print(f"Privacy settings created for user {user_id}")
+            self.user_privacy_settings[user_id] = _default_privacy_settings()
+            if user_id not in self.encryption_keys:  # Keys restored from the key store are reused
+                self._generate_encryption_key(user_id)
+            logger.info("Privacy settings created for user %s", user_id)
+        else:
+            logger.warning("Privacy settings already exist for user %s", user_id)
+
+    @instrumented("privacy.provision")
+    def provision_users(self, user_ids: Iterable[str], max_workers: Optional[int] = None) -> int:
+        # Bulk create_user_privacy_settings. PBKDF2 keys are derived on a process pool; HKDF keys are cheap
+        # enough to derive inline. Returns the number of users provisioned.
+        new_users = list(dict.fromkeys(u for u in user_ids if u not in self.user_privacy_settings))
+        missing = [u for u in new_users if u not in self.encryption_keys]
+        if self.master_key is not None or len(missing) < 2 or max_workers == 1:
+            keys = [self._derive_key(user_id, 0) for user_id in missing]
         else:
-            print(f"Privacy settings already exist for user {user_id}")
+            workers = max_workers or os.cpu_count() or 1
+            with ProcessPoolExecutor(max_workers=workers) as pool:
+                keys = list(pool.map(_pbkdf2_key, missing, chunksize=max(1, len(missing) // (4 * workers))))
+        self._install_keys([(user_id, key, 0) for user_id, key in zip(missing, keys)])
+        for user_id in new_users:
+            self.user_privacy_settings[user_id] = _default_privacy_settings()
+        logger.info("Privacy settings created for %d users", len(new_users))
+        return len(new_users)
 
     def update_privacy_settings(self, user_id: str, settings: Dict[str, Any]):
         if user_id in self.user_privacy_settings:
             self.user_privacy_settings[user_id].update(settings)
-            print(f"Privacy settings updated for user {user_id}")
+            logger.info("Privacy settings updated for user %s", user_id)
         else:
-            print(f"User {user_id} not found")
+            logger.warning("User %s not found", user_id)
 
     def get_privacy_settings(self, user_id: str) -> Dict[str, Any]:
         return self.user_privacy_settings.get(user_id, {})
 
-    def _generate_encryption_key(self, user_id: str):
-        salt = secrets.token_bytes(16)
-        kdf = PBKDF2HMAC(
-            algorithm=hashes.SHA256(),
-            length=32,
-            salt=salt,
-            iterations=100000,
-        )
-        key = base64.urlsafe_b64encode(kdf.derive(user_id.encode()))
-        self.encryption_keys[user_id] = key
+    def _derive_key(self, user_id: str, version: int) -> bytes:
+        if self.master_key is not None:
+            return _hkdf_key(self.master_key, f"neuro-privacy/user/{version}/{user_id}")
+        return _pbkdf2_key(user_id)  # Random salt, so every call (and every version) yields a fresh key
 
+    @instrumented("privacy.derive_key")
+    def _generate_encryption_key(self, user_id: str):
+        version = self.key_versions.get(user_id, -1) + 1
+        self._install_keys([(user_id, self._derive_key(user_id, version), version)])
+
+    def _install_keys(self, entries: List[Tuple[str, bytes, int]]):
+        with self._cipher_lock:
+            for user_id, key, version in entries:
+                self.encryption_keys[user_id] = key
+                self.key_versions[user_id] = version
+                self._ciphers.pop(user_id, None)  # A cached cipher for the old key must not outlive it
+        if self.key_store is not None:
+            self.key_store.append(entries)
+        count("privacy.keys_derived", len(entries))
+
+    def _cipher(self, user_id: str) -> Fernet:
+        with self._cipher_lock:
+            cipher = self._ciphers.get(user_id)
+            hit = cipher is not None
+            if hit:
+                self._ciphers.move_to_end(user_id)
+            else:
+                key = self.encryption_keys.get(user_id)
+                if key is None:
+                    raise ValueError(f"Encryption key not found for user {user_id}")
+                cipher = self._ciphers[user_id] = Fernet(key)
+                if len(self._ciphers) > self.cipher_cache_size:
+                    self._ciphers.popitem(last=False)
+        count("privacy.cipher_cache_hits" if hit else "privacy.cipher_cache_misses")
+        return cipher
+
+    @instrumented("privacy.rotate_key")
+    def rotate_encryption_key(self, user_id: str, tokens: Sequence[bytes] = (),
+                              max_workers: Optional[int] = None) -> List[bytes]:
+        # Switches the user to a new key version and drops the cached cipher. Tokens encrypted under the
+        # old key are re-encrypted and returned; anything not passed in can no longer be decrypted.
+        old_cipher = self._cipher(user_id)
+        self._generate_encryption_key(user_id)
+        rotator = MultiFernet([self._cipher(user_id), old_cipher])
+        return list(parallel_map(rotator.rotate, tokens, max_workers))
+
+    @instrumented("privacy.encrypt")
     def encrypt_data(self, user_id: str, data: str) -> str:
-        if user_id not in self.encryption_keys:
-            raise ValueError(f"Encryption key not found for user {user_id}")
-        
-        f = Fernet(self.encryption_keys[user_id])
-        return f.encrypt(data.encode()).decode()
+        return self._cipher(user_id).encrypt(data.encode()).decode()
 
+    @instrumented("privacy.decrypt")
     def decrypt_data(self, user_id: str, encrypted_data: str) -> str:
-        if user_id not in self.encryption_keys:
-            raise ValueError(f"Encryption key not found for user {user_id}")
-        
-        f = Fernet(self.encryption_keys[user_id])
-        return f.decrypt(encrypted_data.encode()).decode()
+        return self._cipher(user_id).decrypt(encrypted_data.encode()).decode()
+
+    @instrumented("privacy.encrypt_many")
+    def encrypt_many(self, user_id: str, items: Sequence[bytes], max_workers: Optional[int] = None) -> List[bytes]:
+        # Bytes in, Fernet tokens (bytes) out, in order; large batches run on a thread pool
+        return list(parallel_map(self._cipher(user_id).encrypt, items, max_workers))
+
+    @instrumented("privacy.decrypt_many")
+    def decrypt_many(self, user_id: str, tokens: Sequence[bytes], max_workers: Optional[int] = None) -> List[bytes]:
+        return list(parallel_map(self._cipher(user_id).decrypt, tokens, max_workers))
 
     def log_data_access(self, user_id: str, data_type: str, purpose: str):
         log_entry = {
@@ -148,8 +303,9 @@ class DataRetentionManager:
         return self.data_store.get(data_type, [])
 
 class NeuroPrivacy:
-    def __init__(self):
-        self.privacy_manager = PrivacyManager()
+    def __init__(self, master_key: Optional[bytes] = None, key_store_path: Optional[str] = None,
+                 key_store_key: Optional[bytes] = None):
+        self.privacy_manager = PrivacyManager(master_key, key_store_path, key_store_key)
         self.data_anonymizer = DataAnonymizer()
         self.consent_manager = ConsentManager()
         self.data_retention_manager = DataRetentionManager()
@@ -157,6 +313,9 @@ class NeuroPrivacy:
     def setup_user_privacy(self, user_id: str):
         self.privacy_manager.create_user_privacy_settings(user_id)
 
+    def setup_users_privacy(self, user_ids: Iterable[str], max_workers: Optional[int] = None) -> int:
+        return self.privacy_manager.provision_users(user_ids, max_workers)
+
     def update_user_privacy_settings(self, user_id: str, settings: Dict[str, Any]):
         self.privacy_manager.update_privacy_settings(user_id, settings)
 
@@ -177,9 +336,9 @@ class NeuroPrivacy:
         if self.check_user_consent(user_id, purpose):
             self.privacy_manager.log_data_access(user_id, data_type, purpose)
             # Proceed with data access
-            print(f"Access granted for user {user_id} to {data_type} for {purpose}")
+            logger.info("Access granted for user %s to %s for %s", user_id, data_type, purpose)
         else:
-            print(f"Access denied for user {user_id} to {data_type} for {purpose}")
+            logger.warning("Access denied for user %s to %s for %s", user_id, data_type, purpose)
 
     def encrypt_sensitive_data(self, user_id: str, data: str) -> str:
         return self.privacy_manager.encrypt_data(user_id, data)
@@ -187,6 +346,15 @@ class NeuroPrivacy:
     def decrypt_sensitive_data(self, user_id: str, encrypted_data: str) -> str:
         return self.privacy_manager.decrypt_data(user_id, encrypted_data)
 
+    def encrypt_sensitive_many(self, user_id: str, items: Sequence[bytes]) -> List[bytes]:
+        return self.privacy_manager.encrypt_many(user_id, items)
+
+    def decrypt_sensitive_many(self, user_id: str, tokens: Sequence[bytes]) -> List[bytes]:
+        return self.privacy_manager.decrypt_many(user_id, tokens)
+
+    def rotate_user_key(self, user_id: str, tokens: Sequence[bytes] = ()) -> List[bytes]:
+        return self.privacy_manager.rotate_encryption_key(user_id, tokens)
+
     def add_user_data(self, user_id: str, data: Dict[str, Any]):
         self.data_retention_manager.add_data("user_data", {
             "user_id": user_id,
@@ -200,39 +368,54 @@ class NeuroPrivacy:
         return self.privacy_manager.get_user_data_access_logs(user_id)
 
 # Example usage
-neuro_privacy = NeuroPrivacy()
-
-# Setup user privacy
-neuro_privacy.setup_user_privacy("user123")
-
-# Update privacy settings
-neuro_privacy.update_user_privacy_settings("user123", {"data_sharing": True})
-
-# Anonymize user data
-anonymized_data = neuro_privacy.anonymize_user_data("user123", "192.168.1.1", 40.7128, -74.0060)
-print("Anonymized data:", anonymized_data)
-
-# Record user consent
-neuro_privacy.record_user_consent("user123", "data_analysis", True)
-
-# Handle data access
-neuro_privacy.handle_data_access("user123", "transaction_history", "data_analysis")
-
-# Encrypt and decrypt sensitive data
-sensitive_data = "My secret $NEURO balance"
-encrypted_data = neuro_privacy.encrypt_sensitive_data("user123", sensitive_data)
-decrypted_data = neuro_privacy.decrypt_sensitive_data("user123", encrypted_data)
-print("Original:", sensitive_data)
-print("Encrypted:", encrypted_data)
-print("Decrypted:", decrypted_data)
-
-# Add user data
-neuro_privacy.add_user_data("user123", {"name": "Alice", "email": "alice@example.com"})
-
-# Cleanup expired data
-neuro_privacy.cleanup_expired_data()
-
-# Get user data access logs
-access_logs = neuro_privacy.get_user_data_access_logs("user123")
-print("Data access logs:", access_logs)
-
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+    neuro_privacy = NeuroPrivacy()
+
+    # Setup user privacy
+    neuro_privacy.setup_user_privacy("user123")
+
+    # Update privacy settings
+    neuro_privacy.update_user_privacy_settings("user123", {"data_sharing": True})
+
+    # Anonymize user data
+    anonymized_data = neuro_privacy.anonymize_user_data("user123", "192.168.1.1", 40.7128, -74.0060)
+    print("Anonymized data:", anonymized_data)
+
+    # Record user consent
+    neuro_privacy.record_user_consent("user123", "data_analysis", True)
+
+    # Handle data access
+    neuro_privacy.handle_data_access("user123", "transaction_history", "data_analysis")
+
+    # Encrypt and decrypt sensitive data
+    sensitive_data = "My secret $NEURO balance"
+    encrypted_data = neuro_privacy.encrypt_sensitive_data("user123", sensitive_data)
+    decrypted_data = neuro_privacy.decrypt_sensitive_data("user123", encrypted_data)
+    print("Original:", sensitive_data)
+    print("Encrypted:", encrypted_data)
+    print("Decrypted:", decrypted_data)
+
+    # Batch encryption, key rotation and bulk onboarding with HKDF keys persisted encrypted at rest
+    fields = [b"alice@example.com", b"+1 555 0100", b"42 Main St"]
+    tokens = neuro_privacy.encrypt_sensitive_many("user123", fields)
+    tokens = neuro_privacy.rotate_user_key("user123", tokens)
+    print("Batch decrypted after rotation:", neuro_privacy.decrypt_sensitive_many("user123", tokens))
+
+    import tempfile
+    key_store_path = os.path.join(tempfile.mkdtemp(), "keys.store")
+    master_key = secrets.token_bytes(32)
+    onboarding = NeuroPrivacy(master_key=master_key, key_store_path=key_store_path)
+    print("Users provisioned:", onboarding.setup_users_privacy(f"user{i}" for i in range(1000)))
+    restarted = NeuroPrivacy(master_key=master_key, key_store_path=key_store_path)
+    print("Keys restored after restart:", len(restarted.privacy_manager.encryption_keys))
+
+    # Add user data
+    neuro_privacy.add_user_data("user123", {"name": "Alice", "email": "alice@example.com"})
+
+    # Cleanup expired data
+    neuro_privacy.cleanup_expired_data()
+
+    # Get user data access logs
+    access_logs = neuro_privacy.get_user_data_access_logs("user123")
+    print("Data access logs:", access_logs)
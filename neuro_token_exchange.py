@@ -1,8 +1,13 @@
 import hashlib
+import logging
 from typing import List, Dict, Any
 from datetime import datetime
 import random
 
+from instrumentation import count, instrumented
+
+logger = logging.getLogger(__name__)  # Per-call messages; configure logging (INFO) to see them
+
 class NeuroToken:
     def __init__(self, amount: float):
         self.amount = amount
@@ -46,13 +51,14 @@ class NeuroExchange:
     def register_user(self, user_id: str) -> None:
         if user_id not in self.users:
             self.users[user_id] = User(user_id)
-            print(f"User {user_id} registered successfully.")
+            logger.info("User %s registered successfully.", user_id)
         else:
-            print(f"User {user_id} already exists.")
+            logger.warning("User %s already exists.", user_id)
 
+    @instrumented("exchange.contribute_data")
     def contribute_data(self, user_id: str, data_type: str, data_size: int) -> None:
         if user_id not in self.users:
-            print(f"User {user_id} not found. Please register first.")
+            logger.warning("User %s not found. Please register first.", user_id)
             return
 
         quality_score = random.uniform(0.5, 1.0)  # Simulated quality assessment
@@ -64,85 +70,88 @@ class NeuroExchange:
         reward = (data_size / 1000) * quality_score * 10  # 10 NEURO per 1000 high-quality data points
         self._mint_and_transfer(user_id, reward)
 
-        print(f"User {user_id} contributed {data_size} data points of type {data_type}.")
-        print(f"Reward: {reward} NEURO tokens.")
+        logger.info("User %s contributed %s data points of type %s.", user_id, data_size, data_type)
+        logger.info("Reward: %s NEURO tokens.", reward)
 
+    @instrumented("exchange.mint")
     def _mint_and_transfer(self, user_id: str, amount: float) -> None:
         if self.token_supply >= amount:
             self.users[user_id].neuro_balance += amount
             self.token_supply -= amount
-            print(f"Minted and transferred {amount} NEURO tokens to user {user_id}.")
+            count("exchange.tokens_minted", amount)
+            logger.info("Minted and transferred %s NEURO tokens to user %s.", amount, user_id)
         else:
-            print("Error: Insufficient token supply for minting.")
+            logger.error("Insufficient token supply for minting.")
 
     def add_ai_model(self, model_id: str, access_cost: float) -> None:
         if model_id not in self.available_models:
             self.available_models[model_id] = AIModel(model_id, access_cost)
-            print(f"AI Model {model_id} added with access cost of {access_cost} NEURO.")
+            logger.info("AI Model %s added with access cost of %s NEURO.", model_id, access_cost)
         else:
-            print(f"AI Model {model_id} already exists.")
+            logger.warning("AI Model %s already exists.", model_id)
 
     def request_model_access(self, user_id: str, model_id: str) -> None:
         if user_id not in self.users:
-            print(f"User {user_id} not found. Please register first.")
+            logger.warning("User %s not found. Please register first.", user_id)
             return
 
         if model_id not in self.available_models:
-            print(f"AI Model {model_id} not found.")
+            logger.warning("AI Model %s not found.", model_id)
             return
 
         model = self.available_models[model_id]
         if self.users[user_id].neuro_balance >= model.access_cost:
             self.users[user_id].neuro_balance -= model.access_cost
             self.users[user_id].ai_model_access.append(model_id)
-            print(f"User {user_id} granted access to AI Model {model_id}.")
-            print(f"Remaining balance: {self.users[user_id].neuro_balance} NEURO.")
+            logger.info("User %s granted access to AI Model %s.", user_id, model_id)
+            logger.info("Remaining balance: %s NEURO.", self.users[user_id].neuro_balance)
         else:
-            print(f"Insufficient NEURO balance for user {user_id} to access AI Model {model_id}.")
+            logger.warning("Insufficient NEURO balance for user %s to access AI Model %s.", user_id, model_id)
 
     def get_user_balance(self, user_id: str) -> float:
         if user_id in self.users:
             return self.users[user_id].neuro_balance
         else:
-            print(f"User {user_id} not found.")
+            logger.warning("User %s not found.", user_id)
             return 0.0
 
     def get_user_contributions(self, user_id: str) -> List[str]:
         if user_id in self.users:
             return self.users[user_id].data_contributions
         else:
-            print(f"User {user_id} not found.")
+            logger.warning("User %s not found.", user_id)
             return []
 
     def get_user_model_access(self, user_id: str) -> List[str]:
         if user_id in self.users:
             return self.users[user_id].ai_model_access
         else:
-            print(f"User {user_id} not found.")
+            logger.warning("User %s not found.", user_id)
             return []
 
 # Example usage
-exchange = NeuroExchange()
-
-# Register users
-exchange.register_user("alice")
-exchange.register_user("bob")
-
-# Contribute data
-exchange.contribute_data("alice", "image", 1000)
-exchange.contribute_data("bob", "text", 500)
-
-# Add AI models
-exchange.add_ai_model("image_classifier_v1", 100)
-exchange.add_ai_model("text_analyzer_v1", 75)
-
-# Request model access
-exchange.request_model_access("alice", "image_classifier_v1")
-exchange.request_model_access("bob", "text_analyzer_v1")
-
-# Check balances and access
-print(f"Alice's balance: {exchange.get_user_balance('alice')} NEURO")
-print(f"Bob's balance: {exchange.get_user_balance('bob')} NEURO")
-print(f"Alice's model access: {exchange.get_user_model_access('alice')}")
-print(f"Bob's model access: {exchange.get_user_model_access('bob')}")
-
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+    exchange = NeuroExchange()
+
+    # Register users
+    exchange.register_user("alice")
+    exchange.register_user("bob")
+
+    # Contribute data
+    exchange.contribute_data("alice", "image", 1000)
+    exchange.contribute_data("bob", "text", 500)
+
+    # Add AI models
+    exchange.add_ai_model("image_classifier_v1", 100)
+    exchange.add_ai_model("text_analyzer_v1", 75)
+
+    # Request model access
+    exchange.request_model_access("alice", "image_classifier_v1")
+    exchange.request_model_access("bob", "text_analyzer_v1")
+
+    # Check balances and access
+    print(f"Alice's balance: {exchange.get_user_balance('alice')} NEURO")
+    print(f"Bob's balance: {exchange.get_user_balance('bob')} NEURO")
+    print(f"Alice's model access: {exchange.get_user_model_access('alice')}")
+    print(f"Bob's model access: {exchange.get_user_model_access('bob')}")
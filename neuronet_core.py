@@ -1,128 +1,807 @@
 import numpy as np
-from typing import List, Dict, Any
+from collections import OrderedDict
+from typing import List, Dict, Any, Iterable, Optional, Tuple
 import hashlib
+import struct
+import threading
 import time
 
+from instrumentation import count, instrumented
+
+class FeatureArena:
+    # Columnar storage for data points: one growable row per point instead of one Python object each
+    def __init__(self, n_features: int, capacity: int = 1024, dtype=np.float64):
+        self.n_features = n_features
+        self.size = 0
+        self._features = np.empty((capacity, n_features), dtype=dtype)
+        self._labels = np.empty(capacity)
+        self._timestamps = np.empty(capacity)
+        self._digests = np.empty((capacity, 32), dtype=np.uint8)  # Raw SHA-256 digests
+        self._client_ids = np.empty(capacity, dtype=np.int32)
+        self._block_ids = np.empty(capacity, dtype=np.int32)  # -1 while the point is pending
+
+    @property
+    def features(self) -> np.ndarray:
+        return self._features[:self.size]
+
+    @property
+    def labels(self) -> np.ndarray:
+        return self._labels[:self.size]
+
+    @property
+    def timestamps(self) -> np.ndarray:
+        return self._timestamps[:self.size]
+
+    @property
+    def digests(self) -> np.ndarray:
+        return self._digests[:self.size]
+
+    @property
+    def client_ids(self) -> np.ndarray:
+        return self._client_ids[:self.size]
+
+    @property
+    def block_ids(self) -> np.ndarray:
+        return self._block_ids[:self.size]
+
+    def append(self, features: np.ndarray, label: Any, client_id: int = -1) -> int:
+        self._reserve(self.size + 1)
+        row = self.size
+        self._features[row] = features
+        self._labels[row] = label
+        self._timestamps[row] = time.time()
+        self._client_ids[row] = client_id
+        self._block_ids[row] = -1
+        self.size += 1
+        self._digests[row] = np.frombuffer(self.row_digest(row), dtype=np.uint8)
+        return row
+
+    def append_many(self, features: np.ndarray, labels: np.ndarray, client_id: int = -1) -> range:
+        # Bulk ingest: column-wise copies, one timestamp for the batch, and a tight per-row hash loop
+        features = np.asarray(features, dtype=self._features.dtype)
+        labels = np.asarray(labels, dtype=self._labels.dtype)
+        if features.ndim != 2 or features.shape[1] != self.n_features or len(labels) != len(features):
+            raise ValueError(f"Expected ({len(labels)}, {self.n_features}) features and matching labels, "
+                             f"got {features.shape} and {labels.shape}")
+        start, end = self.size, self.size + len(features)
+        self._reserve(end)
+        self._features[start:end] = features
+        self._labels[start:end] = labels
+        self._timestamps[start:end] = time.time()
+        self._client_ids[start:end] = client_id
+        self._block_ids[start:end] = -1
+        self.size = end
+
+        sha256, pack = hashlib.sha256, struct.Struct("<dd").pack
+        rows, row_labels, row_times = self._features, self._labels.tolist(), self._timestamps.tolist()
+        digests = bytearray()
+        for row in range(start, end):
+            h = sha256(rows[row])
+            h.update(pack(row_labels[row], row_times[row]))
+            digests += h.digest()
+        self._digests[start:end] = np.frombuffer(digests, dtype=np.uint8).reshape(-1, 32)
+        return range(start, end)
+
+    def row_digest(self, row: int) -> bytes:
+        # Hashes the raw feature row, label and timestamp bytes; no repr strings are built
+        h = hashlib.sha256(self._features[row])
+        h.update(struct.pack("<dd", self._labels[row], self._timestamps[row]))
+        return h.digest()
+
+    def _reserve(self, required: int):
+        capacity = len(self._features)
+        if required <= capacity:
+            return
+        capacity = max(required, 2 * capacity)
+        for name in ("_features", "_labels", "_timestamps", "_digests", "_client_ids", "_block_ids"):
+            old = getattr(self, name)
+            new = np.empty((capacity,) + old.shape[1:], dtype=old.dtype)
+            new[:self.size] = old[:self.size]
+            setattr(self, name, new)
+
 class DataPoint:
-    def __init__(self, features: np.ndarray, label: Any):
-        self.features = features
-        self.label = label
-        self.timestamp = time.time()
-        self.hash = self._calculate_hash()
+    # Lightweight view of one FeatureArena row
+    __slots__ = ("arena", "index")
+
+    def __init__(self, features: np.ndarray, label: Any, arena: Optional[FeatureArena] = None, client_id: int = -1):
+        if arena is None:
+            arena = FeatureArena(np.size(features), capacity=1)
+        self.arena = arena
+        self.index = arena.append(features, label, client_id)
+
+    @classmethod
+    def view(cls, arena: FeatureArena, index: int) -> "DataPoint":
+        data_point = cls.__new__(cls)
+        data_point.arena = arena
+        data_point.index = index
+        return data_point
+
+    @property
+    def features(self) -> np.ndarray:
+        return self.arena.features[self.index]
+
+    @property
+    def label(self) -> float:
+        return self.arena.labels[self.index]
+
+    @property
+    def timestamp(self) -> float:
+        return float(self.arena.timestamps[self.index])
+
+    @property
+    def digest(self) -> bytes:
+        return self.arena._digests[self.index].tobytes()
+
+    @property
+    def hash(self) -> str:
+        return self.digest.hex()
 
     def _calculate_hash(self) -> str:
-        data = str(self.features.tobytes()) + str(self.label) + str(self.timestamp)
-        return hashlib.sha256(data.encode()).hexdigest()
+        return self.arena.row_digest(self.index).hex()
+
+class ArenaRows:
+    # Growable index array selecting one client's rows of a FeatureArena
+    def __init__(self, arena: FeatureArena):
+        self.arena = arena
+        self._indices = np.empty(64, dtype=np.int64)
+        self.size = 0
+
+    @property
+    def indices(self) -> np.ndarray:
+        return self._indices[:self.size]
+
+    @property
+    def features(self) -> np.ndarray:
+        return self.arena.features[self.indices]
+
+    @property
+    def labels(self) -> np.ndarray:
+        return self.arena.labels[self.indices]
+
+    def append(self, row: int):
+        self._reserve(self.size + 1)
+        self._indices[self.size] = row
+        self.size += 1
+
+    def extend(self, rows: range):
+        self._reserve(self.size + len(rows))
+        self._indices[self.size:self.size + len(rows)] = rows
+        self.size += len(rows)
+
+    def _reserve(self, required: int):
+        if required > len(self._indices):
+            indices = np.empty(max(required, 2 * len(self._indices)), dtype=np.int64)
+            indices[:self.size] = self._indices[:self.size]
+            self._indices = indices
+
+    def __len__(self) -> int:
+        return self.size
+
+    def __getitem__(self, i: int) -> DataPoint:
+        return DataPoint.view(self.arena, int(self.indices[i]))
+
+    def __iter__(self):
+        for row in self.indices:
+            yield DataPoint.view(self.arena, int(row))
+
+# Domain-separation prefixes so a leaf can never be passed off as an inner node
+MERKLE_LEAF = b"\x00"
+MERKLE_NODE = b"\x01"
+
+def merkle_levels(leaf_digests: List[bytes]) -> List[List[bytes]]:
+    # Level 0 holds the hashed leaves, the last level holds the root; an odd node is promoted unchanged
+    level = [hashlib.sha256(MERKLE_LEAF + digest).digest() for digest in leaf_digests]
+    if not level:
+        return [[hashlib.sha256(b"").digest()]]
+    levels = [level]
+    while len(level) > 1:
+        parents = [hashlib.sha256(MERKLE_NODE + level[i] + level[i + 1]).digest() for i in range(0, len(level) - 1, 2)]
+        if len(level) % 2:
+            parents.append(level[-1])
+        level = parents
+        levels.append(level)
+    return levels
+
+def verify_merkle_proof(leaf_hash: str, proof: List[Tuple[str, str]], merkle_root: str) -> bool:
+    # proof: (side, sibling hash) pairs from the leaf upwards, side being where the sibling sits
+    node = hashlib.sha256(MERKLE_LEAF + bytes.fromhex(leaf_hash)).digest()
+    for side, sibling in proof:
+        if side == "left":
+            node = hashlib.sha256(MERKLE_NODE + bytes.fromhex(sibling) + node).digest()
+        else:
+            node = hashlib.sha256(MERKLE_NODE + node + bytes.fromhex(sibling)).digest()
+    return node.hex() == merkle_root
 
 class NeuroBlock:
     def __init__(self, data: List[DataPoint], previous_hash: str):
         self.data = data
         self.previous_hash = previous_hash
         self.timestamp = time.time()
+        self._merkle_levels = merkle_levels([dp.digest for dp in self.data])
+        self.merkle_root = self._merkle_levels[-1][0].hex()
         self.hash = self._calculate_hash()
 
     def _calculate_hash(self) -> str:
-        block_data = "".join([dp.hash for dp in self.data]) + self.previous_hash + str(self.timestamp)
+        block_data = self.merkle_root + self.previous_hash + str(self.timestamp)
         return hashlib.sha256(block_data.encode()).hexdigest()
 
+    def inclusion_proof(self, index: int) -> List[Tuple[str, str]]:
+        if not 0 <= index < len(self.data):
+            raise IndexError(f"Block has no data point at index {index}")
+        proof = []
+        for level in self._merkle_levels[:-1]:
+            sibling = index ^ 1
+            if sibling < len(level):  # No sibling means the node was promoted as-is
+                proof.append(("left" if sibling < index else "right", level[sibling].hex()))
+            index //= 2
+        return proof
+
+    def verify(self) -> bool:
+        # Recomputes every data point hash, the Merkle root and the block hash
+        if any(dp._calculate_hash() != dp.hash for dp in self.data):
+            return False
+        if merkle_levels([dp.digest for dp in self.data])[-1][0].hex() != self.merkle_root:
+            return False
+        return self._calculate_hash() == self.hash
+
 class NeuroChain:
-    def __init__(self):
+    block_size = 10  # Data points per sealed block
+
+    def __init__(self, store=None):
+        # store: optional persistent block log (see neuro_chain_store.ChainSegmentLog); blocks sealed
+        # before this process started stay on disk and the in-memory chain continues from its tip
+        self.store = store
+        self.base_height = store.height if store is not None else 0
+        self.base_hash = store.last_hash if store is not None else "0" * 64
         self.chain: List[NeuroBlock] = []
         self.pending_data: List[DataPoint] = []
+        self.sealed_index: Dict[bytes, Tuple[int, int]] = {}  # Data point digest -> (block index, position)
 
     def add_data(self, data_point: DataPoint):
         self.pending_data.append(data_point)
-        if len(self.pending_data) >= 10:  # Create a new block every 10 data points
+        if len(self.pending_data) >= self.block_size:
             self._create_block()
 
+    def add_data_batch(self, data_points: List[DataPoint]):
+        # Seals every complete block in one pass instead of checking after each point
+        self.pending_data.extend(data_points)
+        sealed = len(self.pending_data) - len(self.pending_data) % self.block_size
+        for start in range(0, sealed, self.block_size):
+            self._seal(self.pending_data[start:start + self.block_size])
+        self.pending_data = self.pending_data[sealed:]
+
     def _create_block(self):
-        previous_hash = self.chain[-1].hash if self.chain else "0" * 64
-        new_block = NeuroBlock(self.pending_data, previous_hash)
-        self.chain.append(new_block)
+        self._seal(self.pending_data)
         self.pending_data = []
 
+    @instrumented("chain.seal_block")
+    def _seal(self, data: List[DataPoint]):
+        previous_hash = self.chain[-1].hash if self.chain else self.base_hash
+        new_block = NeuroBlock(data, previous_hash)
+        if self.store is not None:
+            self.store.append_block(new_block)
+        block_index = len(self.chain)
+        for i, dp in enumerate(new_block.data):
+            self.sealed_index[dp.digest] = (block_index, i)
+            dp.arena._block_ids[dp.index] = self.base_height + block_index
+        self.chain.append(new_block)
+        count("chain.data_points_sealed", len(new_block.data))
+
+    def prove_inclusion(self, data_hash: str) -> Optional[Tuple[int, List[Tuple[str, str]]]]:
+        # Returns (block index, proof) for a sealed data point, or None if it is not in the chain
+        location = self.sealed_index.get(bytes.fromhex(data_hash))
+        if location is None:
+            return None
+        block_index, position = location
+        return block_index, self.chain[block_index].inclusion_proof(position)
+
+    def verify_chain(self) -> bool:
+        # Checks the links in order, then every block's contents
+        previous_hash = self.base_hash
+        for block in self.chain:
+            if block.previous_hash != previous_hash:
+                return False
+            previous_hash = block.hash
+        return all(block.verify() for block in self.chain)
+
+class RoundAggregator:
+    # Running FedAvg sum: each client update is folded in as it arrives, so memory stays O(model size)
+    def __init__(self, global_weights: Dict[str, np.ndarray], round_id: int = 0, accumulator_dtype=np.float64):
+        # accumulator_dtype=None accumulates in each layer's own dtype
+        self.round_id = round_id
+        self.base_weights = dict(global_weights)  # Compressed updates are deltas against these
+        self.weighted_sums = {
+            layer: np.zeros(w.shape, dtype=accumulator_dtype or w.dtype) for layer, w in global_weights.items()
+        }
+        self.total_weight = 0.0
+        self.base_weight = 0.0
+        self.contributors = set()
+
+    def add_update(self, client_id: Any, update, num_samples: float = 1) -> bool:
+        # update: dense {layer: weights} dict, or an encoded delta (see update_compression.CompressedUpdate)
+        if client_id in self.contributors or num_samples <= 0:
+            return False
+        if isinstance(update, dict):
+            for layer, weighted_sum in self.weighted_sums.items():
+                weighted_sum += update[layer] * num_samples
+        else:
+            update.accumulate_into(self.weighted_sums, num_samples)
+            self.base_weight += num_samples
+        self.total_weight += num_samples
+        self.contributors.add(client_id)
+        return True
+
+    def result(self) -> Dict[str, np.ndarray]:
+        if not self.total_weight:
+            raise ValueError(f"Round {self.round_id} has no client updates to aggregate")
+        result = {}
+        for layer, weighted_sum in self.weighted_sums.items():
+            if self.base_weight:
+                weighted_sum = weighted_sum + self.base_weights[layer] * self.base_weight
+            result[layer] = weighted_sum / self.total_weight
+        return result
+
 class FederatedModel:
-    def __init__(self, model_architecture: Dict):
+    def __init__(self, model_architecture: Dict, checkpoints=None, dtype=np.float64, accumulator_dtype=np.float64):
+        # checkpoints: optional model_checkpoints.ModelCheckpointStore; every finalized round is saved to it.
+        # dtype is the precision of the weights (and so of training and prediction); aggregation sums run in
+        # accumulator_dtype, or in dtype itself when that is None.
         self.model_architecture = model_architecture
-        self.global_weights = self._initialize_weights()
+        self.dtype = np.dtype(dtype)
+        self.accumulator_dtype = accumulator_dtype
+        self.round_id = 0
+        self.weight_version = 0  # Bumped on every change to global_weights
+        self._round: Optional[RoundAggregator] = None
+        self.checkpoints = None
+        if checkpoints is not None and checkpoints.latest_round() is not None:
+            self.load_checkpoint(checkpoints)
+        else:
+            self.global_weights = self._initialize_weights()
+            self.checkpoints = checkpoints
 
     def _initialize_weights(self) -> Dict[str, np.ndarray]:
-        return {layer: np.random.randn(*shape) for layer, shape in self.model_architecture.items()}
+        return {
+            layer: np.random.randn(*shape).astype(self.dtype, copy=False)
+            for layer, shape in self.model_architecture.items()
+        }
 
-    def update_global_weights(self, client_updates: List[Dict[str, np.ndarray]]):
-        for layer in self.global_weights:
-            layer_updates = [update[layer] for update in client_updates]
-            self.global_weights[layer] = np.mean(layer_updates, axis=0)
+    def update_global_weights(self, client_updates: List[Dict[str, np.ndarray]],
+                              sample_counts: Optional[List[float]] = None):
+        # Without sample counts every client is weighted equally (plain mean)
+        aggregator = RoundAggregator(self.global_weights, accumulator_dtype=self.accumulator_dtype)
+        counts = sample_counts if sample_counts is not None else [1] * len(client_updates)
+        for i, (update, num_samples) in enumerate(zip(client_updates, counts)):
+            aggregator.add_update(i, update, num_samples)
+        if aggregator.total_weight:
+            self._apply(aggregator.result())
 
-class NeuroNet:
+    def begin_round(self) -> int:
+        if self._round is not None:
+            raise ValueError(f"Round {self._round.round_id} is still in progress")
+        self._round = RoundAggregator(self.global_weights, self.round_id, self.accumulator_dtype)
+        return self.round_id
+
+    def submit_update(self, client_id: Any, update, num_samples: float,
+                      round_id: Optional[int] = None) -> bool:
+        # Updates may arrive in any order; late ones for a closed round and duplicates are rejected
+        if self._round is None or (round_id is not None and round_id != self._round.round_id):
+            return False
+        return self._round.add_update(client_id, update, num_samples)
+
+    def finalize_round(self) -> bool:
+        if self._round is None:
+            return False
+        aggregator, self._round = self._round, None
+        self.round_id += 1
+        if not aggregator.total_weight:
+            return False
+        self._apply(aggregator.result())
+        if self.checkpoints is not None:
+            self.checkpoints.save(self.round_id, self.global_weights)
+        return True
+
+    def load_checkpoint(self, checkpoints, round_id: Optional[int] = None):
+        # Full snapshot rounds are memory-mapped read-only; weights are replaced, never written in place.
+        # Weights saved in another precision are cast to dtype.
+        self.checkpoints = checkpoints
+        self.global_weights = self._cast(checkpoints.load(round_id))
+        self.round_id = round_id if round_id is not None else checkpoints.latest_round()
+        self.weight_version += 1
+
+    def rollback(self, round_id: int):
+        if self._round is not None:
+            raise ValueError(f"Cannot roll back while round {self._round.round_id} is in progress")
+        if self.checkpoints is None:
+            raise ValueError("Cannot roll back a model without a checkpoint store")
+        self.global_weights = self._cast(self.checkpoints.rollback(round_id))
+        self.round_id = round_id
+        self.weight_version += 1
+
+    def discard_round(self):
+        if self._round is not None:
+            self._round = None
+            self.round_id += 1
+
+    @property
+    def round_in_progress(self) -> bool:
+        return self._round is not None
+
+    def apply_delta(self, delta: Dict[str, np.ndarray], scale: float = 1.0):
+        # global_weights += scale * delta, outside of any round (e.g. late updates merged between rounds)
+        self._apply({layer: self.global_weights[layer] + scale * layer_delta for layer, layer_delta in delta.items()})
+
+    def _cast(self, weights: Dict[str, np.ndarray]) -> Dict[str, np.ndarray]:
+        return {layer: w.astype(self.dtype, copy=False) for layer, w in weights.items()}
+
+    def _apply(self, new_weights: Dict[str, np.ndarray]):
+        for layer, weights in new_weights.items():
+            self.global_weights[layer] = weights.astype(self.global_weights[layer].dtype, copy=False)
+        self.weight_version += 1
+
+class PredictionCache:
+    # LRU of predictions keyed by a 16-byte BLAKE2b digest of the input row; the whole cache is
+    # dropped as soon as it is used with a different FederatedModel.weight_version. Thread-safe.
+    def __init__(self, max_entries: int = 100_000):
+        self.max_entries = max_entries
+        self.version: Optional[int] = None
+        self._entries: "OrderedDict[bytes, float]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    @staticmethod
+    def key(row: np.ndarray) -> bytes:
+        return hashlib.blake2b(row, digest_size=16).digest()
+
+    def get(self, key: bytes, version: int) -> Optional[float]:
+        return self.get_many([key], version)[0]
+
+    def put(self, key: bytes, prediction: float, version: int):
+        self.put_many([(key, prediction)], version)
+
+    def get_many(self, keys: List[bytes], version: int) -> List[Optional[float]]:
+        with self._lock:
+            self._check_version(version)
+            predictions = []
+            for key in keys:
+                prediction = self._entries.get(key)
+                if prediction is None:
+                    self.misses += 1
+                else:
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                predictions.append(prediction)
+            return predictions
+
+    def put_many(self, items: Iterable[Tuple[bytes, float]], version: int):
+        with self._lock:
+            self._check_version(version)
+            for key, prediction in items:
+                self._entries[key] = prediction
+                self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def _check_version(self, version: int):
+        if version != self.version:
+            if self._entries:
+                self.invalidations += 1
+                self._entries.clear()
+            self.version = version
+
+    @property
+    def hit_rate(self) -> float:
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hit_rate,
+                "evictions": self.evictions,
+                "invalidations": self.invalidations,
+            }
+
+def train_local_weights(global_weights: Dict[str, np.ndarray], features: np.ndarray, labels: np.ndarray,
+                        epochs: int = 1, batch_size: int = 32, learning_rate: float = 1e-4,
+                        seed: Optional[int] = None, rows: Optional[np.ndarray] = None) -> Dict[str, np.ndarray]:
+    # Minibatch SGD on mean squared error, using the same ReLU stack as NeuroNet.predict_batch.
+    # With rows, only those rows of features/labels are trained on (minibatches are gathered straight from them).
+    layers = list(global_weights)
+    weights = [global_weights[layer].copy() for layer in layers]
+    dtype = weights[0].dtype  # Inputs are cast so the whole pass stays in the weights' precision
+    rng = np.random.default_rng(seed)
+    n_samples = len(rows) if rows is not None else len(features)
+
+    for _ in range(epochs):
+        order = rng.permutation(n_samples)
+        for start in range(0, n_samples, batch_size):
+            batch = order[start:start + batch_size]
+            if rows is not None:
+                batch = rows[batch]
+            activations = [features[batch].astype(dtype, copy=False)]
+            for w in weights:
+                activations.append(np.maximum(activations[-1] @ w, 0))
+
+            # Backward pass: gradient of 0.5 * mean((prediction - label) ** 2)
+            grad = np.zeros_like(activations[-1])
+            grad[:, 0] = (activations[-1][:, 0] - labels[batch].astype(dtype, copy=False)) / len(batch)
+            for i in range(len(weights) - 1, -1, -1):
+                grad *= activations[i + 1] > 0  # ReLU derivative
+                weight_grad = activations[i].T @ grad
+                if i:
+                    grad = grad @ weights[i].T
+                weights[i] -= learning_rate * weight_grad
+
+    return dict(zip(layers, weights))
+
+class ClientRegistry:
+    # Registered clients in registration order, with an id -> position index for O(1) lookup.
+    # Contribution counters live in arrays indexed by position so payouts are a single vectorized step.
     def __init__(self):
+        self._clients: List[Dict] = []
+        self._positions: Dict[str, int] = {}
+        self.ids: List[str] = []
+        self._data_points = np.zeros(16)
+        self._quality_sums = np.zeros(16)
+
+    @property
+    def data_points(self) -> np.ndarray:
+        return self._data_points[:len(self._clients)]
+
+    @property
+    def quality_sums(self) -> np.ndarray:
+        return self._quality_sums[:len(self._clients)]
+
+    def add(self, client: Dict) -> Dict:
+        if client["id"] in self._positions:
+            return self._clients[self._positions[client["id"]]]
+        position = len(self._clients)
+        if position == len(self._data_points):
+            self._data_points = np.concatenate([self._data_points, np.zeros(position)])
+            self._quality_sums = np.concatenate([self._quality_sums, np.zeros(position)])
+        self._positions[client["id"]] = position
+        self._clients.append(client)
+        self.ids.append(client["id"])
+        return client
+
+    def record_contribution(self, position: int, data_points: int, quality_sum: float):
+        self._data_points[position] += data_points
+        self._quality_sums[position] += quality_sum
+
+    def get(self, client_id: str) -> Dict:
+        return self._clients[self.position(client_id)]
+
+    def position(self, client_id: str) -> int:
+        if client_id not in self._positions:
+            raise ValueError(f"Client {client_id} is not registered")
+        return self._positions[client_id]
+
+    def __contains__(self, client_id: str) -> bool:
+        return client_id in self._positions
+
+    def __len__(self) -> int:
+        return len(self._clients)
+
+    def __iter__(self):
+        return iter(self._clients)
+
+PREDICT_CHUNK_SIZE = 4096  # Default rows per forward-pass chunk in predict_batch
+MAX_RETAINED_ROWS = 16384  # Largest activation buffers kept per thread between calls
+
+class NeuroNet:
+    def __init__(self, local_epochs: int = 1, batch_size: int = 32, learning_rate: float = 1e-4,
+                 update_encoder=None, prediction_cache_size: int = 0, dtype=np.float64,
+                 accumulator_dtype=np.float64):
+        # dtype applies to the model weights and the stored client features alike
         self.data_chain = NeuroChain()
         self.model = FederatedModel({
             "input_layer": (100, 64),
             "hidden_layer_1": (64, 32),
             "hidden_layer_2": (32, 16),
             "output_layer": (16, 1)
-        })
-        self.clients: List[Dict] = []
+        }, dtype=dtype, accumulator_dtype=accumulator_dtype)
+        self.arena = FeatureArena(next(iter(self.model.model_architecture.values()))[0], dtype=dtype)
+        self.clients = ClientRegistry()
+        self.local_epochs = local_epochs
+        self.batch_size = batch_size
+        self.learning_rate = learning_rate
+        self.update_encoder = update_encoder  # Optional update_compression.UpdateEncoder
+        self.payout_ledger: List[Dict[str, Any]] = []
+        self._paid_contributions: Optional[np.ndarray] = None  # Counters as of the last incremental payout
+        self._activation_local = threading.local()  # Per-thread buffers reused across predict_batch calls
+        self.prediction_cache = PredictionCache(prediction_cache_size) if prediction_cache_size else None
 
     def register_client(self, client_id: str):
-        self.clients.append({"id": client_id, "local_data": []})
+        self.clients.add({"id": client_id, "local_data": ArenaRows(self.arena)})
 
-    def receive_client_data(self, client_id: str, features: np.ndarray, label: Any):
-        data_point = DataPoint(features, label)
+    def receive_client_data(self, client_id: str, features: np.ndarray, label: Any, quality_score: float = 1.0):
+        client_index = self.clients.position(client_id)
+        data_point = DataPoint(features, label, arena=self.arena, client_id=client_index)
         self.data_chain.add_data(data_point)
-        client = next(c for c in self.clients if c["id"] == client_id)
-        client["local_data"].append(data_point)
-
-    def train_federated_model(self):
-        client_updates = []
-        for client in self.clients:
-            local_update = self._train_local_model(client["local_data"])
-            client_updates.append(local_update)
-        self.model.update_global_weights(client_updates)
-
-    def _train_local_model(self, local_data: List[DataPoint]) -> Dict[str, np.ndarray]:
-        # Simplified local training process
-        local_weights = {layer: np.random.randn(*shape) for layer, shape in self.model.model_architecture.items()}
-        # In a real implementation, this would involve actual training on local data
-        return local_weights
+        self.clients.get(client_id)["local_data"].append(data_point.index)
+        self.clients.record_contribution(client_index, 1, quality_score)
+
+    def receive_client_batch(self, client_id: str, features_matrix: np.ndarray, labels: np.ndarray,
+                             quality_scores=1.0):
+        # quality_scores: one score for the whole batch or one per row
+        client_index = self.clients.position(client_id)
+        rows = self.arena.append_many(features_matrix, labels, client_id=client_index)
+        self.data_chain.add_data_batch([DataPoint.view(self.arena, row) for row in rows])
+        self.clients.get(client_id)["local_data"].extend(rows)
+        quality_sum = np.sum(quality_scores) if np.ndim(quality_scores) else quality_scores * len(rows)
+        self.clients.record_contribution(client_index, len(rows), quality_sum)
+
+    @instrumented("neuronet.train_round")
+    def train_federated_model(self, seed: Optional[int] = None, executor=None):
+        # executor: optional round executor (see federated_parallel.ParallelRoundExecutor)
+        # Updates are folded into the round as they are produced, weighted by client sample count (FedAvg)
+        seeds = self._client_seeds(seed)
+        self.model.begin_round()
+        try:
+            if executor is None:
+                for client, client_seed in zip(self.clients, seeds):
+                    local_update = self._train_local_model(client, client_seed)
+                    self.submit_local_update(client, local_update)
+            else:
+                client_updates = executor.run_round(
+                    self.model.global_weights,
+                    [(client["id"], client["local_data"]) for client in self.clients],
+                    seeds, epochs=self.local_epochs, batch_size=self.batch_size,
+                    learning_rate=self.learning_rate
+                )
+                for client, local_update in zip(self.clients, client_updates):
+                    self.submit_local_update(client, local_update)
+        except BaseException:
+            self.model.discard_round()
+            raise
+        self.model.finalize_round()
+
+    def submit_local_update(self, client: Dict, local_update: Dict[str, np.ndarray]):
+        if self.update_encoder is not None:
+            local_update = self.update_encoder.encode(client["id"], local_update, self.model.global_weights)
+        self.model.submit_update(client["id"], local_update, len(client["local_data"]))
+
+    def _client_seeds(self, seed: Optional[int]) -> List[Optional[int]]:
+        if seed is None:
+            return [None] * len(self.clients)
+        return [int(s) for s in np.random.SeedSequence(seed).generate_state(len(self.clients))]
+
+    def _train_local_model(self, client: Dict, seed: Optional[int] = None) -> Dict[str, np.ndarray]:
+        # Minibatches are gathered straight from the arena; the client's rows are never copied as a whole
+        return train_local_weights(
+            self.model.global_weights, self.arena.features, self.arena.labels,
+            epochs=self.local_epochs, batch_size=self.batch_size,
+            learning_rate=self.learning_rate, seed=seed, rows=client["local_data"].indices
+        )
 
     def get_model_prediction(self, features: np.ndarray) -> float:
-        # Simplified forward pass through the model
-        x = features
-        for layer, weights in self.model.global_weights.items():
-            x = np.dot(x, weights)
-            x = np.maximum(x, 0)  # ReLU activation
-        return x[0]
-
-    def distribute_neuro_tokens(self):
-        # Simplified token distribution based on data contributions
-        total_data_points = sum(len(client["local_data"]) for client in self.clients)
-        for client in self.clients:
-            contribution_ratio = len(client["local_data"]) / total_data_points
-            tokens_earned = contribution_ratio * 1000  # Assuming 1000 tokens are distributed in total
-            print(f"Client {client['id']} earned {tokens_earned:.2f} NEURO tokens")
+        return self.predict_batch(np.reshape(features, (1, -1)))[0]
+
+    def predict_batch(self, features: np.ndarray, chunk_size: Optional[int] = PREDICT_CHUNK_SIZE) -> np.ndarray:
+        # Forward pass over an (N, input_dim) matrix; rows are scored chunk_size at a time (None: all at once).
+        # Safe to call from several threads: each thread scores into its own buffers, and the cache is locked.
+        version = self.model.weight_version  # Read before the weights, so cached rows never outlive them
+        weights = list(self.model.global_weights.values())
+        x = np.ascontiguousarray(features, dtype=weights[0].dtype)
+        if x.ndim != 2 or x.shape[1] != weights[0].shape[0]:
+            raise ValueError(f"Expected features of shape (N, {weights[0].shape[0]}), got {x.shape}")
+        if self.prediction_cache is not None:
+            return self._predict_cached(x, weights, version, chunk_size)
+        return self._predict_rows(x, weights, chunk_size)
+
+    def _predict_cached(self, x: np.ndarray, weights: List[np.ndarray], version: int,
+                        chunk_size: Optional[int]) -> np.ndarray:
+        # Only rows missing from the cache go through the forward pass, still as one batch. Rows computed
+        # while the weights changed are returned but not cached.
+        cache = self.prediction_cache
+        keys = [cache.key(row) for row in x]
+        cached = cache.get_many(keys, version)
+        missing = [i for i, prediction in enumerate(cached) if prediction is None]
+
+        predictions = np.array([0.0 if p is None else p for p in cached], dtype=x.dtype)
+        if missing:
+            computed = self._predict_rows(x[missing], weights, chunk_size)
+            predictions[missing] = computed
+            if self.model.weight_version == version:
+                cache.put_many(zip([keys[i] for i in missing], computed.tolist()), version)
+        return predictions
+
+    def _predict_rows(self, x: np.ndarray, weights: List[np.ndarray], chunk_size: Optional[int]) -> np.ndarray:
+        n_rows = x.shape[0]
+        chunk_size = n_rows if chunk_size is None else chunk_size
+        if chunk_size <= 0 and n_rows:
+            raise ValueError("chunk_size must be positive")
+
+        predictions = np.empty(n_rows, dtype=x.dtype)
+        for start in range(0, n_rows, max(chunk_size, 1)):
+            chunk = x[start:start + chunk_size]
+            predictions[start:start + len(chunk)] = self._forward_chunk(chunk, weights)[:, 0]
+        return predictions
+
+    def _forward_chunk(self, chunk: np.ndarray, weights: List[np.ndarray]) -> np.ndarray:
+        buffers = self._get_activation_buffers(len(chunk), weights)
+        x = chunk
+        for w, buffer in zip(weights, buffers):
+            out = buffer[:len(chunk)]
+            np.dot(x, w, out=out)
+            np.maximum(out, 0, out=out)  # ReLU activation, in place
+            x = out
+        return x
+
+    def _get_activation_buffers(self, n_rows: int, weights: List[np.ndarray]) -> List[np.ndarray]:
+        # Buffers only grow, so a steady stream of chunks never reallocates; chunks larger than
+        # MAX_RETAINED_ROWS get one-off buffers so a single huge call doesn't pin its memory
+        buffers = getattr(self._activation_local, "buffers", [])
+        if (len(buffers) != len(weights)
+                or buffers[0].shape[0] < n_rows
+                or any(b.shape[1] != w.shape[1] or b.dtype != w.dtype for b, w in zip(buffers, weights))):
+            capacity = max(n_rows, buffers[0].shape[0] if buffers else 0)
+            if n_rows > MAX_RETAINED_ROWS:
+                return [np.empty((n_rows, w.shape[1]), dtype=w.dtype) for w in weights]
+            buffers = [np.empty((capacity, w.shape[1]), dtype=w.dtype) for w in weights]
+            self._activation_local.buffers = buffers
+        return buffers
+
+    def distribute_neuro_tokens(self, total_tokens: float = 1000, weight_by_quality: bool = False,
+                                incremental: bool = False) -> Dict[str, Any]:
+        # Splits total_tokens by each client's share of contributions (quality-weighted if requested).
+        # incremental only counts contributions made since the previous incremental payout.
+        contributions = (self.clients.quality_sums if weight_by_quality else self.clients.data_points).copy()
+        if incremental:
+            paid = self._paid_contributions
+            self._paid_contributions = np.stack([self.clients.data_points, self.clients.quality_sums])
+            if paid is not None:
+                contributions[:paid.shape[1]] -= paid[1 if weight_by_quality else 0]
+
+        total = contributions.sum()
+        amounts = contributions * (total_tokens / total) if total > 0 else np.zeros_like(contributions)
+        entry = {
+            "timestamp": time.time(),
+            "total_tokens": float(amounts.sum()),
+            "weighted_by_quality": weight_by_quality,
+            "client_ids": list(self.clients.ids),
+            "amounts": amounts,
+        }
+        self.payout_ledger.append(entry)
+        return entry
 
 # Example usage
-neuronet = NeuroNet()
+if __name__ == "__main__":
+    neuronet = NeuroNet()
+
+    # Register clients
+    neuronet.register_client("client_1")
+    neuronet.register_client("client_2")
 
-# Register clients
-neuronet.register_client("client_1")
-neuronet.register_client("client_2")
+    # Simulate data contributions
+    for _ in range(25):
+        neuronet.receive_client_data("client_1", np.random.randn(100), np.random.randint(2))
+        neuronet.receive_client_data("client_2", np.random.randn(100), np.random.randint(2))
 
-# Simulate data contributions
-for _ in range(25):
-    neuronet.receive_client_data("client_1", np.random.randn(100), np.random.randint(2))
-    neuronet.receive_client_data("client_2", np.random.randn(100), np.random.randint(2))
+    # Bulk ingest seals whole blocks at once
+    neuronet.receive_client_batch("client_2", np.random.randn(500, 100), np.random.randint(2, size=500))
 
-# Train the federated model
-neuronet.train_federated_model()
+    # Train the federated model
+    neuronet.train_federated_model()
 
-# Make a prediction
-sample_input = np.random.randn(100)
-prediction = neuronet.get_model_prediction(sample_input)
-print(f"Model prediction: {prediction}")
+    # Make a prediction
+    sample_input = np.random.randn(100)
+    prediction = neuronet.get_model_prediction(sample_input)
+    print(f"Model prediction: {prediction}")
 
-# Distribute NEURO tokens
-neuronet.distribute_neuro_tokens()
+    # Score a burst of requests in one call
+    batch_predictions = neuronet.predict_batch(np.random.randn(1000, 100), chunk_size=256)
+    print(f"Batch predictions: {batch_predictions.shape}")
 
+    # Distribute NEURO tokens
+    payout = neuronet.distribute_neuro_tokens()
+    for client_id, tokens_earned in zip(payout["client_ids"], payout["amounts"]):
+        print(f"Client {client_id} earned {tokens_earned:.2f} NEURO tokens")
@@ -0,0 +1,489 @@
+from typing import Dict, List, Any, Callable, Iterable, Iterator, Optional, Tuple
+from datetime import datetime
+import json
+import os
+from functools import partial
+
+from data_digest import DEFAULT_ALGORITHM, check_algorithm, content_digest, content_digests
+from instrumentation import count, instrumented
+from storage_indexes import SecondaryIndexes, matches_query
+from storage_loader import UNLOADED, list_record_files, parallel_map, scan_positions
+from storage_records import (BINARY_SUFFIX, JSON_SUFFIX, RECORD_SUFFIXES, check_format, encode_record,
+                             is_binary_record, read_record_header, read_record_payload, record_suffix)
+from storage_refs import ReferenceLog
+from storage_stats import StorageStats
+from storage_writer import OP_DELETE, OP_PUT, GroupCommitWriter, WriteOp, write_files
+
+MANIFEST_NAME = "STORE_MANIFEST"
+LEGACY_ALGORITHM = "sha256"  # Stores written before manifests existed
+
+class BaseDataPoint:
+    def __init__(self, data: Any, metadata: Dict[str, Any], quality_score: float,
+                 algorithm: str = DEFAULT_ALGORITHM):
+        self.data = data
+        self.metadata = metadata
+        self.quality_score = quality_score
+        self.timestamp = datetime.now()
+        self.algorithm = algorithm  # Digest algorithm behind hash; a storage re-addresses points to its own
+        self.hash = self._generate_hash()
+
+    def _generate_hash(self) -> str:
+        # Content address: identical data and metadata always hash the same, whenever and however scored
+        return content_digest(self.data, self.metadata, self.algorithm)
+
+    def readdress(self, algorithm: str):
+        if algorithm != self.algorithm:
+            self.algorithm = algorithm
+            self.hash = self._generate_hash()
+
+    @classmethod
+    def create_many(cls, items: Iterable[Tuple[Any, Dict[str, Any], float]], max_workers: Optional[int] = None,
+                    algorithm: str = DEFAULT_ALGORITHM) -> List["BaseDataPoint"]:
+        # Builds points from (data, metadata, quality_score) tuples, hashing them in one batch
+        items = list(items)
+        hashes = content_digests(((data, metadata) for data, metadata, _ in items), algorithm, max_workers)
+        data_points = []
+        for (data, metadata, quality_score), hash_value in zip(items, hashes):
+            data_point = cls.__new__(cls)
+            data_point.data = data
+            data_point.metadata = metadata
+            data_point.quality_score = quality_score
+            data_point.timestamp = datetime.now()
+            data_point.algorithm = algorithm
+            data_point.hash = hash_value
+            data_points.append(data_point)
+        return data_points
+
+    @property
+    def data(self) -> Any:
+        if self._data is UNLOADED:
+            self._data = self._data_loader()
+            self._data_loader = None
+        return self._data
+
+    @data.setter
+    def data(self, value: Any):
+        self._data = value
+        self._data_loader = None
+
+    @classmethod
+    def from_header(cls, header: Dict[str, Any], loader: Callable[[], Any],
+                    algorithm: str = DEFAULT_ALGORITHM) -> "BaseDataPoint":
+        # Rebuilds a stored point without hashing it again; data is read through loader on first access
+        data_point = cls.__new__(cls)
+        data_point._data = UNLOADED
+        data_point._data_loader = loader
+        data_point.metadata = header['metadata']
+        data_point.quality_score = header['quality_score']
+        data_point.timestamp = header['timestamp']
+        data_point.algorithm = algorithm
+        data_point.hash = header['hash']
+        return data_point
+
+class BaseDataStorage:
+    # Content-addressed point storage shared by the quality-specific storages. Records are one file per point;
+    # subclasses decide which points they accept (_accepts), may keep extra per-position indexes
+    # (_index_data_point/_unindex_data_point) and may swap the record engine (_put_op, _delete_op,
+    # _write_batch, _detach_record, _attach_record, _load_records).
+    point_class = BaseDataPoint
+
+    def __init__(self, storage_path: str, metadata_indexes: Iterable[str] = (), range_indexes: Iterable[str] = (),
+                 stats_keys: Iterable[str] = (), stats_flush_interval: int = 1000, quality_threshold: float = 0.8,
+                 compaction_ratio: float = 0.25, record_format: str = "json", compression: Optional[str] = None,
+                 digest_algorithm: str = DEFAULT_ALGORITHM):
+        # record_format="binary" writes storage_records' packed format (optionally compressed) instead of JSON;
+        # records in either format are always readable. digest_algorithm is fixed when the store is created
+        # (recorded in its manifest); opening it with another one raises ValueError.
+        check_format(record_format, compression)
+        check_algorithm(digest_algorithm)
+        self.storage_path = storage_path
+        self.digest_algorithm = digest_algorithm
+        self._check_manifest()
+        self.record_format = record_format
+        self.compression = compression
+        self._record_paths: Dict[str, str] = {}  # Files stored in the other record format keep their own name
+        self.quality_threshold = quality_threshold
+        self.compaction_ratio = compaction_ratio  # Tombstone fraction that triggers compaction
+        self.data_points: List[Optional[BaseDataPoint]] = []  # Removed points leave a None tombstone
+        self.index: Dict[str, int] = {}  # Hash to index mapping
+        self.secondary_indexes = SecondaryIndexes(metadata_indexes, range_indexes)
+        self.stats_flush_interval = stats_flush_interval
+        self.stats = StorageStats(stats_keys)
+        self.stats.load(self._stats_path())  # Last flushed statistics are available before load_from_disk
+        self._mutations_since_flush = 0
+        self._tombstones = 0
+        self._generation = 0  # Bumped by compaction, which renumbers positions and so invalidates scan cursors
+        self.writer: Optional[GroupCommitWriter] = None  # Set by start_group_commit
+        self.references = ReferenceLog(os.path.join(storage_path, "REF_LOG"))
+
+    def _accepts(self, data_point: BaseDataPoint) -> bool:
+        raise NotImplementedError
+
+    def _check_manifest(self):
+        os.makedirs(self.storage_path, exist_ok=True)
+        path = os.path.join(self.storage_path, MANIFEST_NAME)
+        if os.path.exists(path):
+            with open(path) as f:
+                stored = json.load(f)["digest_algorithm"]
+        else:
+            stored = LEGACY_ALGORITHM if os.listdir(self.storage_path) else self.digest_algorithm
+        if stored != self.digest_algorithm:
+            raise ValueError(f"{self.storage_path} is addressed with digest algorithm {stored!r}, "
+                             f"not {self.digest_algorithm!r}")
+        if not os.path.exists(path):
+            tmp_path = path + ".tmp"
+            with open(tmp_path, "w") as f:
+                json.dump({"digest_algorithm": self.digest_algorithm}, f)
+            os.replace(tmp_path, path)
+
+    def add_data_point(self, data_point: BaseDataPoint) -> bool:
+        return self.add_data_points([data_point])[0]
+
+    def add_data_points(self, data_points: List[BaseDataPoint], timeout: Optional[float] = 0.0) -> List[bool]:
+        # Persists the accepted points as one batch (queued to the group-commit writer when it is running) and
+        # makes them visible to readers immediately. With a writer, raises WriteBackpressureError if its queue
+        # has no room within timeout; nothing is added in that case. Content that is already stored only
+        # gains a reference: no record and no payload bytes are written for it. Points hashed with another
+        # digest algorithm are re-addressed with this storage's first.
+        for data_point in data_points:
+            data_point.readdress(self.digest_algorithm)
+        accepted = [self._accepts(dp) for dp in data_points]
+        new_points, duplicates, batch_hashes = [], [], set()
+        for data_point, ok in zip(data_points, accepted):
+            if not ok:
+                continue
+            if data_point.hash in self.index or data_point.hash in batch_hashes:
+                duplicates.append(data_point.hash)
+            else:
+                batch_hashes.add(data_point.hash)
+                new_points.append(data_point)
+        self._write([self._put_op(dp) for dp in new_points], timeout)
+
+        for data_point in new_points:
+            self._insert(data_point)
+        for hash_value in duplicates:
+            self.references.add(hash_value, 1)
+        self._record_mutation(len(new_points) + len(duplicates))
+        return accepted
+
+    def _insert(self, data_point: BaseDataPoint):
+        self.data_points.append(data_point)
+        self.index[data_point.hash] = len(self.data_points) - 1
+        self._index_data_point(len(self.data_points) - 1, data_point)
+
+    def _index_data_point(self, position: int, data_point: BaseDataPoint):
+        self.secondary_indexes.add(position, data_point)
+        self.stats.add(data_point)
+
+    def _unindex_data_point(self, position: int, data_point: BaseDataPoint):
+        self.secondary_indexes.remove(position, data_point)
+        self.stats.remove(data_point)
+
+    def _unlink(self, position: int) -> BaseDataPoint:
+        # Clears the slot in place so no later position shifts; the caller deletes the record
+        data_point = self.data_points[position]
+        self._unindex_data_point(position, data_point)
+        del self.index[data_point.hash]
+        self.data_points[position] = None
+        self._tombstones += 1
+        self.references.clear(data_point.hash)
+        return data_point
+
+    def get_data_point(self, hash_value: str) -> BaseDataPoint:
+        if hash_value in self.index:
+            return self.data_points[self.index[hash_value]]
+        return None
+
+    def update_data_point(self, hash_value: str, new_data: Any, new_metadata: Dict[str, Any]) -> bool:
+        if hash_value not in self.index:
+            return False
+
+        index = self.index[hash_value]
+        data_point = self.data_points[index]
+        if self.references.references(hash_value) > 1:
+            # Shared content is copy-on-write: the other references keep the stored record
+            forked = self.point_class(new_data, {**data_point.metadata, **new_metadata}, data_point.quality_score,
+                                      self.digest_algorithm)
+            if not self.add_data_points([forked], timeout=None)[0]:
+                return False
+            self.references.add(hash_value, -1)
+            return True
+
+        self._unindex_data_point(index, data_point)
+        data_point.data = new_data
+        data_point.metadata.update(new_metadata)
+        data_point.timestamp = datetime.now()
+        data_point.hash = data_point._generate_hash()
+
+        self.index.pop(hash_value)
+        if data_point.hash != hash_value and data_point.hash in self.index:
+            # The new content is already stored: the update becomes one more reference to it
+            self.data_points[index] = None
+            self._tombstones += 1
+            self.references.add(data_point.hash, 1)
+            ops = [self._delete_op(hash_value)]
+        else:
+            self.index[data_point.hash] = index
+            self._index_data_point(index, data_point)
+            # The superseded record is deleted in the same batch instead of left behind
+            ops = [self._put_op(data_point)] + ([self._delete_op(hash_value)] if data_point.hash != hash_value else [])
+        self._write(ops, timeout=None)
+        self._maybe_compact()
+        self._record_mutation()
+        return True
+
+    def update_quality_score(self, hash_value: str, quality_score: float) -> bool:
+        # Re-scores a point in place; the score is not part of its content hash
+        if hash_value not in self.index:
+            return False
+        index = self.index[hash_value]
+        data_point = self.data_points[index]
+        self._unindex_data_point(index, data_point)
+        data_point.quality_score = quality_score
+        self._index_data_point(index, data_point)
+        self._write([self._put_op(data_point)], timeout=None)
+        self._record_mutation()
+        return True
+
+    def remove_data_point(self, hash_value: str) -> bool:
+        # Drops one reference; the record itself is deleted with the last one
+        if hash_value not in self.index:
+            return False
+        if self.references.references(hash_value) > 1:
+            self.references.add(hash_value, -1)
+        else:
+            self._unlink(self.index[hash_value])
+            self._remove_records([hash_value])
+            self._maybe_compact()
+        self._record_mutation()
+        return True
+
+    def release_data_point(self, hash_value: str) -> Optional[Tuple[BaseDataPoint, int, Any]]:
+        # Detaches a point so another storage can adopt it without re-encoding. Returns (point, references,
+        # record), where record is the path of its record file or the raw record bytes.
+        if hash_value not in self.index:
+            return None
+        self.flush_writes()  # The record must be on disk before it changes hands
+        references = self.references.references(hash_value)
+        record = self._detach_record(hash_value)
+        data_point = self._unlink(self.index[hash_value])
+        self._maybe_compact()
+        return data_point, references, record
+
+    def adopt_data_point(self, data_point: BaseDataPoint, references: int, record: Any):
+        # Takes over a point released by another storage: a record file is renamed into place and a raw
+        # record is stored as-is, so the payload is never re-serialised. The quality threshold is not applied.
+        if data_point.algorithm != self.digest_algorithm:
+            raise ValueError(f"Cannot adopt a {data_point.algorithm} point into a {self.digest_algorithm} storage")
+        self.flush_writes()
+        if data_point.hash in self.index:
+            self.references.add(data_point.hash, references)
+            if isinstance(record, str):
+                os.remove(record)
+            return
+        loader = self._attach_record(data_point.hash, record)
+        if data_point._data is UNLOADED:
+            data_point._data_loader = loader
+        self._insert(data_point)
+        self.references.add(data_point.hash, references - 1)
+        self._record_mutation()
+
+    # --- record engine (one file per point) ---
+
+    def _encode(self, data_point: BaseDataPoint, record_format: str) -> bytes:
+        return encode_record(data_point.hash, data_point.data, data_point.metadata, data_point.quality_score,
+                             data_point.timestamp, record_format, self.compression)
+
+    def _put_op(self, data_point: BaseDataPoint) -> WriteOp:
+        # A file keeps the format its name says until convert_directory rewrites it
+        file_path = self._file_path(data_point.hash)
+        record_format = "binary" if file_path.endswith(BINARY_SUFFIX) else "json"
+        return (OP_PUT, file_path, self._encode(data_point, record_format))
+
+    def _delete_op(self, hash_value: str) -> WriteOp:
+        return (OP_DELETE, self._file_path(hash_value), None)
+
+    def _write_batch(self, ops: List[WriteOp], fsync: bool):
+        write_files(ops, fsync)
+
+    def _detach_record(self, hash_value: str) -> Any:
+        return self._file_path(hash_value)
+
+    def _attach_record(self, hash_value: str, record: Any) -> Callable[[], Any]:
+        file_path = self._adopted_path(hash_value, record)
+        if isinstance(record, str):
+            os.replace(record, file_path)
+        else:
+            with open(file_path, 'wb') as f:
+                f.write(record)
+        return partial(read_record_payload, file_path)
+
+    def _load_records(self, max_workers: Optional[int]):
+        own_suffix = record_suffix(self.record_format)
+        paths = list_record_files(self.storage_path, RECORD_SUFFIXES)
+        for path, header in zip(paths, parallel_map(read_record_header, paths, max_workers)):
+            if header['hash'] in self.index:
+                continue  # Loaded already, or both copies of a record an interrupted convert_directory left behind
+            if not path.endswith(own_suffix):
+                self._record_paths[header['hash']] = path
+            self._load_header(header, partial(read_record_payload, path))
+
+    def _file_path(self, hash_value: str) -> str:
+        return self._record_paths.get(hash_value) or \
+            os.path.join(self.storage_path, hash_value + record_suffix(self.record_format))
+
+    def _adopted_path(self, hash_value: str, record: Any) -> str:
+        # Adopted records are not re-encoded, so they are named after their own format
+        if isinstance(record, str):
+            suffix = os.path.splitext(record)[1]
+        else:
+            suffix = BINARY_SUFFIX if is_binary_record(record) else JSON_SUFFIX
+        file_path = os.path.join(self.storage_path, hash_value + suffix)
+        if suffix != record_suffix(self.record_format):
+            self._record_paths[hash_value] = file_path
+        return file_path
+
+    # --- persistence ---
+
+    @instrumented("storage.persist")
+    def _write(self, ops: List[WriteOp], timeout: Optional[float]):
+        if not ops:
+            return
+        count("storage.ops_persisted", len(ops))
+        if self.writer is not None:
+            self.writer.submit(ops, timeout)
+        else:
+            self._write_batch(ops, False)
+
+    def _remove_records(self, hash_values: List[str]):
+        ops = [self._delete_op(hash_value) for hash_value in hash_values]
+        if self.writer is None:
+            self._write(ops, timeout=None)
+            return
+        # Queued behind any pending write of the same record, in chunks the queue can hold
+        for start in range(0, len(ops), self.writer.max_queue):
+            self._write(ops[start:start + self.writer.max_queue], timeout=None)
+
+    def start_group_commit(self, batch_size: int = 256, flush_interval: float = 0.05, fsync: bool = False,
+                           max_queue: int = 10_000) -> GroupCommitWriter:
+        # Moves persistence onto a background writer; fsync=True syncs once per batch
+        if self.writer is None:
+            self.writer = GroupCommitWriter(self._write_batch, batch_size, flush_interval, fsync, max_queue)
+        return self.writer
+
+    def flush_writes(self):
+        if self.writer is not None:
+            self.writer.flush()
+
+    def _load_header(self, header: Dict[str, Any], loader: Optional[Callable[[], Any]]) -> BaseDataPoint:
+        data_point = self.point_class.from_header(header, loader, self.digest_algorithm)
+        self._insert(data_point)
+        return data_point
+
+    @instrumented("storage.load")
+    def load_from_disk(self, max_workers: int = None):
+        # Records are read and parsed on a thread pool; only headers are kept and each data payload
+        # is read back the first time it is accessed
+        self.stats.reset()  # Recomputed from the points rather than trusted from the last flush
+        for data_point in self.data_points:
+            if data_point is not None:  # Points added before loading
+                self.stats.add(data_point)
+        self._load_records(max_workers)
+        self.flush_stats()
+
+    def compact(self):
+        self._compact_tombstones()
+
+    def _maybe_compact(self):
+        if self._tombstones and self._tombstones >= self.compaction_ratio * len(self.data_points):
+            self._compact_tombstones()
+
+    def _compact_tombstones(self):
+        # Drops tombstones and renumbers every index once, instead of once per removal
+        self.data_points = [dp for dp in self.data_points if dp is not None]
+        self.index = {dp.hash: i for i, dp in enumerate(self.data_points)}
+        self.secondary_indexes.rebuild(enumerate(self.data_points))
+        self._record_paths = {h: path for h, path in self._record_paths.items() if h in self.index}
+        self._tombstones = 0
+        self._generation += 1
+        if self.references.garbage_entries > len(self.index):
+            self.references.compact(self.index)
+
+    def close(self):
+        if self.writer is not None:
+            self.writer.close()
+            self.writer = None
+        self.flush_stats()
+        self.references.close()
+
+    def _record_mutation(self, count: int = 1):
+        self._mutations_since_flush += count
+        if self._mutations_since_flush >= self.stats_flush_interval:
+            self.flush_stats()
+
+    def flush_stats(self):
+        self.stats.save(self._stats_path())
+        self._mutations_since_flush = 0
+
+    def _stats_path(self) -> str:
+        return os.path.join(self.storage_path, "QUALITY_STATS")
+
+    # --- queries ---
+
+    def iter_data_points(self) -> Iterator[BaseDataPoint]:
+        # Streams live points without materialising a list
+        for data_point in self.data_points:
+            if data_point is not None:
+                yield data_point
+
+    def scan(self, cursor: Optional[str] = None, limit: int = 1000) -> Tuple[List[BaseDataPoint], Optional[str]]:
+        # One page of points plus the cursor for the next page (None once the scan is complete)
+        return scan_positions(self.data_points, cursor, limit, self._generation)
+
+    def _live_positions(self) -> List[Tuple[int, BaseDataPoint]]:
+        return [(i, dp) for i, dp in enumerate(self.data_points) if dp is not None]
+
+    def get_all_data_points(self) -> List[BaseDataPoint]:
+        return [dp for dp in self.data_points if dp is not None]
+
+    @instrumented("storage.search")
+    def search_by_metadata(self, query: Dict[str, Any], quality_range: Optional[Tuple[float, float]] = None,
+                           time_range: Optional[Tuple[datetime, datetime]] = None) -> List[BaseDataPoint]:
+        # Indexed keys and ranges narrow the candidates; anything left unindexed is checked on those only
+        ranges = {}
+        if quality_range is not None:
+            ranges['quality_score'] = quality_range
+        if time_range is not None:
+            ranges['timestamp'] = time_range
+        positions = self.secondary_indexes.candidates(query, ranges)
+        candidates = self.get_all_data_points() if positions is None else [self.data_points[i] for i in positions]
+        return [dp for dp in candidates if matches_query(dp, query, ranges)]
+
+    def create_metadata_index(self, key: str):
+        if key not in self.secondary_indexes.metadata_keys:
+            self.secondary_indexes.add_metadata_key(key, self._live_positions())
+
+    def create_range_index(self, field: str):
+        if field not in self.secondary_indexes.range_fields:
+            self.secondary_indexes.add_range_field(field, self._live_positions())
+
+    def get_data_point_count(self) -> int:
+        return len(self.index)
+
+    def get_storage_report(self) -> Dict[str, Any]:
+        # dedup_ratio is submitted references per stored record (1.0 means no duplicates)
+        unique = len(self.index)
+        references = unique + sum(n for h, n in self.references.extra.items() if h in self.index)
+        return {
+            'data_points': unique,
+            'references': references,
+            'dedup_ratio': references / unique if unique else 1.0,
+            'tombstones': self._tombstones,
+        }
+
+    def get_average_quality_score(self) -> float:
+        return self.stats.overall.average
+
+    def get_quality_stats(self, key: str = None, value: Any = None) -> Dict[str, float]:
+        # Count, average and p50/p90/p99 of quality_score, overall or for one value of a stats_keys entry
+        return self.stats.summary(key, value)
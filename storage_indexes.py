@@ -0,0 +1,143 @@
+import json
+from bisect import bisect_left, bisect_right, insort
+from datetime import datetime
+from typing import Dict, List, Any, Iterable, Optional, Set, Tuple
+
+RANGE_FIELDS = ("quality_score", "timestamp")
+
+def _hashable(value: Any) -> Any:
+    # Lists and dicts are indexed by their canonical JSON so they can live in a dict key
+    if isinstance(value, (list, dict)):
+        return json.dumps(value, sort_keys=True)
+    return value
+
+def _range_value(data_point: Any, field: str) -> float:
+    value = getattr(data_point, field)
+    return value.timestamp() if isinstance(value, datetime) else value
+
+def _range_bound(value: Any) -> Any:
+    return value.timestamp() if isinstance(value, datetime) else value
+
+def matches_query(data_point: Any, query: Dict[str, Any],
+                  ranges: Optional[Dict[str, Tuple[Any, Any]]] = None) -> bool:
+    # Exact check used on index candidates and for keys without an index; range bounds are inclusive
+    if not all(data_point.metadata.get(k) == v for k, v in query.items()):
+        return False
+    for field, (low, high) in (ranges or {}).items():
+        value = _range_value(data_point, field)
+        if (low is not None and value < _range_bound(low)) or (high is not None and value > _range_bound(high)):
+            return False
+    return True
+
+class SecondaryIndexes:
+    # Positions of data points by metadata value (inverted index) and by quality_score/timestamp (sorted)
+    def __init__(self, metadata_keys: Iterable[str] = (), range_fields: Iterable[str] = ()):
+        self.metadata_keys = list(metadata_keys)
+        for field in range_fields:
+            if field not in RANGE_FIELDS:
+                raise ValueError(f"Range indexes are supported on {RANGE_FIELDS}, not {field}")
+        self._postings: Dict[str, Dict[Any, Set[int]]] = {key: {} for key in self.metadata_keys}
+        self._ranges: Dict[str, List[Tuple[float, int]]] = {field: [] for field in range_fields}
+
+    @property
+    def range_fields(self) -> List[str]:
+        return list(self._ranges)
+
+    def add_metadata_key(self, key: str, data_points: Iterable[Tuple[int, Any]]):
+        self.metadata_keys.append(key)
+        self._postings[key] = {}
+        for position, data_point in data_points:
+            self._postings[key].setdefault(_hashable(data_point.metadata.get(key)), set()).add(position)
+
+    def add_range_field(self, field: str, data_points: Iterable[Tuple[int, Any]]):
+        if field not in RANGE_FIELDS:
+            raise ValueError(f"Range indexes are supported on {RANGE_FIELDS}, not {field}")
+        self._ranges[field] = sorted((_range_value(dp, field), position) for position, dp in data_points)
+
+    def add(self, position: int, data_point: Any):
+        for key, postings in self._postings.items():
+            postings.setdefault(_hashable(data_point.metadata.get(key)), set()).add(position)
+        for field, entries in self._ranges.items():
+            insort(entries, (_range_value(data_point, field), position))
+
+    def remove(self, position: int, data_point: Any):
+        # Must be called with the data point's values as they were when it was added
+        for key, postings in self._postings.items():
+            value = _hashable(data_point.metadata.get(key))
+            positions = postings.get(value)
+            if positions is not None:
+                positions.discard(position)
+                if not positions:
+                    del postings[value]
+        for field, entries in self._ranges.items():
+            entry = (_range_value(data_point, field), position)
+            i = bisect_left(entries, entry)
+            if i < len(entries) and entries[i] == entry:
+                del entries[i]
+
+    def rebuild(self, data_points: Iterable[Tuple[int, Any]]):
+        data_points = list(data_points)
+        self._postings = {key: {} for key in self.metadata_keys}
+        for position, data_point in data_points:
+            for key, postings in self._postings.items():
+                postings.setdefault(_hashable(data_point.metadata.get(key)), set()).add(position)
+        for field in self._ranges:
+            self._ranges[field] = sorted((_range_value(dp, field), position) for position, dp in data_points)
+
+    def candidates(self, query: Dict[str, Any],
+                   ranges: Optional[Dict[str, Tuple[Any, Any]]] = None) -> Optional[List[int]]:
+        # Sorted positions satisfying every indexed condition, or None when nothing in the query is indexed.
+        # Sets are intersected smallest first so the work is bounded by the most selective condition.
+        sets = []
+        for key, value in query.items():
+            if key in self._postings:
+                sets.append(self._postings[key].get(_hashable(value), set()))
+        for field, (low, high) in (ranges or {}).items():
+            if field in self._ranges:
+                entries = self._ranges[field]
+                start = 0 if low is None else bisect_left(entries, (_range_bound(low), -1))
+                end = len(entries) if high is None else bisect_right(entries, (_range_bound(high), float("inf")))
+                sets.append({position for _, position in entries[start:end]})
+        if not sets:
+            return None
+        sets.sort(key=len)
+        result = set(sets[0])
+        for other in sets[1:]:
+            if not result:
+                break
+            result &= other
+        return sorted(result)
+
+class ExpiryIndex:
+    # Positions bucketed by timestamp (one bucket per bucket_seconds, a day by default), so expiry only
+    # visits buckets that are entirely or partly past the cutoff
+    def __init__(self, bucket_seconds: int = 86400):
+        self.bucket_seconds = bucket_seconds
+        self._buckets: Dict[int, Set[int]] = {}
+
+    def _bucket(self, timestamp: datetime) -> int:
+        return int(timestamp.timestamp() // self.bucket_seconds)
+
+    def add(self, position: int, timestamp: datetime):
+        self._buckets.setdefault(self._bucket(timestamp), set()).add(position)
+
+    def remove(self, position: int, timestamp: datetime):
+        bucket = self._bucket(timestamp)
+        positions = self._buckets.get(bucket)
+        if positions is not None:
+            positions.discard(position)
+            if not positions:
+                del self._buckets[bucket]
+
+    def rebuild(self, data_points: Iterable[Tuple[int, Any]]):
+        self._buckets = {}
+        for position, data_point in data_points:
+            self.add(position, data_point.timestamp)
+
+    def candidates(self, cutoff: datetime) -> Tuple[List[int], List[int]]:
+        # (positions certainly at or before cutoff, positions in the boundary bucket that need checking)
+        cutoff_bucket = self._bucket(cutoff)
+        expired, boundary = [], []
+        for bucket in sorted(b for b in self._buckets if b <= cutoff_bucket):
+            (expired if bucket < cutoff_bucket else boundary).extend(self._buckets[bucket])
+        return expired, boundary
@@ -0,0 +1,44 @@
+import os
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from typing import Dict, List, Any, Callable, Iterable, Iterator, Optional, Tuple, Union
+
+UNLOADED = object()  # Placeholder for a data payload that has not been read yet
+
+def record_header(record: Dict[str, Any]) -> Dict[str, Any]:
+    # Everything a storage needs at startup; the (possibly large) data payload is left behind
+    return {
+        'hash': record['hash'],
+        'metadata': record['metadata'],
+        'quality_score': record['quality_score'],
+        'timestamp': datetime.fromisoformat(record['timestamp']),
+    }
+
+def list_record_files(directory: str, suffix: Union[str, Tuple[str, ...]] = '.json') -> List[str]:
+    with os.scandir(directory) as entries:
+        return [entry.path for entry in entries if entry.name.endswith(suffix) and entry.is_file()]
+
+def parallel_map(fn: Callable[[Any], Any], items: Iterable[Any], max_workers: Optional[int] = None,
+                 chunksize: int = 256) -> Iterator[Any]:
+    # Order-preserving map on a thread pool; file opens and reads overlap even though parsing holds the GIL
+    items = list(items)
+    if len(items) < chunksize:
+        yield from map(fn, items)
+        return
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        yield from executor.map(fn, items, chunksize=chunksize)
+
+def scan_positions(data_points: List[Any], cursor: Optional[str], limit: int,
+                   generation: int) -> Tuple[List[Any], Optional[str]]:
+    # Cursors are "<generation>:<position>"; positions are stable until a compaction bumps the generation
+    position = 0
+    if cursor is not None:
+        cursor_generation, position = (int(part) for part in cursor.split(':'))
+        if cursor_generation != generation:
+            raise ValueError("Cursor was invalidated by a compaction; restart the scan")
+    page = []
+    while position < len(data_points) and len(page) < limit:
+        if data_points[position] is not None:
+            page.append(data_points[position])
+        position += 1
+    return page, (f"{generation}:{position}" if position < len(data_points) else None)
@@ -0,0 +1,225 @@
+import argparse
+import json
+import os
+import struct
+import zlib
+from datetime import datetime, timedelta
+from typing import Dict, Any, Optional
+
+import numpy as np
+
+from data_digest import encode_value
+from storage_loader import list_record_files, parallel_map, record_header
+
+try:
+    import lz4.frame as lz4_frame
+except ImportError:  # lz4 is optional; zlib is always available
+    lz4_frame = None
+
+# Versioned binary record: fixed header, then the metadata block (compact JSON, never compressed so
+# headers can be read without touching the data), then the data block (data_digest's canonical encoding,
+# optionally compressed). The timestamp is microseconds since 1970-01-01 in the writer's wall-clock time,
+# matching the naive datetimes the storages use.
+RECORD_MAGIC = b"NDR"
+RECORD_VERSION = 1
+RECORD_HEADER = struct.Struct("<3sBB3x32sqdII")  # magic, version, flags, digest, timestamp, score, metadata and data lengths
+FLAG_ZLIB = 0x01
+FLAG_LZ4 = 0x02
+
+RECORD_FORMATS = ("json", "binary")
+COMPRESSIONS = (None, "zlib", "lz4")
+JSON_SUFFIX = ".json"
+BINARY_SUFFIX = ".rec"
+RECORD_SUFFIXES = (JSON_SUFFIX, BINARY_SUFFIX)
+MIN_COMPRESS_BYTES = 512  # Smaller data blocks are stored as-is; compressing them rarely pays
+
+_SCORE = struct.Struct("<d")
+_SCORE_OFFSET = struct.calcsize("<3sBB3x32sq")  # quality_score's position in RECORD_HEADER
+_LENGTH = struct.Struct("<Q")
+_EPOCH = datetime(1970, 1, 1)
+_MICROSECOND = timedelta(microseconds=1)
+
+def check_format(record_format: str, compression: Optional[str] = None):
+    if record_format not in RECORD_FORMATS:
+        raise ValueError(f"Unknown record format {record_format!r}, expected one of {RECORD_FORMATS}")
+    if compression not in COMPRESSIONS:
+        raise ValueError(f"Unknown compression {compression!r}, expected one of {COMPRESSIONS}")
+    if compression is not None and record_format != "binary":
+        raise ValueError("Compression requires record_format='binary'")
+    if compression == "lz4" and lz4_frame is None:
+        raise ValueError("lz4 compression requires the lz4 package")
+
+def record_suffix(record_format: str) -> str:
+    return BINARY_SUFFIX if record_format == "binary" else JSON_SUFFIX
+
+def is_binary_record(payload: bytes) -> bool:
+    return payload[:len(RECORD_MAGIC)] == RECORD_MAGIC
+
+def encode_record(hash_value: str, data: Any, metadata: Dict[str, Any], quality_score: float, timestamp: datetime,
+                  record_format: str = "json", compression: Optional[str] = None) -> bytes:
+    if record_format == "json":
+        return json.dumps({
+            'data': data,
+            'metadata': metadata,
+            'quality_score': quality_score,
+            'timestamp': timestamp.isoformat(),
+            'hash': hash_value
+        }).encode()
+    chunks = []
+    encode_value(data, chunks)
+    data_block = b"".join(chunks)
+    flags = 0
+    if compression is not None and len(data_block) >= MIN_COMPRESS_BYTES:
+        compressed = zlib.compress(data_block, 6) if compression == "zlib" else lz4_frame.compress(data_block)
+        if len(compressed) < len(data_block):
+            data_block = compressed
+            flags = FLAG_ZLIB if compression == "zlib" else FLAG_LZ4
+    metadata_block = json.dumps(metadata, separators=(",", ":")).encode()
+    header = RECORD_HEADER.pack(RECORD_MAGIC, RECORD_VERSION, flags, bytes.fromhex(hash_value),
+                                (timestamp - _EPOCH) // _MICROSECOND, quality_score,
+                                len(metadata_block), len(data_block))
+    return b"".join((header, metadata_block, data_block))
+
+def _unpack_header(payload: bytes):
+    magic, version, flags, digest, timestamp, quality_score, metadata_length, data_length = \
+        RECORD_HEADER.unpack_from(payload)
+    if version != RECORD_VERSION:
+        raise ValueError(f"Unsupported record version {version}")
+    return flags, digest, timestamp, quality_score, metadata_length, data_length
+
+def decode_header(payload: bytes) -> Dict[str, Any]:
+    # Same shape as storage_loader.record_header; a binary payload only needs its header and metadata block
+    if not is_binary_record(payload):
+        return record_header(json.loads(payload))
+    _, digest, timestamp, quality_score, metadata_length, _ = _unpack_header(payload)
+    return {
+        'hash': digest.hex(),
+        'metadata': json.loads(payload[RECORD_HEADER.size:RECORD_HEADER.size + metadata_length]),
+        'quality_score': quality_score,
+        'timestamp': _EPOCH + timestamp * _MICROSECOND,
+    }
+
+def _decode_value(block: bytes) -> Any:
+    # Inverse of data_digest.encode_value for a single value
+    tag = block[:1]
+    length, = _LENGTH.unpack_from(block, 1)
+    raw = block[1 + _LENGTH.size:1 + _LENGTH.size + length]
+    if tag == b"S":
+        return raw.decode("utf-8", "surrogatepass")
+    if tag == b"B":
+        return bytes(raw)
+    if tag == b"J":
+        return json.loads(raw)
+    if tag == b"A":
+        dtype, _, shape = raw.decode().partition("(")
+        shape = tuple(int(n) for n in shape.rstrip(")").split(",") if n.strip())
+        data_start = 1 + 2 * _LENGTH.size + length
+        return np.frombuffer(block[data_start:], dtype=dtype).reshape(shape).copy()
+    raise ValueError(f"Unknown value tag {tag!r}")
+
+def decode_payload(payload: bytes) -> Any:
+    if not is_binary_record(payload):
+        return json.loads(payload)['data']
+    flags, _, _, _, metadata_length, data_length = _unpack_header(payload)
+    start = RECORD_HEADER.size + metadata_length
+    block = payload[start:start + data_length]
+    if flags & FLAG_ZLIB:
+        block = zlib.decompress(block)
+    elif flags & FLAG_LZ4:
+        if lz4_frame is None:
+            raise ValueError("Record is lz4-compressed but the lz4 package is not installed")
+        block = lz4_frame.decompress(block)
+    return _decode_value(block)
+
+def decode_record(payload: bytes) -> Dict[str, Any]:
+    record = decode_header(payload)
+    record['data'] = decode_payload(payload)
+    return record
+
+def convert_record(payload: bytes, record_format: str, compression: Optional[str] = None) -> bytes:
+    record = decode_record(payload)
+    return encode_record(record['hash'], record['data'], record['metadata'], record['quality_score'],
+                         record['timestamp'], record_format, compression)
+
+def rescore_record(payload: bytes, quality_score: float) -> bytes:
+    # Replaces only the stored score: the binary header field is patched, and in a JSON record (written with
+    # encode_record's fixed key order) just the top-level quality_score value is spliced, so neither the data
+    # nor the metadata is re-encoded
+    if is_binary_record(payload):
+        _unpack_header(payload)
+        record = bytearray(payload)
+        _SCORE.pack_into(record, _SCORE_OFFSET, quality_score)
+        return bytes(record)
+    start = payload.rfind(b', "quality_score": ')
+    end = payload.find(b', "timestamp": ', start)
+    if start < 0 or end < 0:
+        record = json.loads(payload)
+        record['quality_score'] = quality_score
+        return json.dumps(record).encode()
+    return payload[:start + len(b', "quality_score": ')] + json.dumps(quality_score).encode() + payload[end:]
+
+def rescore_record_file(path: str, quality_score: float):
+    with open(path, 'r+b') as f:
+        head = f.read(RECORD_HEADER.size)
+        if is_binary_record(head):
+            _unpack_header(head)
+            f.seek(_SCORE_OFFSET)
+            f.write(_SCORE.pack(quality_score))
+            return
+        payload = head + f.read()
+    tmp_path = path + ".tmp"
+    with open(tmp_path, 'wb') as f:
+        f.write(rescore_record(payload, quality_score))
+    os.replace(tmp_path, path)
+
+def read_record_header(path: str) -> Dict[str, Any]:
+    # Binary files are read only as far as the end of their metadata block
+    with open(path, 'rb') as f:
+        head = f.read(RECORD_HEADER.size)
+        if is_binary_record(head):
+            _, _, _, _, metadata_length, _ = _unpack_header(head)
+            return decode_header(head + f.read(metadata_length))
+        return decode_header(head + f.read())
+
+def read_record_payload(path: str) -> Any:
+    with open(path, 'rb') as f:
+        return decode_payload(f.read())
+
+def convert_directory(directory: str, record_format: str, compression: Optional[str] = None,
+                      max_workers: Optional[int] = None) -> int:
+    # Rewrites every record file of a one-file-per-point storage; run it while no storage has the directory open.
+    # Each file is replaced atomically, so an interrupted run leaves a readable mix of both formats.
+    check_format(record_format, compression)
+    suffix = record_suffix(record_format)
+
+    def convert(path: str) -> bool:
+        with open(path, 'rb') as f:
+            payload = f.read()
+        if is_binary_record(payload) == (record_format == "binary") and path.endswith(suffix) and compression is None:
+            return False
+        try:
+            converted = convert_record(payload, record_format, compression)
+        except TypeError:
+            return False  # Data JSON cannot represent (bytes, arrays) stays binary
+        target = os.path.splitext(path)[0] + suffix
+        tmp_path = target + ".tmp"
+        with open(tmp_path, 'wb') as f:
+            f.write(converted)
+        os.replace(tmp_path, target)
+        if target != path:
+            os.remove(path)
+        return True
+
+    paths = list_record_files(directory, RECORD_SUFFIXES)
+    return sum(parallel_map(convert, paths, max_workers))
+
+# Converter tool: python storage_records.py <storage directory> --to binary --compression zlib
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Convert a data point storage directory between record formats")
+    parser.add_argument("directory")
+    parser.add_argument("--to", choices=RECORD_FORMATS, default="binary")
+    parser.add_argument("--compression", choices=[c for c in COMPRESSIONS if c], default=None)
+    parser.add_argument("--workers", type=int, default=None)
+    args = parser.parse_args()
+    converted = convert_directory(args.directory, args.to, args.compression, args.workers)
+    print(f"Converted {converted} records in {args.directory} to {args.to}")
@@ -0,0 +1,70 @@
+import os
+import struct
+from typing import Dict, Iterable
+
+# Append-only journal of reference-count deltas: 32-byte content digest + signed delta per entry.
+# A stored record implies one reference; the journal only tracks the extra ones added by duplicate writes.
+REF_ENTRY = struct.Struct("<32si")
+
+class ReferenceLog:
+    def __init__(self, path: str):
+        self.path = path
+        self.extra: Dict[str, int] = {}  # hash -> references beyond the first, only for shared content
+        self._entries = 0
+        if os.path.exists(path):
+            with open(path, "rb") as f:
+                data = f.read()
+            usable = len(data) - len(data) % REF_ENTRY.size  # A torn trailing entry is ignored
+            for digest, delta in REF_ENTRY.iter_unpack(data[:usable]):
+                self._apply(digest.hex(), delta)
+                self._entries += 1
+        self._file = None
+
+    def references(self, hash_value: str) -> int:
+        return 1 + self.extra.get(hash_value, 0)
+
+    def add(self, hash_value: str, delta: int):
+        if delta:
+            self._apply(hash_value, delta)
+            self._append(hash_value, delta)
+
+    def clear(self, hash_value: str):
+        # The record is gone: forget its extra references so re-adding the content starts from one
+        self.add(hash_value, -self.extra.get(hash_value, 0))
+
+    def compact(self, live_hashes: Iterable[str]):
+        # Rewrites the journal with one net entry per live shared hash
+        live = set(live_hashes)
+        self.extra = {h: n for h, n in self.extra.items() if h in live}
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, "wb") as f:
+            for hash_value, extra in self.extra.items():
+                f.write(REF_ENTRY.pack(bytes.fromhex(hash_value), extra))
+        os.replace(tmp_path, self.path)
+        self._entries = len(self.extra)
+
+    @property
+    def garbage_entries(self) -> int:
+        return self._entries - len(self.extra)
+
+    def close(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    def _apply(self, hash_value: str, delta: int):
+        extra = self.extra.get(hash_value, 0) + delta
+        if extra > 0:
+            self.extra[hash_value] = extra
+        else:
+            self.extra.pop(hash_value, None)
+
+    def _append(self, hash_value: str, delta: int):
+        if self._file is None:
+            self._file = open(self.path, "ab")
+        self._file.write(REF_ENTRY.pack(bytes.fromhex(hash_value), delta))
+        self._file.flush()
+        self._entries += 1
@@ -0,0 +1,264 @@
+import os
+import struct
+import threading
+import zlib
+from typing import Dict, List, Iterator, Optional, Tuple
+import numpy as np
+
+from storage_writer import OP_PUT
+
+# Record: header (magic, kind, key, payload length, crc32 of key + payload) followed by the payload.
+# Tombstones carry no payload and mark the key as deleted for anything written before them.
+RECORD_MAGIC = b"NREC"
+RECORD_HEADER = struct.Struct("<4sB3x32sII")
+KIND_PUT = 1
+KIND_TOMBSTONE = 2
+
+# On-disk index: header (magic, covered segment, covered offset, entry count) + fixed-size entries.
+# Records past the covered position are replayed on open; nothing before it is scanned.
+INDEX_MAGIC = b"NIDX0001"
+INDEX_HEADER = struct.Struct("<8sIQQ")
+INDEX_ENTRY = np.dtype([("key", "V32"), ("segment", "<u4"), ("offset", "<u8"), ("length", "<u4")])
+
+class SegmentRecordLog:
+    # Append-only key -> payload store over large segment files with an in-memory hash index
+    def __init__(self, directory: str, segment_size: int = 256 * 1024 * 1024, fsync: bool = False):
+        self.directory = directory
+        self.segment_size = segment_size
+        self.fsync = fsync
+        os.makedirs(directory, exist_ok=True)
+
+        self._lock = threading.RLock()
+        self._index: Dict[bytes, Tuple[int, int, int]] = {}  # key -> (segment, payload offset, length)
+        self._live_bytes: Dict[int, int] = {}
+        self._readers: Dict[int, int] = {}  # segment -> read-only fd
+        self._compactor: Optional[threading.Thread] = None
+        self._stop_compaction = threading.Event()
+        self._open()
+
+    # --- key/value API ---
+
+    def put(self, key: bytes, payload: bytes):
+        with self._lock:
+            self._put(key, payload)
+
+    def delete(self, key: bytes) -> bool:
+        with self._lock:
+            if key not in self._index:
+                return False
+            self._append(KIND_TOMBSTONE, key, b"")
+            self._drop(key)
+            return True
+
+    def write_batch(self, ops: List[Tuple[int, bytes, Optional[bytes]]], fsync: bool = False):
+        # Group commit: every put/delete in ops is appended, then the segment is flushed (and synced) once
+        with self._lock:
+            for op, key, payload in ops:
+                if op == OP_PUT:
+                    self._put(key, payload, flush=False)
+                elif key in self._index:
+                    self._append(KIND_TOMBSTONE, key, b"", flush=False)
+                    self._drop(key)
+            self._writer.flush()
+            if fsync or self.fsync:
+                os.fsync(self._writer.fileno())
+
+    def get(self, key: bytes) -> Optional[bytes]:
+        with self._lock:
+            location = self._index.get(key)
+            if location is None:
+                return None
+            segment, offset, length = location
+            return os.pread(self._reader(segment), length, offset)
+
+    def __contains__(self, key: bytes) -> bool:
+        return key in self._index
+
+    def __len__(self) -> int:
+        return len(self._index)
+
+    def keys(self) -> List[bytes]:
+        # In (segment, offset) order so reading them back walks the disk sequentially
+        with self._lock:
+            return [key for key, _ in sorted(self._index.items(), key=lambda item: item[1][:2])]
+
+    def items(self) -> Iterator[Tuple[bytes, bytes]]:
+        # Keys deleted or moved by a concurrent compaction are re-resolved through get()
+        for key in self.keys():
+            payload = self.get(key)
+            if payload is not None:
+                yield key, payload
+
+    # --- durability ---
+
+    def checkpoint(self):
+        # Persists the index so the next open only replays records appended after this point
+        with self._lock:
+            self._writer.flush()
+            os.fsync(self._writer.fileno())
+            entries = np.empty(len(self._index), dtype=INDEX_ENTRY)
+            for i, (key, (segment, offset, length)) in enumerate(self._index.items()):
+                entries[i] = (key, segment, offset, length)
+            tmp_path = self._index_path() + ".tmp"
+            with open(tmp_path, "wb") as f:
+                f.write(INDEX_HEADER.pack(INDEX_MAGIC, self._segment, self._offset, len(entries)))
+                entries.tofile(f)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp_path, self._index_path())
+
+    def close(self):
+        self.stop_background_compaction()
+        with self._lock:
+            if self._writer.closed:
+                return
+            self.checkpoint()
+            self._writer.close()
+            for fd in self._readers.values():
+                os.close(fd)
+            self._readers.clear()
+
+    # --- compaction ---
+
+    def garbage_ratio(self, segment: int) -> float:
+        size = os.path.getsize(self._segment_path(segment))
+        return 1 - self._live_bytes.get(segment, 0) / size if size else 0.0
+
+    def compact(self, min_garbage_ratio: float = 0.5) -> int:
+        # Rewrites live records of mostly-dead sealed segments into the active one, then deletes them
+        with self._lock:
+            segments = self._segments()
+            compacted = []
+            for segment in segments:
+                if segment == self._segment or self.garbage_ratio(segment) < min_garbage_ratio:
+                    continue
+                keep_tombstones = segment != segments[0]  # Older segments may still hold the deleted puts
+                for kind, key, offset, length, _ in self._scan(segment, 0):
+                    if kind == KIND_PUT and self._index.get(key) == (segment, offset, length):
+                        self._put(key, os.pread(self._reader(segment), length, offset), flush=False)
+                    elif kind == KIND_TOMBSTONE and keep_tombstones and key not in self._index:
+                        self._append(KIND_TOMBSTONE, key, b"", flush=False)
+                compacted.append(segment)
+            if not compacted:
+                return 0
+            self.checkpoint()  # The copies are synced and indexed before any source segment goes
+            for segment in compacted:
+                fd = self._readers.pop(segment, None)  # No reader if nothing was read from it since open
+                if fd is not None:
+                    os.close(fd)
+                self._live_bytes.pop(segment, None)
+                os.remove(self._segment_path(segment))
+        return len(compacted)
+
+    def start_background_compaction(self, interval: float = 60.0, min_garbage_ratio: float = 0.5):
+        if self._compactor is not None:
+            return
+        self._stop_compaction.clear()
+
+        def run():
+            while not self._stop_compaction.wait(interval):
+                self.compact(min_garbage_ratio)
+
+        self._compactor = threading.Thread(target=run, name="segment-compactor", daemon=True)
+        self._compactor.start()
+
+    def stop_background_compaction(self):
+        if self._compactor is not None:
+            self._stop_compaction.set()
+            self._compactor.join()
+            self._compactor = None
+
+    # --- internals ---
+
+    def _open(self):
+        segments = self._segments()
+        covered_segment, covered_offset = (segments[0] if segments else 0), 0
+        if os.path.exists(self._index_path()):
+            with open(self._index_path(), "rb") as f:
+                magic, covered_segment, covered_offset, count = INDEX_HEADER.unpack(f.read(INDEX_HEADER.size))
+                if magic != INDEX_MAGIC:
+                    raise ValueError(f"{self._index_path()} is not a segment index")
+                entries = np.fromfile(f, dtype=INDEX_ENTRY, count=count)
+            for key, segment, offset, length in entries.tolist():
+                self._index[key] = (segment, offset, length)
+                self._live_bytes[segment] = self._live_bytes.get(segment, 0) + RECORD_HEADER.size + length
+
+        self._segment, self._offset = covered_segment, covered_offset
+        for segment in [s for s in segments if s >= covered_segment]:
+            start = covered_offset if segment == covered_segment else 0
+            end = start
+            for kind, key, offset, length, end in self._scan(segment, start):
+                if kind == KIND_PUT:
+                    self._drop(key)
+                    self._index[key] = (segment, offset, length)
+                    self._live_bytes[segment] = self._live_bytes.get(segment, 0) + RECORD_HEADER.size + length
+                else:
+                    self._drop(key)
+            self._segment, self._offset = segment, end
+            if end < os.path.getsize(self._segment_path(segment)):
+                with open(self._segment_path(segment), "r+b") as f:
+                    f.truncate(end)  # Torn tail from an interrupted append
+        self._writer = open(self._segment_path(self._segment), "ab")
+
+    def _scan(self, segment: int, offset: int) -> Iterator[Tuple[int, bytes, int, int, int]]:
+        # Yields (kind, key, payload offset, payload length, record end) for every intact record
+        with open(self._segment_path(segment), "rb") as f:
+            f.seek(offset)
+            while True:
+                header = f.read(RECORD_HEADER.size)
+                if len(header) < RECORD_HEADER.size:
+                    return
+                magic, kind, key, length, crc = RECORD_HEADER.unpack(header)
+                payload = f.read(length)
+                if magic != RECORD_MAGIC or len(payload) < length or zlib.crc32(key + payload) != crc:
+                    return
+                payload_offset = offset + RECORD_HEADER.size
+                offset = payload_offset + length
+                yield kind, key, payload_offset, length, offset
+
+    def _append(self, kind: int, key: bytes, payload: bytes, flush: bool = True) -> Tuple[int, int]:
+        if self._offset and self._offset + RECORD_HEADER.size + len(payload) > self.segment_size:
+            self._writer.flush()
+            os.fsync(self._writer.fileno())  # A sealed segment may be the only copy of records compaction moved
+            self._writer.close()
+            self._segment += 1
+            self._offset = 0
+            self._writer = open(self._segment_path(self._segment), "ab")
+        self._writer.write(RECORD_HEADER.pack(RECORD_MAGIC, kind, key, len(payload), zlib.crc32(key + payload)))
+        self._writer.write(payload)
+        if flush:
+            self._writer.flush()
+            if self.fsync:
+                os.fsync(self._writer.fileno())
+        payload_offset = self._offset + RECORD_HEADER.size
+        self._offset = payload_offset + len(payload)
+        return self._segment, payload_offset
+
+    def _put(self, key: bytes, payload: bytes, flush: bool = True):
+        segment, offset = self._append(KIND_PUT, key, payload, flush)
+        self._drop(key)
+        self._index[key] = (segment, offset, len(payload))
+        self._live_bytes[segment] = self._live_bytes.get(segment, 0) + RECORD_HEADER.size + len(payload)
+
+    def _drop(self, key: bytes):
+        location = self._index.pop(key, None)
+        if location is not None:
+            segment, _, length = location
+            self._live_bytes[segment] -= RECORD_HEADER.size + length
+
+    def _reader(self, segment: int) -> int:
+        if segment not in self._readers:
+            self._readers[segment] = os.open(self._segment_path(segment), os.O_RDONLY)
+        return self._readers[segment]
+
+    def _segments(self) -> List[int]:
+        return sorted(
+            int(name[len("segment_"):-len(".dat")]) for name in os.listdir(self.directory)
+            if name.startswith("segment_") and name.endswith(".dat")
+        )
+
+    def _segment_path(self, segment: int) -> str:
+        return os.path.join(self.directory, f"segment_{segment:08d}.dat")
+
+    def _index_path(self) -> str:
+        return os.path.join(self.directory, "SEGMENT_INDEX")
@@ -0,0 +1,142 @@
+import json
+import os
+from typing import Dict, List, Any, Iterable, Optional
+import numpy as np
+
+class QualitySketch:
+    # Fixed-bin histogram over [0, 1]: supports removals, merges by addition, quantile error <= 1 / (2 * bins)
+    def __init__(self, bins: int = 1000):
+        self.bins = bins
+        self.counts = np.zeros(bins, dtype=np.int64)
+
+    def _bin(self, value: float) -> int:
+        return min(max(int(value * self.bins), 0), self.bins - 1)
+
+    def add(self, value: float):
+        self.counts[self._bin(value)] += 1
+
+    def remove(self, value: float):
+        self.counts[self._bin(value)] -= 1
+
+    def merge(self, other: "QualitySketch") -> "QualitySketch":
+        if other.bins != self.bins:
+            raise ValueError(f"Cannot merge sketches with {self.bins} and {other.bins} bins")
+        merged = QualitySketch(self.bins)
+        merged.counts = self.counts + other.counts
+        return merged
+
+    def quantile(self, q: float) -> float:
+        total = int(self.counts.sum())
+        if not total:
+            return 0.0
+        cumulative = np.cumsum(self.counts)
+        bin_index = int(np.searchsorted(cumulative, q * total, side="left"))
+        return (min(bin_index, self.bins - 1) + 0.5) / self.bins
+
+class QualityAggregate:
+    def __init__(self, bins: int = 1000):
+        self.count = 0
+        self.total = 0.0
+        self.sketch = QualitySketch(bins)
+
+    def add(self, quality_score: float):
+        self.count += 1
+        self.total += quality_score
+        self.sketch.add(quality_score)
+
+    def remove(self, quality_score: float):
+        self.count -= 1
+        self.total -= quality_score
+        self.sketch.remove(quality_score)
+
+    @property
+    def average(self) -> float:
+        return self.total / self.count if self.count else 0.0
+
+    def to_dict(self) -> Dict[str, Any]:
+        nonzero = np.flatnonzero(self.sketch.counts)
+        return {"count": self.count, "total": self.total,
+                "bins": {str(i): int(self.sketch.counts[i]) for i in nonzero}}
+
+    @classmethod
+    def from_dict(cls, state: Dict[str, Any], bins: int) -> "QualityAggregate":
+        aggregate = cls(bins)
+        aggregate.count = state["count"]
+        aggregate.total = state["total"]
+        for i, count in state["bins"].items():
+            aggregate.sketch.counts[int(i)] = count
+        return aggregate
+
+class StorageStats:
+    # Running quality_score aggregates, overall and per value of selected metadata keys
+    def __init__(self, breakdown_keys: Iterable[str] = (), bins: int = 1000):
+        self.breakdown_keys = list(breakdown_keys)
+        self.bins = bins
+        self.overall = QualityAggregate(bins)
+        self.by_key: Dict[str, Dict[str, QualityAggregate]] = {key: {} for key in self.breakdown_keys}
+
+    def _breakdowns(self, data_point: Any) -> List[QualityAggregate]:
+        # Metadata values are keyed by their JSON form so the breakdown survives a save/load round trip
+        aggregates = []
+        for key in self.breakdown_keys:
+            value = json.dumps(data_point.metadata.get(key), sort_keys=True)
+            aggregates.append(self.by_key[key].setdefault(value, QualityAggregate(self.bins)))
+        return aggregates
+
+    def add(self, data_point: Any):
+        self.overall.add(data_point.quality_score)
+        for aggregate in self._breakdowns(data_point):
+            aggregate.add(data_point.quality_score)
+
+    def remove(self, data_point: Any):
+        self.overall.remove(data_point.quality_score)
+        for aggregate in self._breakdowns(data_point):
+            aggregate.remove(data_point.quality_score)
+
+    def reset(self):
+        self.overall = QualityAggregate(self.bins)
+        self.by_key = {key: {} for key in self.breakdown_keys}
+
+    def aggregate(self, key: Optional[str] = None, value: Any = None) -> QualityAggregate:
+        if key is None:
+            return self.overall
+        if key not in self.by_key:
+            raise ValueError(f"No statistics breakdown for metadata key {key}")
+        return self.by_key[key].get(json.dumps(value, sort_keys=True), QualityAggregate(self.bins))
+
+    def summary(self, key: Optional[str] = None, value: Any = None) -> Dict[str, float]:
+        aggregate = self.aggregate(key, value)
+        return {
+            "count": aggregate.count,
+            "average": aggregate.average,
+            "p50": aggregate.sketch.quantile(0.5),
+            "p90": aggregate.sketch.quantile(0.9),
+            "p99": aggregate.sketch.quantile(0.99),
+        }
+
+    def save(self, path: str):
+        state = {
+            "bins": self.bins,
+            "breakdown_keys": self.breakdown_keys,
+            "overall": self.overall.to_dict(),
+            "by_key": {key: {value: aggregate.to_dict() for value, aggregate in values.items()}
+                       for key, values in self.by_key.items()},
+        }
+        tmp_path = path + ".tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(state, f)
+        os.replace(tmp_path, path)
+
+    def load(self, path: str) -> bool:
+        # Returns False when the file is missing or was written with a different configuration
+        if not os.path.exists(path):
+            return False
+        with open(path) as f:
+            state = json.load(f)
+        if state["bins"] != self.bins or state["breakdown_keys"] != self.breakdown_keys:
+            return False
+        self.overall = QualityAggregate.from_dict(state["overall"], self.bins)
+        self.by_key = {key: {value: QualityAggregate.from_dict(aggregate, self.bins)
+                             for value, aggregate in values.items()}
+                       for key, values in state["by_key"].items()}
+        return True
@@ -0,0 +1,153 @@
+import os
+import threading
+import time
+from collections import deque
+from typing import List, Any, Callable, Optional, Tuple
+
+from instrumentation import count, span
+from storage_loader import parallel_map
+
+OP_PUT = 0
+OP_DELETE = 1
+
+WriteOp = Tuple[int, Any, Optional[bytes]]  # (op, key, payload); keys are file paths or segment record keys
+
+class WriteBackpressureError(RuntimeError):
+    # Raised instead of queueing when the writer is already holding max_queue pending operations
+    pass
+
+def _remove_file(path: str):
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
+
+def write_files(ops: List[WriteOp], fsync: bool = False):
+    # Group commit for one-file-per-record storage: write everything, then sync files and directories once
+    written = {}  # Insertion-ordered set; a file deleted later in the same batch needs no sync
+    if all(op == OP_DELETE for op, _, _ in ops):
+        # Pure deletions (e.g. expiry) have no ordering constraints, so large batches unlink on a thread pool
+        for _ in parallel_map(_remove_file, [path for _, path, _ in ops]):
+            pass
+    else:
+        for op, path, payload in ops:
+            if op == OP_PUT:
+                with open(path, 'wb') as f:
+                    f.write(payload)
+                written[path] = None
+            else:
+                written.pop(path, None)
+                _remove_file(path)
+    if fsync:
+        for path in written:
+            fd = os.open(path, os.O_RDONLY)
+            try:
+                os.fsync(fd)
+            finally:
+                os.close(fd)
+        for directory in {os.path.dirname(op[1]) or '.' for op in ops}:
+            fd = os.open(directory, os.O_RDONLY)
+            try:
+                os.fsync(fd)
+            finally:
+                os.close(fd)
+
+class GroupCommitWriter:
+    # Background thread that drains queued writes in batches of up to batch_size, at least every flush_interval
+    def __init__(self, write_batch: Callable[[List[WriteOp], bool], None], batch_size: int = 256,
+                 flush_interval: float = 0.05, fsync: bool = False, max_queue: int = 10_000):
+        self.write_batch = write_batch
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.fsync = fsync
+        self.max_queue = max_queue
+
+        self.batches_written = 0
+        self.ops_written = 0
+        self.error: Optional[BaseException] = None
+        self._pending: deque = deque()
+        self._in_flight = 0
+        self._flush_waiters = 0
+        self._closed = False
+        self._condition = threading.Condition()
+        self._thread = threading.Thread(target=self._run, name="group-commit-writer", daemon=True)
+        self._thread.start()
+
+    def submit(self, ops: List[WriteOp], timeout: Optional[float] = 0.0):
+        # All-or-nothing: waits up to timeout (None = forever) for room, then raises WriteBackpressureError
+        if len(ops) > self.max_queue:
+            raise ValueError(f"Batch of {len(ops)} operations exceeds the write queue size {self.max_queue}")
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._condition:
+            self._raise_error()
+            while len(self._pending) + len(ops) > self.max_queue:
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    raise WriteBackpressureError(
+                        f"Write queue is full ({len(self._pending)}/{self.max_queue} operations pending)")
+                self._condition.wait(remaining)
+                self._raise_error()
+            self._pending.extend(ops)
+            if len(self._pending) >= self.batch_size:
+                self._condition.notify_all()
+
+    @property
+    def pending(self) -> int:
+        return len(self._pending) + self._in_flight
+
+    def flush(self):
+        # Blocks until everything submitted so far has been written
+        with self._condition:
+            self._flush_waiters += 1
+            self._condition.notify_all()
+            try:
+                while (self._pending or self._in_flight) and self.error is None:
+                    self._condition.wait()
+            finally:
+                self._flush_waiters -= 1
+            self._raise_error()
+
+    def close(self):
+        with self._condition:
+            self._closed = True
+            self._condition.notify_all()
+        self._thread.join()
+        self._raise_error()
+
+    def _raise_error(self):
+        if self.error is not None:
+            raise RuntimeError("Background write failed; queued writes were not persisted") from self.error
+
+    def _run(self):
+        while True:
+            with self._condition:
+                if not self._pending and not self._closed:
+                    self._condition.wait(self.flush_interval)
+                if len(self._pending) < self.batch_size and not self._closed and not self._flush_waiters:
+                    # Give a partial batch until the flush interval to fill up
+                    self._condition.wait_for(
+                        lambda: len(self._pending) >= self.batch_size or self._closed or self._flush_waiters,
+                        self.flush_interval)
+                if not self._pending:
+                    if self._closed:
+                        return
+                    continue
+                batch = [self._pending.popleft() for _ in range(min(self.batch_size, len(self._pending)))]
+                self._in_flight = len(batch)
+                self._condition.notify_all()  # Wake producers waiting for room
+            try:
+                with span("storage.group_commit"):
+                    self.write_batch(batch, self.fsync)
+                count("storage.group_commit_ops", len(batch))
+            except BaseException as e:
+                with self._condition:
+                    self.error = e
+                    self._in_flight = 0
+                    self._pending.clear()
+                    self._condition.notify_all()
+                return
+            with self._condition:
+                self.batches_written += 1
+                self.ops_written += len(batch)
+                self._in_flight = 0
+                self._condition.notify_all()
@@ -0,0 +1,86 @@
+import asyncio
+
+import numpy as np
+
+from async_rounds import AsyncRoundScheduler
+from neuronet_core import NeuroNet
+
+def make_neuronet(n_clients: int = 4) -> NeuroNet:
+    neuronet = NeuroNet(learning_rate=1e-6)
+    rng = np.random.default_rng(0)
+    for i in range(n_clients):
+        neuronet.register_client(f"client_{i}")
+        neuronet.receive_client_batch(f"client_{i}", rng.standard_normal((20, 100)), rng.integers(0, 2, 20))
+    return neuronet
+
+def test_failing_client_does_not_wedge_scheduler():
+    def latency(client_id):
+        if client_id == "client_0":
+            raise RuntimeError("client crashed")
+        return 0.0
+
+    scheduler = AsyncRoundScheduler(make_neuronet(), deadline=0.5, min_quorum=2, latency_fn=latency, seed=0)
+
+    async def main():
+        await scheduler.run(3)
+        await scheduler.drain()
+
+    asyncio.run(main())
+    assert [r.finalized for r in scheduler.records] == [True, True, True]
+    assert [r.failed for r in scheduler.records] == [1, 1, 1]
+    assert scheduler.metrics()["failed_updates"] == 3
+    assert scheduler.metrics()["clients_in_flight"] == 0
+    assert not scheduler.neuronet.model.round_in_progress
+
+def test_interrupted_round_is_discarded():
+    neuronet = make_neuronet()
+    scheduler = AsyncRoundScheduler(neuronet, deadline=10.0, min_quorum=4, latency_fn=lambda c: 5.0, seed=0)
+
+    async def main():
+        try:
+            await asyncio.wait_for(scheduler.run_round(), timeout=0.05)
+        except asyncio.TimeoutError:
+            pass
+        assert not neuronet.model.round_in_progress
+        for task in list(scheduler._busy.values()):
+            task.cancel()
+        await scheduler.drain()
+
+    asyncio.run(main())
+    assert scheduler.metrics()["clients_in_flight"] == 0
+
+def test_late_updates_of_discarded_round_are_dropped():
+    neuronet = make_neuronet()
+    initial = {layer: w.copy() for layer, w in neuronet.model.global_weights.items()}
+    scheduler = AsyncRoundScheduler(neuronet, deadline=10.0, min_quorum=4, latency_fn=lambda c: 0.1, seed=0)
+
+    async def main():
+        try:
+            await asyncio.wait_for(scheduler.run_round(), timeout=0.02)
+        except asyncio.TimeoutError:
+            pass
+        await scheduler.drain()
+
+    asyncio.run(main())
+    metrics = scheduler.metrics()
+    assert metrics["discarded_round_updates_dropped"] == 4
+    assert metrics["late_updates_merged"] == 0
+    for layer, w in neuronet.model.global_weights.items():
+        np.testing.assert_array_equal(w, initial[layer])
+
+def test_late_merge_keeps_model_dtype():
+    neuronet = NeuroNet(learning_rate=1e-6, dtype=np.float32)
+    rng = np.random.default_rng(0)
+    for i in range(3):
+        neuronet.register_client(f"client_{i}")
+        neuronet.receive_client_batch(f"client_{i}", rng.standard_normal((20, 100)), rng.integers(0, 2, 20))
+    latency = lambda client_id: 0.2 if client_id == "client_2" else 0.0
+    scheduler = AsyncRoundScheduler(neuronet, deadline=0.05, min_quorum=2, latency_fn=latency, seed=0)
+
+    async def main():
+        await scheduler.run_round()
+        await scheduler.drain()
+
+    asyncio.run(main())
+    assert scheduler.metrics()["late_updates_merged"] == 1
+    assert all(w.dtype == np.float32 for w in neuronet.model.global_weights.values())
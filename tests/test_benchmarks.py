@@ -0,0 +1,48 @@
+import json
+
+import pytest
+
+import benchmarks
+from benchmarks import compare, higher_is_better, main, run_suite
+
+TINY = {"chain_points": 100, "contributions": 200, "compression_clients": 3}
+
+def results(**metrics):
+    return {"results": {"suite": metrics}}
+
+def test_compare_flags_regressions_by_direction():
+    baseline = results(add_per_second=1000.0, load_seconds=2.0, size_bytes=100, skipped_seconds=0)
+    current = results(add_per_second=850.0, load_seconds=2.1, size_bytes=150, skipped_seconds=5)
+    rows = {row["metric"]: row for row in compare(current, baseline, threshold=0.1)}
+    assert set(rows) == {"add_per_second", "load_seconds", "size_bytes"}  # A zero baseline cannot be compared
+    assert rows["add_per_second"]["regressed"] and rows["add_per_second"]["change"] == pytest.approx(-0.15)
+    assert not rows["load_seconds"]["regressed"]
+    assert rows["size_bytes"]["regressed"]
+    assert not compare(results(add_per_second=2000.0), baseline)[0]["regressed"]  # Faster is fine
+    assert higher_is_better("add_per_second") and not higher_is_better("add_seconds")
+
+def test_run_suite_rejects_unknown_names():
+    with pytest.raises(ValueError, match="nope"):
+        run_suite("quick", ["neurochain", "nope"])
+
+def test_tiny_run_is_seeded_and_complete():
+    run = run_suite("quick", ["neurochain", "update_compression", "exchange"], seed=3, overrides=TINY)
+    assert run["meta"]["seed"] == 3 and run["meta"]["settings"]["chain_points"] == 100
+    assert set(run["results"]) == {"neurochain", "update_compression", "exchange"}
+    assert all(value > 0 for value in run["results"]["neurochain"].values())
+    again = run_suite("quick", ["update_compression"], seed=3, overrides=TINY)
+    # Sizes and errors depend only on the seed, unlike timings
+    for metric in ("int8_bytes_per_round", "int8_max_abs_error", "topk_max_abs_error"):
+        assert again["results"]["update_compression"][metric] == run["results"]["update_compression"][metric]
+
+def test_compare_command_exit_status(tmp_path, capsys):
+    baseline, current = tmp_path / "baseline.json", tmp_path / "current.json"
+    baseline.write_text(json.dumps(results(add_per_second=1000.0)))
+    current.write_text(json.dumps(results(add_per_second=950.0)))
+    assert main(["compare", str(current), str(baseline)]) == 0
+    assert main(["compare", str(current), str(baseline), "--threshold", "0.01"]) == 1
+    assert "REGRESSED" in capsys.readouterr().out
+
+def test_every_benchmark_is_registered():
+    assert {"neurochain", "neuronet", "precision", "update_compression", "high_quality_storage",
+            "low_quality_cleanup", "privacy", "exchange"} <= set(benchmarks.BENCHMARKS)
@@ -0,0 +1,63 @@
+import numpy as np
+import pytest
+
+from neuronet_core import ClientRegistry, FeatureArena, NeuroNet
+
+def test_registry_positions_and_growth():
+    registry = ClientRegistry()
+    for i in range(40):  # Past the initial counter capacity
+        registry.add({"id": f"client_{i}"})
+    first = registry.get("client_0")
+    assert registry.add({"id": "client_0", "other": True}) is first  # Re-registering keeps the original
+    assert len(registry) == 40 and registry.position("client_39") == 39
+    assert "client_5" in registry and "client_40" not in registry
+    assert registry.ids == [client["id"] for client in registry]
+    registry.record_contribution(39, 3, 1.5)
+    assert registry.data_points[39] == 3 and registry.quality_sums[39] == 1.5
+    assert len(registry.data_points) == 40
+    with pytest.raises(ValueError):
+        registry.position("missing")
+
+def test_append_many_matches_single_appends():
+    rng = np.random.default_rng(1)
+    arena = FeatureArena(3, capacity=1)
+    arena.append(rng.standard_normal(3), 1)
+    rows = arena.append_many(rng.standard_normal((5, 3)), np.arange(5), client_id=7)
+    assert rows == range(1, 6)
+    for row in rows:
+        assert arena.digests[row].tobytes() == arena.row_digest(row)
+    assert list(arena.client_ids) == [-1, 7, 7, 7, 7, 7]
+    with pytest.raises(ValueError):
+        arena.append_many(np.zeros((2, 4)), np.zeros(2))
+    with pytest.raises(ValueError):
+        arena.append_many(np.zeros((2, 3)), np.zeros(3))
+
+def test_batch_ingest_matches_row_ingest():
+    rng = np.random.default_rng(2)
+    features, labels = rng.standard_normal((25, 100)), rng.integers(0, 2, 25)
+    single, batch = NeuroNet(), NeuroNet()
+    for neuronet in (single, batch):
+        neuronet.register_client("a")
+        neuronet.register_client("b")
+    for row, label in zip(features, labels):
+        single.receive_client_data("b", row, label, quality_score=0.5)
+    batch.receive_client_batch("b", features, labels, quality_scores=0.5)
+
+    for neuronet in (single, batch):
+        client = neuronet.clients.get("b")
+        np.testing.assert_array_equal(client["local_data"].features, features)
+        np.testing.assert_array_equal(client["local_data"].labels, labels)
+        assert list(neuronet.clients.data_points) == [0, 25]
+        assert neuronet.clients.quality_sums[1] == pytest.approx(12.5)
+        assert len(neuronet.data_chain.chain) == 2 and len(neuronet.data_chain.pending_data) == 5
+        assert np.all(neuronet.arena.client_ids == 1)
+
+def test_per_row_quality_scores_and_unknown_client():
+    neuronet = NeuroNet()
+    neuronet.register_client("a")
+    neuronet.receive_client_batch("a", np.zeros((3, 100)), np.zeros(3), quality_scores=[0.1, 0.2, 0.3])
+    assert neuronet.clients.quality_sums[0] == pytest.approx(0.6)
+    with pytest.raises(ValueError):
+        neuronet.receive_client_batch("missing", np.zeros((1, 100)), np.zeros(1))
+    with pytest.raises(ValueError):
+        neuronet.receive_client_data("missing", np.zeros(100), 0)
@@ -0,0 +1,53 @@
+import numpy as np
+import pytest
+
+from data_digest import content_digest
+from high_quality_data_storage import HighQualityDataPoint, HighQualityDataStorage
+from low_quality_data_storage import LowQualityDataPoint, LowQualityDataStorage
+from tiered_data_storage import TieredDataStorage
+
+@pytest.mark.parametrize("options", [{}, {"engine": "segment"}, {"record_format": "binary"}])
+def test_store_keeps_its_algorithm(tmp_path, options):
+    storage = HighQualityDataStorage(str(tmp_path), digest_algorithm="blake2b", **options)
+    point = HighQualityDataPoint("payload", {"k": 1}, 0.9)  # Hashed with the default algorithm
+    storage.add_data_point(point)
+    assert point.hash == content_digest("payload", {"k": 1}, "blake2b")
+    storage.close()
+
+    with pytest.raises(ValueError, match="blake2b"):
+        HighQualityDataStorage(str(tmp_path), **options)
+
+    storage = HighQualityDataStorage(str(tmp_path), digest_algorithm="blake2b", **options)
+    storage.load_from_disk()
+    assert storage.get_data_point(point.hash).data == "payload"
+    storage.close()
+
+def test_store_without_manifest_is_sha256(tmp_path):
+    storage = LowQualityDataStorage(str(tmp_path))
+    storage.add_data_point(LowQualityDataPoint("payload", {}, 0.5))
+    storage.close()
+    (tmp_path / "STORE_MANIFEST").unlink()
+
+    with pytest.raises(ValueError):
+        LowQualityDataStorage(str(tmp_path), digest_algorithm="blake2b")
+    storage = LowQualityDataStorage(str(tmp_path))
+    storage.load_from_disk()
+    assert storage.get_data_point_count() == 1
+    assert (tmp_path / "STORE_MANIFEST").exists()
+
+def test_unknown_algorithm(tmp_path):
+    with pytest.raises(ValueError, match="Unknown digest algorithm"):
+        HighQualityDataStorage(str(tmp_path), digest_algorithm="md5")
+
+def test_tiers_share_the_algorithm(tmp_path):
+    storage = TieredDataStorage(str(tmp_path), digest_algorithm="blake2b")
+    point = LowQualityDataPoint("payload", {}, 0.5)
+    storage.add_data_point(point)
+    assert storage.get_data_point(content_digest("payload", {}, "blake2b")) is not None
+    assert storage.update_quality_score(point.hash, 0.95)
+    assert storage.tiers[-1].get_data_point(point.hash) is not None
+
+def test_array_digests_cover_empty_and_strided_arrays():
+    array = np.arange(6.0).reshape(2, 3)
+    assert content_digest(array.T, {}) == content_digest(np.ascontiguousarray(array.T), {})
+    assert content_digest(np.zeros((0, 2)), {}) != content_digest(np.zeros((2, 0)), {})  # Shape is hashed
@@ -0,0 +1,51 @@
+import numpy as np
+import pytest
+
+from neuronet_core import ArenaRows, DataPoint, FeatureArena
+
+def test_arena_grows_and_keeps_rows():
+    rng = np.random.default_rng(0)
+    arena = FeatureArena(4, capacity=2)
+    rows = rng.standard_normal((10, 4))
+    for i, row in enumerate(rows):
+        assert arena.append(row, i % 2, client_id=i) == i
+    assert arena.size == 10
+    np.testing.assert_array_equal(arena.features, rows)
+    np.testing.assert_array_equal(arena.labels, [i % 2 for i in range(10)])
+    np.testing.assert_array_equal(arena.client_ids, np.arange(10))
+    assert np.all(arena.block_ids == -1)
+    for row in range(10):
+        assert arena.digests[row].tobytes() == arena.row_digest(row)
+
+def test_float32_arena():
+    arena = FeatureArena(2, dtype=np.float32)
+    arena.append(np.ones(2), 0)
+    assert arena.features.dtype == np.float32
+
+def test_data_point_is_a_view():
+    arena = FeatureArena(3)
+    data_point = DataPoint(np.array([1.0, 2.0, 3.0]), 1, arena=arena)
+    assert not hasattr(data_point, "__dict__")
+    same = DataPoint.view(arena, data_point.index)
+    assert same.hash == data_point.hash == data_point._calculate_hash()
+    assert same.label == 1
+    arena._features[data_point.index, 0] = 9.0
+    assert data_point.features[0] == 9.0
+    assert data_point._calculate_hash() != data_point.hash  # Stored digest no longer matches the row
+
+def test_standalone_data_point_gets_its_own_arena():
+    data_point = DataPoint(np.arange(5.0), 0)
+    assert data_point.arena.n_features == 5
+    np.testing.assert_array_equal(data_point.features, np.arange(5.0))
+
+def test_arena_rows_select_one_client():
+    arena = FeatureArena(2)
+    rows = ArenaRows(arena)
+    for i in range(100):
+        row = arena.append(np.full(2, float(i)), i % 2)
+        if i % 3 == 0:
+            rows.append(row)
+    assert len(rows) == 34
+    assert rows[1].features[0] == 3.0
+    assert [dp.index for dp in rows][-2:] == [96, 99]
+    np.testing.assert_array_equal(rows.features[:, 0][:3], [0.0, 3.0, 6.0])
@@ -0,0 +1,36 @@
+import numpy as np
+
+from federated_parallel import ParallelRoundExecutor
+from neuronet_core import NeuroNet
+
+def make_neuronet(rows: int = 40) -> NeuroNet:
+    np.random.seed(0)
+    neuronet = NeuroNet(learning_rate=1e-4)
+    rng = np.random.default_rng(0)
+    for i in range(3):
+        neuronet.register_client(f"client_{i}")
+        neuronet.receive_client_batch(f"client_{i}", rng.standard_normal((rows + i, 100)), rng.integers(0, 2, rows + i))
+    return neuronet
+
+def test_parallel_round_matches_serial_round():
+    serial, parallel = make_neuronet(), make_neuronet()
+    with ParallelRoundExecutor(max_workers=2) as executor:
+        for seed in (1, 2):
+            serial.train_federated_model(seed=seed)
+            parallel.train_federated_model(seed=seed, executor=executor)
+    for layer, w in serial.model.global_weights.items():
+        np.testing.assert_allclose(parallel.model.global_weights[layer], w, rtol=1e-12)
+
+def test_client_blocks_are_reused_until_data_grows():
+    neuronet = make_neuronet()
+    with ParallelRoundExecutor(max_workers=1) as executor:
+        neuronet.train_federated_model(seed=0, executor=executor)
+        first = {client_id: block[0].name for client_id, block in executor._client_blocks.items()}
+        neuronet.train_federated_model(seed=1, executor=executor)
+        assert {client_id: block[0].name for client_id, block in executor._client_blocks.items()} == first
+
+        neuronet.receive_client_data("client_0", np.ones(100), 1)
+        neuronet.train_federated_model(seed=2, executor=executor)
+        assert executor._client_blocks["client_0"][0].name != first["client_0"]
+        assert executor._client_blocks["client_1"][0].name == first["client_1"]
+    assert executor._client_blocks == {}
@@ -0,0 +1,80 @@
+import time
+
+import pytest
+
+import instrumentation
+from high_quality_data_storage import HighQualityDataPoint, HighQualityDataStorage
+from instrumentation import LatencyHistogram, count, instrumented, observe, snapshot, span
+
+@pytest.fixture
+def enabled():
+    instrumentation.reset()
+    instrumentation.enable()
+    yield
+    instrumentation.disable()
+    instrumentation.stop_profiler()
+    instrumentation.reset()
+
+def test_disabled_records_nothing():
+    instrumentation.reset()
+    count("a")
+    observe("b", 0.1)
+    with span("c"):
+        pass
+    assert span("c") is span("d")  # Shared no-op
+    assert snapshot() == {"enabled": False, "counters": {}, "histograms": {}}
+
+def test_counters_spans_and_errors(enabled):
+    count("items", 3)
+    count("items")
+
+    @instrumented("work")
+    def work(fail=False):
+        if fail:
+            raise KeyError("boom")
+        return 7
+
+    assert work() == 7 and work.__name__ == "work"
+    with pytest.raises(KeyError):
+        work(fail=True)
+    with span("outer"):
+        with span("inner"):
+            pass
+    result = snapshot()
+    assert result["counters"] == {"items": 4, "work.errors": 1}
+    assert result["histograms"]["work"]["count"] == 2
+    assert set(result["histograms"]) == {"work", "outer", "inner"}
+
+def test_histogram_quantiles_report_bucket_bounds():
+    histogram = LatencyHistogram()
+    for seconds in [3e-6] * 90 + [0.5] * 10:
+        histogram.observe(seconds)
+    summary = histogram.summary()
+    assert summary["count"] == 100 and summary["min_seconds"] == 3e-6 and summary["max_seconds"] == 0.5
+    assert summary["p50_seconds"] == 4e-6  # Upper bound of the 2-4us bucket
+    assert summary["p99_seconds"] == 0.5  # Capped at the largest observation
+    assert summary["mean_seconds"] == pytest.approx(0.0500027)
+    assert LatencyHistogram().summary()["p50_seconds"] == 0.0
+
+def test_storage_operations_are_instrumented(enabled, tmp_path):
+    storage = HighQualityDataStorage(str(tmp_path))
+    storage.add_data_point(HighQualityDataPoint("payload", {}, 0.9))
+    storage.close()
+    storage = HighQualityDataStorage(str(tmp_path))
+    storage.load_from_disk()
+    storage.close()
+    assert snapshot()["histograms"]["storage.load"]["count"] == 1
+
+def test_profiler_attributes_samples_to_spans(enabled):
+    profiler = instrumentation.start_profiler(interval=0.001)
+    assert instrumentation.start_profiler() is profiler
+    with span("busy"):
+        deadline = time.perf_counter() + 0.2
+        while time.perf_counter() < deadline:
+            sum(range(100))
+    assert "profile" in snapshot()
+    assert instrumentation.stop_profiler() is profiler
+    assert instrumentation.stop_profiler() is None
+    top = profiler.top(50)
+    assert any(row["span"] == "busy" for row in top)
+    assert 0 < sum(row["share"] for row in top) <= 1.0 + 1e-9
@@ -0,0 +1,70 @@
+import numpy as np
+
+from neuronet_core import NeuroNet, train_local_weights
+
+def small_weights(rng: np.random.Generator):
+    # Positive weights and inputs keep every ReLU active, so the loss is smooth around them
+    return {"hidden": rng.uniform(0.1, 0.5, (4, 3)), "output": rng.uniform(0.1, 0.5, (3, 1))}
+
+def loss(weights, features, labels):
+    x = features
+    for w in weights.values():
+        x = np.maximum(x @ w, 0)
+    return 0.5 * np.mean((x[:, 0] - labels) ** 2)
+
+def test_single_step_matches_numerical_gradient():
+    rng = np.random.default_rng(0)
+    weights = small_weights(rng)
+    features, labels = rng.uniform(0.1, 1.0, (1, 4)), np.array([0.0])
+    learning_rate = 1e-3
+    updated = train_local_weights(weights, features, labels, epochs=1, batch_size=1, learning_rate=learning_rate)
+
+    for layer, w in weights.items():
+        numerical = np.zeros_like(w)
+        for index in np.ndindex(w.shape):
+            shifted = {name: v.copy() for name, v in weights.items()}
+            shifted[layer][index] += 1e-6
+            plus = loss(shifted, features, labels)
+            shifted[layer][index] -= 2e-6
+            numerical[index] = (plus - loss(shifted, features, labels)) / 2e-6
+        np.testing.assert_allclose((w - updated[layer]) / learning_rate, numerical, rtol=1e-4, atol=1e-8)
+    assert weights["hidden"] is not updated["hidden"]  # The input weights are left untouched
+
+def test_training_reduces_loss_and_is_seeded():
+    rng = np.random.default_rng(1)
+    weights = small_weights(rng)
+    features = rng.uniform(0.0, 1.0, (256, 4))
+    labels = features.sum(axis=1) * 0.1
+    before = loss(weights, features, labels)
+    first = train_local_weights(weights, features, labels, epochs=20, batch_size=16, learning_rate=0.05, seed=7)
+    second = train_local_weights(weights, features, labels, epochs=20, batch_size=16, learning_rate=0.05, seed=7)
+    assert loss(first, features, labels) < before / 2
+    for layer in weights:
+        np.testing.assert_array_equal(first[layer], second[layer])
+
+def test_rows_train_on_the_selected_rows_only():
+    rng = np.random.default_rng(2)
+    weights = small_weights(rng)
+    features, labels = rng.uniform(0.0, 1.0, (100, 4)), rng.uniform(0.0, 1.0, 100)
+    rows = np.arange(10, 60, 2)
+    via_rows = train_local_weights(weights, features, labels, epochs=2, batch_size=8, seed=3, rows=rows)
+    sliced = train_local_weights(weights, features[rows], labels[rows], epochs=2, batch_size=8, seed=3)
+    for layer in weights:
+        np.testing.assert_array_equal(via_rows[layer], sliced[layer])
+
+def test_float32_training_stays_float32():
+    rng = np.random.default_rng(3)
+    weights = {layer: w.astype(np.float32) for layer, w in small_weights(rng).items()}
+    updated = train_local_weights(weights, rng.uniform(0.0, 1.0, (32, 4)), rng.uniform(0.0, 1.0, 32), seed=0)
+    assert all(w.dtype == np.float32 for w in updated.values())
+
+def test_neuronet_round_changes_weights():
+    np.random.seed(0)
+    neuronet = NeuroNet(learning_rate=1e-4)
+    rng = np.random.default_rng(4)
+    for i in range(2):
+        neuronet.register_client(f"client_{i}")
+        neuronet.receive_client_batch(f"client_{i}", rng.standard_normal((50, 100)), rng.integers(0, 2, 50))
+    before = {layer: w.copy() for layer, w in neuronet.model.global_weights.items()}
+    neuronet.train_federated_model(seed=0)
+    assert any(not np.array_equal(before[layer], w) for layer, w in neuronet.model.global_weights.items())
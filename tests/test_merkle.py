@@ -0,0 +1,58 @@
+import hashlib
+
+import numpy as np
+import pytest
+
+from neuronet_core import DataPoint, FeatureArena, NeuroBlock, NeuroChain, merkle_levels, verify_merkle_proof
+
+def data_points(count: int, seed: int = 0):
+    rng = np.random.default_rng(seed)
+    arena = FeatureArena(8)
+    return [DataPoint(rng.standard_normal(8), int(rng.integers(2)), arena=arena) for _ in range(count)]
+
+@pytest.mark.parametrize("count", [1, 2, 3, 5, 8, 10])
+def test_every_leaf_has_a_valid_proof(count):
+    block = NeuroBlock(data_points(count), "0" * 64)
+    for i, data_point in enumerate(block.data):
+        proof = block.inclusion_proof(i)
+        assert len(proof) <= max(1, (count - 1).bit_length())
+        assert verify_merkle_proof(data_point.hash, proof, block.merkle_root)
+
+def test_wrong_leaf_proof_or_root_fails():
+    block = NeuroBlock(data_points(6), "0" * 64)
+    proof = block.inclusion_proof(2)
+    assert not verify_merkle_proof(block.data[3].hash, proof, block.merkle_root)
+    tampered = [(side, "00" * 32) if i == 0 else (side, sibling) for i, (side, sibling) in enumerate(proof)]
+    assert not verify_merkle_proof(block.data[2].hash, tampered, block.merkle_root)
+    flipped = [("right" if side == "left" else "left", sibling) for side, sibling in proof]
+    assert not verify_merkle_proof(block.data[2].hash, flipped, block.merkle_root)
+    assert not verify_merkle_proof(block.data[2].hash, proof, "00" * 32)
+    with pytest.raises(IndexError):
+        block.inclusion_proof(6)
+
+def test_leaves_and_nodes_are_domain_separated():
+    # Two leaves hashed as one inner node must not equal a single leaf with their concatenation
+    leaves = [hashlib.sha256(bytes([i])).digest() for i in range(2)]
+    root = merkle_levels(leaves)[-1][0]
+    assert merkle_levels([leaves[0] + leaves[1]])[-1][0] != root
+    assert len(merkle_levels([])) == 1
+
+def test_chain_proofs_and_verification():
+    chain = NeuroChain()
+    points = data_points(35, seed=1)
+    chain.add_data_batch(points)
+    assert len(chain.chain) == 3 and len(chain.pending_data) == 5
+    block_index, proof = chain.prove_inclusion(points[17].hash)
+    assert block_index == 1
+    assert verify_merkle_proof(points[17].hash, proof, chain.chain[1].merkle_root)
+    assert chain.prove_inclusion(points[32].hash) is None  # Still pending
+    assert chain.verify_chain()
+
+    points[4].arena._features[points[4].index, 0] += 1.0  # Tamper with a sealed row
+    assert not chain.verify_chain()
+
+def test_broken_link_fails_verification():
+    chain = NeuroChain()
+    chain.add_data_batch(data_points(20, seed=2))
+    chain.chain[1].previous_hash = "ff" * 32
+    assert not chain.verify_chain()
@@ -0,0 +1,85 @@
+import os
+
+import numpy as np
+import pytest
+
+from model_checkpoints import ModelCheckpointStore
+from neuronet_core import FederatedModel
+
+def rounds_of_weights(n_rounds: int):
+    rng = np.random.default_rng(0)
+    weights = {"a": rng.standard_normal((64, 32)), "b": rng.standard_normal(16).astype(np.float32)}
+    history = []
+    for _ in range(n_rounds):
+        weights = {layer: w + (w * 1e-4 * rng.standard_normal(w.shape)).astype(w.dtype) for layer, w in weights.items()}
+        history.append(weights)
+    return history
+
+def assert_weights_equal(actual, expected):
+    assert actual.keys() == expected.keys()
+    for layer in expected:
+        np.testing.assert_array_equal(actual[layer], expected[layer])
+
+def test_rounds_round_trip_across_restart(tmp_path):
+    history = rounds_of_weights(7)
+    store = ModelCheckpointStore(str(tmp_path), snapshot_interval=3)
+    for round_id, weights in enumerate(history[:4], start=1):
+        store.save(round_id, weights)
+
+    store = ModelCheckpointStore(str(tmp_path), snapshot_interval=3)  # Restart mid delta chain
+    for round_id, weights in enumerate(history[4:], start=5):
+        store.save(round_id, weights)
+
+    assert store.latest_round() == 7
+    assert_weights_equal(store.load(), history[-1])
+    for round_id, weights in enumerate(history, start=1):
+        assert_weights_equal(store.load(round_id), weights)
+
+def test_only_the_round_file_is_written(tmp_path):
+    history = rounds_of_weights(3)
+    store = ModelCheckpointStore(str(tmp_path), snapshot_interval=10)
+    for round_id, weights in enumerate(history, start=1):
+        store.save(round_id, weights)
+    sizes = {name: os.path.getsize(os.path.join(tmp_path, name)) for name in os.listdir(tmp_path)}
+    assert set(sizes) == {"LATEST", "round_00000001.ckpt", "round_00000002.ckpt", "round_00000003.ckpt"}
+    assert sizes["round_00000002.ckpt"] < sizes["round_00000001.ckpt"]
+
+def test_full_snapshot_is_memory_mapped(tmp_path):
+    history = rounds_of_weights(1)
+    store = ModelCheckpointStore(str(tmp_path))
+    store.save(1, history[0])
+    assert all(isinstance(w, np.memmap) for w in store.load().values())
+
+def test_rollback_then_continue(tmp_path):
+    history = rounds_of_weights(6)
+    store = ModelCheckpointStore(str(tmp_path), snapshot_interval=4)
+    for round_id, weights in enumerate(history[:5], start=1):
+        store.save(round_id, weights)
+    assert_weights_equal(store.rollback(3), history[2])
+    assert store.latest_round() == 3 and store.rounds() == [1, 2, 3]
+
+    store.save(4, history[5])
+    store = ModelCheckpointStore(str(tmp_path))
+    assert_weights_equal(store.load(), history[5])
+    assert_weights_equal(store.load(3), history[2])
+
+ARCHITECTURE = {"input_layer": (8, 4), "output_layer": (4, 1)}
+
+def test_model_rollback_requires_a_store():
+    model = FederatedModel(ARCHITECTURE)
+    with pytest.raises(ValueError, match="checkpoint store"):
+        model.rollback(1)
+
+def test_restored_weights_follow_model_dtype(tmp_path):
+    store = ModelCheckpointStore(str(tmp_path))
+    saved = FederatedModel(ARCHITECTURE, checkpoints=store)
+    for round_id in (1, 2):
+        store.save(round_id, saved.global_weights)
+
+    model = FederatedModel(ARCHITECTURE, checkpoints=ModelCheckpointStore(str(tmp_path)), dtype=np.float32)
+    assert all(w.dtype == np.float32 for w in model.global_weights.values())
+    model.rollback(1)
+    assert model.round_id == 1
+    assert all(w.dtype == np.float32 for w in model.global_weights.values())
+    for layer, w in saved.global_weights.items():
+        np.testing.assert_allclose(model.global_weights[layer], w, rtol=1e-6)
@@ -0,0 +1,47 @@
+import numpy as np
+
+from neuro_chain_store import ChainSegmentLog
+from neuronet_core import DataPoint, NeuroChain
+
+def add_blocks(chain: NeuroChain, n_blocks: int, rng: np.random.Generator):
+    for _ in range(n_blocks * chain.block_size):
+        chain.add_data(DataPoint(rng.standard_normal(100), int(rng.integers(2))))
+
+def test_blocks_survive_reopen(tmp_path):
+    rng = np.random.default_rng(0)
+    chain = NeuroChain(store=ChainSegmentLog(str(tmp_path), segment_size=64 * 1024, checkpoint_interval=3))
+    add_blocks(chain, 10, rng)
+    chain.store.close()
+
+    store = ChainSegmentLog(str(tmp_path))
+    assert store.height == 10
+    assert store.last_hash == chain.chain[-1].hash
+    stored = list(store.iter_blocks())
+    assert [block.hash for block in stored] == [block.hash for block in chain.chain]
+    np.testing.assert_array_equal(stored[4].features, np.stack([dp.features for dp in chain.chain[4].data]))
+    store.close()
+
+def test_torn_tail_is_truncated(tmp_path):
+    rng = np.random.default_rng(1)
+    chain = NeuroChain(store=ChainSegmentLog(str(tmp_path), checkpoint_interval=2))
+    add_blocks(chain, 5, rng)
+    chain.store.close()
+    segment = chain.store._segment_path(0)
+    with open(segment, "ab") as f:
+        f.write(b"NBLK" + b"\xff" * 20)  # A record header whose body never made it to disk
+
+    store = ChainSegmentLog(str(tmp_path))
+    assert store.height == 5
+    assert len(list(store.iter_blocks())) == 5
+    store.close()
+
+def test_growing_segment_is_remapped(tmp_path):
+    rng = np.random.default_rng(2)
+    chain = NeuroChain(store=ChainSegmentLog(str(tmp_path)))
+    add_blocks(chain, 2, rng)
+    assert len(list(chain.store.iter_blocks())) == 2
+    old_map = chain.store._maps[0][0]
+    add_blocks(chain, 2, rng)
+    assert len(list(chain.store.iter_blocks())) == 4
+    assert old_map.closed
+    chain.store.close()
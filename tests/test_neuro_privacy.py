@@ -0,0 +1,87 @@
+import pytest
+from cryptography.fernet import Fernet, InvalidToken
+
+import neuro_privacy
+from neuro_privacy import EncryptedKeyStore, NeuroPrivacy, PrivacyManager, _hkdf_key
+
+MASTER_KEY = bytes(range(32))
+
+def test_hkdf_keys_are_deterministic_per_user_and_version():
+    manager = PrivacyManager(master_key=MASTER_KEY)
+    assert manager.key_scheme == "hkdf"
+    assert manager._derive_key("alice", 0) == PrivacyManager(master_key=MASTER_KEY)._derive_key("alice", 0)
+    keys = {manager._derive_key(user, version) for user in ("alice", "bob") for version in (0, 1)}
+    assert len(keys) == 4
+    Fernet(_hkdf_key(MASTER_KEY, "any"))  # A valid Fernet key
+    with pytest.raises(ValueError):
+        PrivacyManager(master_key=b"short")
+
+def test_pbkdf2_keys_are_random_per_call(monkeypatch):
+    monkeypatch.setattr(neuro_privacy, "PBKDF2_ITERATIONS", 1000)
+    manager = PrivacyManager()
+    assert manager.key_scheme == "pbkdf2"
+    assert manager.provision_users(["a", "b", "a"], max_workers=1) == 2
+    assert manager.encryption_keys["a"] != manager._derive_key("a", 0)
+    assert manager.decrypt_data("b", manager.encrypt_data("b", "secret")) == "secret"
+
+def test_round_trips_and_unknown_users():
+    manager = PrivacyManager(master_key=MASTER_KEY)
+    manager.create_user_privacy_settings("alice")
+    token = manager.encrypt_data("alice", "hello")
+    assert manager.decrypt_data("alice", token) == "hello"
+    items = [f"item {i}".encode() for i in range(600)]  # Enough to use the thread pool
+    tokens = manager.encrypt_many("alice", items, max_workers=4)
+    assert manager.decrypt_many("alice", tokens) == items
+    with pytest.raises(ValueError, match="not found"):
+        manager.encrypt_data("bob", "hello")
+
+def test_cipher_cache_is_a_bounded_lru():
+    manager = PrivacyManager(master_key=MASTER_KEY, cipher_cache_size=2)
+    manager.provision_users(["a", "b", "c"])
+    for user in ("a", "b", "a", "c"):
+        manager.encrypt_data(user, "x")
+    assert list(manager._ciphers) == ["a", "c"]  # b was least recently used
+    with pytest.raises(ValueError):
+        PrivacyManager(cipher_cache_size=0)
+
+def test_rotation_re_encrypts_tokens_and_drops_the_old_key():
+    manager = PrivacyManager(master_key=MASTER_KEY)
+    manager.create_user_privacy_settings("alice")
+    old_tokens = manager.encrypt_many("alice", [b"one", b"two"])
+    new_tokens = manager.rotate_encryption_key("alice", old_tokens)
+    assert manager.key_versions["alice"] == 1
+    assert manager.decrypt_many("alice", new_tokens) == [b"one", b"two"]
+    with pytest.raises(InvalidToken):
+        manager.decrypt_many("alice", old_tokens)
+
+def test_key_store_restores_keys_after_restart(tmp_path):
+    path = str(tmp_path / "keys")
+    manager = PrivacyManager(master_key=MASTER_KEY, key_store_path=path)
+    manager.provision_users([f"user {i}" for i in range(5)])
+    token = manager.encrypt_data("user 3", "kept")
+    manager.rotate_encryption_key("user 4")
+
+    restored = PrivacyManager(master_key=MASTER_KEY, key_store_path=path)
+    assert restored.encryption_keys == manager.encryption_keys
+    assert restored.key_versions["user 4"] == 1
+    restored.create_user_privacy_settings("user 3")  # Reuses the stored key
+    assert restored.decrypt_data("user 3", token) == "kept"
+
+    with pytest.raises(ValueError, match="cannot be decrypted"):
+        PrivacyManager(master_key=bytes(32), key_store_path=path)
+    with pytest.raises(ValueError):
+        PrivacyManager(key_store_path=path)
+
+def test_key_store_ignores_a_torn_last_entry(tmp_path):
+    path = str(tmp_path / "keys")
+    store = EncryptedKeyStore(path, Fernet.generate_key())
+    store.append([("a", b"key-a", 0), ("b", b"key-b", 0), ("a", b"key-a2", 1)])
+    with open(path, "ab") as f:
+        f.write(b"gAAAAAtorn")
+    assert store.load() == {"a": (b"key-a2", 1), "b": (b"key-b", 0)}
+
+def test_neuro_privacy_facade():
+    privacy = NeuroPrivacy(master_key=MASTER_KEY)
+    assert privacy.setup_users_privacy(["a", "b"]) == 2
+    tokens = privacy.encrypt_sensitive_many("a", [b"x"])
+    assert privacy.decrypt_sensitive_many("a", privacy.rotate_user_key("a", tokens)) == [b"x"]
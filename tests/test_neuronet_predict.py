@@ -0,0 +1,22 @@
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+from neuronet_core import NeuroNet
+
+def test_predict_batch_is_thread_safe():
+    neuronet = NeuroNet()
+    rng = np.random.default_rng(0)
+    inputs = [rng.standard_normal((n, 100)) for n in (50, 300, 1000, 2000)] * 5
+    expected = [neuronet.predict_batch(x, chunk_size=128) for x in inputs]
+
+    with ThreadPoolExecutor(max_workers=8) as executor:
+        for _ in range(4):
+            results = list(executor.map(lambda x: neuronet.predict_batch(x, chunk_size=128), inputs))
+            for result, reference in zip(results, expected):
+                np.testing.assert_array_equal(result, reference)
+
+def test_predict_batch_chunking_matches_single_pass():
+    neuronet = NeuroNet()
+    x = np.random.default_rng(1).standard_normal((5000, 100))
+    np.testing.assert_allclose(neuronet.predict_batch(x), neuronet.predict_batch(x, chunk_size=None))
@@ -0,0 +1,45 @@
+import numpy as np
+import pytest
+
+from neuronet_core import NeuroNet
+
+def make_neuronet() -> NeuroNet:
+    neuronet = NeuroNet()
+    for client_id in ("a", "b", "c"):
+        neuronet.register_client(client_id)
+    neuronet.receive_client_batch("a", np.zeros((10, 100)), np.zeros(10), quality_scores=1.0)
+    neuronet.receive_client_batch("b", np.zeros((30, 100)), np.zeros(30), quality_scores=0.2)
+    return neuronet
+
+def test_payout_by_data_points_and_by_quality():
+    neuronet = make_neuronet()
+    payout = neuronet.distribute_neuro_tokens(1000)
+    assert payout["client_ids"] == ["a", "b", "c"]
+    np.testing.assert_allclose(payout["amounts"], [250, 750, 0])
+
+    weighted = neuronet.distribute_neuro_tokens(1000, weight_by_quality=True)
+    np.testing.assert_allclose(weighted["amounts"], [1000 * 10 / 16, 1000 * 6 / 16, 0])
+    assert weighted["total_tokens"] == pytest.approx(1000)
+    assert len(neuronet.payout_ledger) == 2
+
+def test_incremental_payouts_count_new_contributions_only():
+    neuronet = make_neuronet()
+    first = neuronet.distribute_neuro_tokens(100, incremental=True)
+    np.testing.assert_allclose(first["amounts"], [25, 75, 0])
+
+    neuronet.receive_client_data("c", np.zeros(100), 0)
+    neuronet.register_client("d")
+    neuronet.receive_client_batch("d", np.zeros((3, 100)), np.zeros(3))
+    second = neuronet.distribute_neuro_tokens(100, incremental=True)
+    assert second["client_ids"] == ["a", "b", "c", "d"]
+    np.testing.assert_allclose(second["amounts"], [0, 0, 25, 75])
+
+    nothing_new = neuronet.distribute_neuro_tokens(100, incremental=True)
+    np.testing.assert_array_equal(nothing_new["amounts"], np.zeros(4))
+    assert nothing_new["total_tokens"] == 0
+
+def test_payout_without_contributions():
+    neuronet = NeuroNet()
+    neuronet.register_client("a")
+    payout = neuronet.distribute_neuro_tokens(1000)
+    np.testing.assert_array_equal(payout["amounts"], [0.0])
@@ -0,0 +1,44 @@
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+from neuronet_core import NeuroNet, PredictionCache
+
+def test_lru_eviction_and_invalidation():
+    cache = PredictionCache(max_entries=2)
+    cache.put(b"a", 1.0, version=0)
+    cache.put(b"b", 2.0, version=0)
+    assert cache.get(b"a", version=0) == 1.0
+    cache.put(b"c", 3.0, version=0)  # Evicts b, the least recently used
+    assert cache.get(b"b", version=0) is None
+    assert cache.get(b"c", version=1) is None  # A new weight version drops everything
+    stats = cache.stats()
+    assert (stats["hits"], stats["misses"], stats["evictions"], stats["invalidations"]) == (1, 2, 1, 1)
+
+def test_cached_predictions_match_uncached():
+    np.random.seed(0)
+    cached = NeuroNet(prediction_cache_size=1000)
+    uncached = NeuroNet()
+    uncached.model.global_weights = cached.model.global_weights
+    x = np.random.default_rng(0).standard_normal((200, 100))
+    np.testing.assert_allclose(cached.predict_batch(x), uncached.predict_batch(x))
+    np.testing.assert_allclose(cached.predict_batch(x[::-1]), uncached.predict_batch(x[::-1]))
+    assert cached.prediction_cache.hits == 200
+
+    delta = {layer: np.full_like(w, 0.01) for layer, w in cached.model.global_weights.items()}
+    cached.model.apply_delta(delta)
+    np.testing.assert_allclose(cached.predict_batch(x), uncached.predict_batch(x))
+
+def test_concurrent_cached_predictions():
+    # A small cache keeps every thread evicting while the others read
+    neuronet = NeuroNet(prediction_cache_size=64)
+    rng = np.random.default_rng(1)
+    rows = rng.standard_normal((500, 100))
+    expected = neuronet.predict_batch(rows)
+    batches = [rows[rng.integers(0, len(rows), size=100)] for _ in range(200)]
+
+    with ThreadPoolExecutor(max_workers=8) as executor:
+        results = list(executor.map(neuronet.predict_batch, batches))
+    lookup = {row.tobytes(): prediction for row, prediction in zip(rows, expected)}
+    for batch, result in zip(batches, results):
+        np.testing.assert_allclose(result, [lookup[row.tobytes()] for row in batch])
@@ -0,0 +1,71 @@
+import numpy as np
+import pytest
+
+from neuronet_core import FederatedModel, RoundAggregator
+
+ARCHITECTURE = {"input_layer": (6, 4), "output_layer": (4, 1)}
+
+def client_updates(model: FederatedModel, n_clients: int, seed: int = 0):
+    rng = np.random.default_rng(seed)
+    return [{layer: rng.standard_normal(w.shape).astype(w.dtype) for layer, w in model.global_weights.items()}
+            for _ in range(n_clients)]
+
+def test_round_is_sample_weighted_mean():
+    np.random.seed(0)
+    model = FederatedModel(ARCHITECTURE)
+    updates = client_updates(model, 3)
+    counts = [10, 30, 60]
+    model.begin_round()
+    for client_id, (update, num_samples) in enumerate(zip(updates, counts)):
+        assert model.submit_update(client_id, update, num_samples)
+    assert model.finalize_round()
+    for layer, w in model.global_weights.items():
+        expected = sum(update[layer] * n for update, n in zip(updates, counts)) / sum(counts)
+        np.testing.assert_allclose(w, expected)
+    assert model.round_id == 1
+
+def test_duplicate_late_and_empty_updates_are_rejected():
+    np.random.seed(0)
+    model = FederatedModel(ARCHITECTURE)
+    update = client_updates(model, 1)[0]
+    round_id = model.begin_round()
+    assert model.submit_update("a", update, 5)
+    assert not model.submit_update("a", update, 5)  # Duplicate
+    assert not model.submit_update("b", update, 0)  # No samples
+    assert not model.submit_update("c", update, 5, round_id=round_id + 1)  # Wrong round
+    with pytest.raises(ValueError):
+        model.begin_round()
+    model.finalize_round()
+    assert not model.submit_update("d", update, 5, round_id=round_id)  # Round closed
+
+def test_round_without_updates_leaves_weights():
+    np.random.seed(0)
+    model = FederatedModel(ARCHITECTURE)
+    before = {layer: w.copy() for layer, w in model.global_weights.items()}
+    version = model.weight_version
+    model.begin_round()
+    assert not model.finalize_round()
+    assert model.weight_version == version
+    for layer, w in model.global_weights.items():
+        np.testing.assert_array_equal(w, before[layer])
+    with pytest.raises(ValueError):
+        RoundAggregator(model.global_weights).result()
+
+def test_update_global_weights_defaults_to_plain_mean():
+    np.random.seed(0)
+    model = FederatedModel(ARCHITECTURE)
+    updates = client_updates(model, 4)
+    model.update_global_weights(updates)
+    for layer, w in model.global_weights.items():
+        np.testing.assert_allclose(w, np.mean([update[layer] for update in updates], axis=0))
+
+def test_float32_weights_sum_in_float64():
+    np.random.seed(0)
+    model = FederatedModel(ARCHITECTURE, dtype=np.float32)
+    aggregator = RoundAggregator(model.global_weights)
+    assert all(s.dtype == np.float64 for s in aggregator.weighted_sums.values())
+    aggregator = RoundAggregator(model.global_weights, accumulator_dtype=None)
+    assert all(s.dtype == np.float32 for s in aggregator.weighted_sums.values())
+
+    model.update_global_weights(client_updates(model, 2), [1, 3])
+    assert all(w.dtype == np.float32 for w in model.global_weights.values())
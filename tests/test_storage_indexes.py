@@ -0,0 +1,109 @@
+import os
+import random
+from datetime import datetime, timedelta
+
+import pytest
+
+from high_quality_data_storage import HighQualityDataPoint, HighQualityDataStorage
+from low_quality_data_storage import LowQualityDataPoint, LowQualityDataStorage
+from storage_indexes import ExpiryIndex, SecondaryIndexes, matches_query
+
+class Point:
+    def __init__(self, metadata, quality_score, timestamp):
+        self.metadata = metadata
+        self.quality_score = quality_score
+        self.timestamp = timestamp
+
+def test_candidates_intersect_postings_and_ranges():
+    now = datetime(2024, 1, 1)
+    points = [Point({"source": ["web", "app"][i % 2], "tags": [i % 3]}, i / 10, now + timedelta(hours=i))
+              for i in range(10)]
+    indexes = SecondaryIndexes(["source", "tags"], ["quality_score", "timestamp"])
+    for position, point in enumerate(points):
+        indexes.add(position, point)
+
+    assert indexes.candidates({"other": 1}) is None  # Nothing indexed
+    assert indexes.candidates({"source": "web"}) == [0, 2, 4, 6, 8]
+    assert indexes.candidates({"tags": [0]}) == [0, 3, 6, 9]  # List values are indexed by canonical JSON
+    assert indexes.candidates({"source": "web"}, {"quality_score": (0.3, 0.6)}) == [4, 6]
+    assert indexes.candidates({}, {"timestamp": (None, now + timedelta(hours=2))}) == [0, 1, 2]
+
+    indexes.remove(4, points[4])
+    assert indexes.candidates({"source": "web"}, {"quality_score": (0.3, 0.6)}) == [6]
+    indexes.rebuild(enumerate(points))
+    assert indexes.candidates({"source": "web"}, {"quality_score": (0.3, 0.6)}) == [4, 6]
+
+def test_only_quality_and_time_ranges():
+    with pytest.raises(ValueError):
+        SecondaryIndexes(range_fields=["size"])
+
+@pytest.mark.parametrize("indexed", [True, False])
+def test_storage_search_matches_a_full_scan(tmp_path, indexed):
+    rng = random.Random(0)
+    options = {"metadata_indexes": ["source", "type"], "range_indexes": ["quality_score"]} if indexed else {}
+    storage = HighQualityDataStorage(str(tmp_path), **options)
+    points = [HighQualityDataPoint(f"record {i}", {"source": rng.choice("abc"), "type": rng.choice("xy"), "i": i},
+                                   rng.uniform(0.8, 1.0)) for i in range(300)]
+    storage.add_data_points(points)
+    for data_point in points[::7]:
+        storage.remove_data_point(data_point.hash)
+    storage.update_quality_score(points[1].hash, 0.99)
+    live = [dp for i, dp in enumerate(points) if i % 7]
+
+    queries = [({"source": "a"}, None), ({"source": "b", "type": "y"}, (0.85, 0.95)), ({"i": 1}, (0.98, None)),
+               ({}, (None, 0.82)), ({"source": "missing"}, None)]
+    for query, quality_range in queries:
+        ranges = {"quality_score": quality_range} if quality_range else None
+        expected = {dp.hash for dp in live if matches_query(dp, query, ranges)}
+        assert {dp.hash for dp in storage.search_by_metadata(query, quality_range)} == expected
+
+    storage.create_metadata_index("i")
+    assert [dp.hash for dp in storage.search_by_metadata({"i": 1})] == [points[1].hash]
+    storage.close()
+
+def test_expiry_index_buckets():
+    index = ExpiryIndex(bucket_seconds=3600)
+    start = datetime(2024, 1, 1)
+    for position in range(10):
+        index.add(position, start + timedelta(minutes=30 * position))
+    expired, boundary = index.candidates(start + timedelta(minutes=100))
+    assert sorted(expired) == [0, 1] and sorted(boundary) == [2, 3]  # Later buckets are never visited
+    index.remove(0, start)
+    index.remove(2, start + timedelta(minutes=60))
+    expired, boundary = index.candidates(start + timedelta(minutes=100))
+    assert expired == [1] and boundary == [3]
+    index.rebuild([(7, Point({}, 0.5, start))])
+    assert index.candidates(start + timedelta(minutes=100)) == ([7], [])
+
+def test_cleanup_expires_old_points_only(tmp_path):
+    storage = LowQualityDataStorage(str(tmp_path), retention_period=30, compaction_ratio=0.1)
+    now = datetime.now()
+    points = []
+    for i in range(200):
+        data_point = LowQualityDataPoint(f"record {i}", {"i": i}, 0.5)
+        data_point.timestamp = now - timedelta(days=i / 2)
+        points.append(data_point)
+    storage.add_data_points(points)
+    storage.add_data_point(points[150])  # A second reference does not keep expired content alive
+
+    expected = [dp for dp in points if dp.timestamp > now - timedelta(days=31)]
+    assert storage.cleanup_expired_data() == 200 - len(expected)
+    assert storage.get_data_point_count() == len(expected)
+    assert storage.get_quality_stats()["count"] == len(expected)
+    assert storage.cleanup_expired_data() == 0  # Positions were renumbered by compaction
+    assert not os.path.exists(storage._file_path(points[199].hash))
+    storage.close()
+
+    storage = LowQualityDataStorage(str(tmp_path), retention_period=30)
+    storage.load_from_disk()
+    assert {dp.hash for dp in storage.iter_data_points()} == {dp.hash for dp in expected}
+    storage.close()
+
+def test_no_retention_keeps_everything(tmp_path):
+    storage = LowQualityDataStorage(str(tmp_path), retention_period=None)
+    data_point = LowQualityDataPoint("old", {}, 0.5)
+    data_point.timestamp = datetime.now() - timedelta(days=1000)
+    storage.add_data_point(data_point)
+    assert storage.cleanup_expired_data() == 0
+    assert storage.get_data_point(data_point.hash) is not None
+    storage.close()
@@ -0,0 +1,61 @@
+import pytest
+
+from high_quality_data_storage import HighQualityDataPoint, HighQualityDataStorage
+from low_quality_data_storage import LowQualityDataPoint, LowQualityDataStorage
+from storage_loader import UNLOADED, parallel_map, scan_positions
+
+TIERS = [(HighQualityDataStorage, HighQualityDataPoint, 0.9), (LowQualityDataStorage, LowQualityDataPoint, 0.5)]
+
+@pytest.mark.parametrize("storage_cls, point_cls, score", TIERS)
+def test_payloads_load_on_first_access(tmp_path, storage_cls, point_cls, score):
+    storage = storage_cls(str(tmp_path))
+    payloads = ["record", {"nested": [1, 2]}, [3.5, None]]
+    points = [point_cls(data, {"i": i}, score) for i, data in enumerate(payloads)]
+    storage.add_data_points(points)
+    storage.close()
+
+    storage = storage_cls(str(tmp_path))
+    storage.load_from_disk(max_workers=2)
+    loaded = {dp.hash: dp for dp in storage.iter_data_points()}
+    assert set(loaded) == {dp.hash for dp in points}
+    for data_point in points:
+        assert loaded[data_point.hash]._data is UNLOADED
+        assert loaded[data_point.hash].metadata == data_point.metadata
+        assert loaded[data_point.hash].data == data_point.data
+        assert loaded[data_point.hash]._data is not UNLOADED
+    storage.close()
+
+def test_parallel_map_keeps_order():
+    items = list(range(1000))
+    assert list(parallel_map(lambda x: x * x, items, max_workers=4, chunksize=16)) == [x * x for x in items]
+    assert list(parallel_map(str, [3, 1, 2])) == ["3", "1", "2"]  # Below one chunk runs inline
+
+def test_scan_positions_skips_tombstones():
+    data_points = [0, None, 2, 3, None, 5, 6]
+    page, cursor = scan_positions(data_points, None, 2, generation=4)
+    assert page == [0, 2] and cursor == "4:3"
+    page, cursor = scan_positions(data_points, cursor, 3, generation=4)
+    assert page == [3, 5, 6] and cursor is None
+    with pytest.raises(ValueError):
+        scan_positions(data_points, "3:3", 2, generation=4)
+
+def test_storage_scan_pages_and_invalidation(tmp_path):
+    storage = LowQualityDataStorage(str(tmp_path), compaction_ratio=0.9)
+    points = [LowQualityDataPoint(f"record {i}", {"i": i}, 0.5) for i in range(25)]
+    storage.add_data_points(points)
+    for data_point in points[::5]:
+        storage.remove_data_point(data_point.hash)
+
+    seen, cursor = [], None
+    while True:
+        page, cursor = storage.scan(cursor, limit=6)
+        seen.extend(dp.hash for dp in page)
+        if cursor is None:
+            break
+    assert seen == [dp.hash for i, dp in enumerate(points) if i % 5]
+
+    _, cursor = storage.scan(limit=6)
+    storage.compact()
+    with pytest.raises(ValueError):
+        storage.scan(cursor)
+    storage.close()
@@ -0,0 +1,79 @@
+import os
+from datetime import datetime
+
+import numpy as np
+import pytest
+
+from high_quality_data_storage import HighQualityDataPoint, HighQualityDataStorage
+from storage_records import (MIN_COMPRESS_BYTES, RECORD_HEADER, check_format, convert_directory, convert_record,
+                             decode_header, decode_payload, decode_record, encode_record, is_binary_record,
+                             read_record_header, read_record_payload)
+
+HASH = "ab" * 32
+TIMESTAMP = datetime(2024, 5, 6, 7, 8, 9, 123456)
+
+def encode(data, record_format="binary", compression=None, metadata=None):
+    return encode_record(HASH, data, metadata or {"source": "web", "tags": [1, 2]}, 0.875, TIMESTAMP,
+                         record_format, compression)
+
+@pytest.mark.parametrize("compression", [None, "zlib"])
+@pytest.mark.parametrize("data", ["text ☃", "x" * 5000, b"\x00\xffraw", {"a": [1, 2.5, None]},
+                                  np.arange(12, dtype=np.float32).reshape(3, 4), np.zeros((0, 2))])
+def test_binary_round_trip(data, compression):
+    payload = encode(data, compression=compression)
+    assert is_binary_record(payload)
+    record = decode_record(payload)
+    assert record["hash"] == HASH and record["quality_score"] == 0.875
+    assert record["timestamp"] == TIMESTAMP
+    assert record["metadata"] == {"source": "web", "tags": [1, 2]}
+    if isinstance(data, np.ndarray):
+        assert record["data"].dtype == data.dtype
+        np.testing.assert_array_equal(record["data"], data)
+    else:
+        assert record["data"] == data
+
+def test_only_large_blocks_are_compressed():
+    small, large = "y" * (MIN_COMPRESS_BYTES // 2), "y" * (MIN_COMPRESS_BYTES * 4)
+    assert encode(small, compression="zlib") == encode(small)
+    assert len(encode(large, compression="zlib")) < len(encode(large))
+
+def test_json_round_trip_and_conversion():
+    payload = encode({"a": 1}, record_format="json")
+    assert not is_binary_record(payload)
+    assert decode_header(payload) == decode_header(encode({"a": 1}))
+    assert decode_payload(payload) == {"a": 1}
+    assert convert_record(convert_record(payload, "binary", "zlib"), "json") == payload
+
+def test_header_reads_stop_at_the_metadata(tmp_path):
+    path = tmp_path / "record.rec"
+    payload = encode("z" * 10000, compression="zlib")
+    path.write_bytes(payload)
+    assert read_record_header(str(path)) == decode_header(payload[:RECORD_HEADER.size + 29])
+    assert read_record_payload(str(path)) == "z" * 10000
+
+@pytest.mark.parametrize("record_format, compression", [("xml", None), ("binary", "gzip"), ("json", "zlib")])
+def test_check_format_rejects(record_format, compression):
+    with pytest.raises(ValueError):
+        check_format(record_format, compression)
+
+def test_convert_directory_both_ways(tmp_path):
+    storage = HighQualityDataStorage(str(tmp_path))
+    points = [HighQualityDataPoint({"i": i, "text": "w" * 600}, {"i": i}, 0.9) for i in range(20)]
+    storage.add_data_points(points)
+    storage.close()
+
+    assert convert_directory(str(tmp_path), "binary", "zlib", max_workers=2) == 20
+    assert not [name for name in os.listdir(tmp_path) if name.endswith(".json") and name != "REFERENCES.json"]
+    assert convert_directory(str(tmp_path), "binary") == 0  # Already converted
+
+    storage = HighQualityDataStorage(str(tmp_path), record_format="binary", compression="zlib")
+    storage.load_from_disk()
+    assert storage.get_data_point(points[3].hash).data == {"i": 3, "text": "w" * 600}
+    storage.close()
+
+    assert convert_directory(str(tmp_path), "json") == 20
+    storage = HighQualityDataStorage(str(tmp_path))
+    storage.load_from_disk()
+    assert {dp.hash for dp in storage.iter_data_points()} == {dp.hash for dp in points}
+    assert storage.get_data_point(points[7].hash).metadata == {"i": 7}
+    storage.close()
@@ -0,0 +1,103 @@
+import os
+import shutil
+
+from storage_segments import SegmentRecordLog, RECORD_HEADER
+from high_quality_data_storage import HighQualityDataPoint, HighQualityDataStorage
+
+PAYLOAD = b"x" * 100
+SEGMENT_SIZE = 3 * (RECORD_HEADER.size + len(PAYLOAD))  # Three records per segment
+
+def key(i: int) -> bytes:
+    return i.to_bytes(32, "big")
+
+def fill(directory, count: int) -> SegmentRecordLog:
+    log = SegmentRecordLog(str(directory), segment_size=SEGMENT_SIZE)
+    for i in range(count):
+        log.put(key(i), PAYLOAD + bytes([i]))
+    return log
+
+def test_compact_unread_segments_after_reopen(tmp_path):
+    fill(tmp_path, 6).close()
+    log = SegmentRecordLog(str(tmp_path), segment_size=SEGMENT_SIZE)
+    for i in range(3):
+        log.delete(key(i))  # Segment 0 is now fully dead and was never read
+    assert log.compact() >= 1
+    log.close()
+
+    log = SegmentRecordLog(str(tmp_path), segment_size=SEGMENT_SIZE)
+    assert sorted(log.keys()) == [key(i) for i in range(3, 6)]
+    for i in range(3, 6):
+        assert log.get(key(i)) == PAYLOAD + bytes([i])
+    log.close()
+
+def test_compact_fully_dead_and_partly_live_segments(tmp_path):
+    log = fill(tmp_path, 10)
+    for i in range(5):
+        log.delete(key(i))  # Segment 0 fully dead, segment 1 one-third dead
+    for k in log.keys():
+        log.get(k)  # Opens readers for the live segments only
+    assert log.compact(0.3) >= 2
+    remaining = os.listdir(tmp_path)
+    assert "segment_00000000.dat" not in remaining and "segment_00000001.dat" not in remaining
+    for i in range(5, 10):
+        assert log.get(key(i)) == PAYLOAD + bytes([i])
+    log.close()
+
+    log = SegmentRecordLog(str(tmp_path), segment_size=SEGMENT_SIZE)
+    assert len(log) == 5
+    for i in range(5):
+        assert log.get(key(i)) is None
+    for i in range(5, 10):
+        assert log.get(key(i)) == PAYLOAD + bytes([i])
+    log.close()
+
+def test_compact_survives_crash_after_first_remove(tmp_path, monkeypatch):
+    log = fill(tmp_path / "log", 10)
+    for i in range(5):
+        log.delete(key(i))
+    snapshot = tmp_path / "snapshot"
+    real_remove, real_fsync = os.remove, os.fsync
+    events = []
+
+    def remove(path):
+        # Captures what is on disk right after the first source segment is gone, as a crash would leave it
+        events.append("remove")
+        real_remove(path)
+        if not snapshot.exists():
+            shutil.copytree(tmp_path / "log", snapshot)
+
+    def fsync(fd):
+        events.append("fsync")
+        real_fsync(fd)
+
+    monkeypatch.setattr(os, "remove", remove)
+    monkeypatch.setattr(os, "fsync", fsync)
+    assert log.compact(0.3) >= 2
+    monkeypatch.undo()
+    log.close()
+    assert "fsync" in events[:events.index("remove")]
+
+    crashed = SegmentRecordLog(str(snapshot), segment_size=SEGMENT_SIZE)
+    for i in range(5, 10):
+        assert crashed.get(key(i)) == PAYLOAD + bytes([i])
+    crashed.close()
+
+def test_storage_compact_and_reopen(tmp_path):
+    points = [HighQualityDataPoint(f"record {i}" * 50, {"i": i}, 0.9) for i in range(40)]
+    storage = HighQualityDataStorage(str(tmp_path), engine="segment", segment_size=4096)
+    storage.add_data_points(points)
+    storage.close()
+
+    storage = HighQualityDataStorage(str(tmp_path), engine="segment", segment_size=4096)
+    storage.load_from_disk()
+    for data_point in points[:30]:
+        storage.remove_data_point(data_point.hash)
+    assert storage.compact(0.3) > 0
+    storage.close()
+
+    storage = HighQualityDataStorage(str(tmp_path), engine="segment", segment_size=4096)
+    storage.load_from_disk()
+    assert storage.get_data_point_count() == 10
+    for data_point in points[30:]:
+        assert storage.get_data_point(data_point.hash).data == data_point.data
+    storage.close()
@@ -0,0 +1,27 @@
+import pytest
+
+from high_quality_data_storage import HighQualityDataPoint, HighQualityDataStorage
+from low_quality_data_storage import LowQualityDataPoint, LowQualityDataStorage
+
+@pytest.mark.parametrize("storage_cls, point_cls, options, score", [
+    (HighQualityDataStorage, HighQualityDataPoint, {}, 0.9),
+    (HighQualityDataStorage, HighQualityDataPoint, {"engine": "segment"}, 0.9),
+    (LowQualityDataStorage, LowQualityDataPoint, {}, 0.5),
+])
+def test_load_after_add_counts_each_point_once(tmp_path, storage_cls, point_cls, options, score):
+    storage = storage_cls(str(tmp_path), **options)
+    for i in range(10):
+        storage.add_data_point(point_cls(f"record {i}", {"i": i}, score))
+    storage.close()
+
+    storage = storage_cls(str(tmp_path), **options)
+    storage.add_data_point(point_cls("added before load", {}, score))
+    storage.load_from_disk()
+    assert storage.get_data_point_count() == 11
+    assert storage.get_quality_stats()["count"] == 11
+    storage.close()
+
+    storage = storage_cls(str(tmp_path), **options)
+    storage.load_from_disk()
+    assert storage.get_quality_stats()["count"] == 11
+    storage.close()
@@ -0,0 +1,94 @@
+import os
+import threading
+
+import pytest
+
+from high_quality_data_storage import HighQualityDataPoint, HighQualityDataStorage
+from low_quality_data_storage import LowQualityDataPoint, LowQualityDataStorage
+from storage_writer import OP_DELETE, OP_PUT, GroupCommitWriter, WriteBackpressureError, write_files
+
+class BlockingBatches:
+    # write_batch stand-in that records batches and holds each one until released
+    def __init__(self):
+        self.batches = []
+        self.started = threading.Event()
+        self.release = threading.Event()
+
+    def __call__(self, ops, fsync):
+        self.started.set()
+        self.release.wait(5)
+        self.batches.append(list(ops))
+
+@pytest.mark.parametrize("fsync", [False, True])
+def test_write_files_applies_ops_in_order(tmp_path, fsync):
+    paths = [str(tmp_path / f"{i}.rec") for i in range(3)]
+    write_files([(OP_PUT, paths[0], b"a"), (OP_PUT, paths[1], b"b"), (OP_DELETE, paths[1], None),
+                 (OP_PUT, paths[2], b"c"), (OP_PUT, paths[0], b"d")], fsync=fsync)
+    assert sorted(os.listdir(tmp_path)) == ["0.rec", "2.rec"]
+    with open(paths[0], 'rb') as f:
+        assert f.read() == b"d"
+    write_files([(OP_DELETE, path, None) for path in paths])  # Missing files are ignored
+    assert os.listdir(tmp_path) == []
+
+def test_writer_batches_and_flushes():
+    batches = BlockingBatches()
+    batches.release.set()
+    writer = GroupCommitWriter(batches, batch_size=4, flush_interval=10)
+    writer.submit([(OP_PUT, i, b"") for i in range(10)])
+    writer.flush()  # Does not wait for the flush interval
+    assert writer.pending == 0 and writer.ops_written == 10
+    assert [len(batch) for batch in batches.batches] == [4, 4, 2]
+    assert [key for batch in batches.batches for _, key, _ in batch] == list(range(10))
+    writer.close()
+
+def test_full_queue_raises_backpressure():
+    batches = BlockingBatches()
+    writer = GroupCommitWriter(batches, batch_size=2, flush_interval=0.01, max_queue=4)
+    writer.submit([(OP_PUT, 0, b""), (OP_PUT, 1, b"")])
+    assert batches.started.wait(5)  # First batch is in flight and blocked
+    writer.submit([(OP_PUT, i, b"") for i in range(2, 6)])
+    with pytest.raises(WriteBackpressureError):
+        writer.submit([(OP_PUT, 6, b"")])
+    with pytest.raises(WriteBackpressureError):
+        writer.submit([(OP_PUT, 6, b"")], timeout=0.05)
+    with pytest.raises(ValueError):
+        writer.submit([(OP_PUT, i, b"") for i in range(5)])
+    batches.release.set()
+    writer.submit([(OP_PUT, 6, b"")], timeout=None)  # Waits for room instead
+    writer.close()
+    assert writer.ops_written == 7
+
+def test_failed_batch_surfaces_on_flush():
+    def failing(ops, fsync):
+        raise OSError("disk full")
+
+    writer = GroupCommitWriter(failing, batch_size=1)
+    writer.submit([(OP_PUT, 0, b"")])
+    with pytest.raises(RuntimeError) as info:
+        writer.flush()
+    assert isinstance(info.value.__cause__, OSError)
+    with pytest.raises(RuntimeError):
+        writer.submit([(OP_PUT, 1, b"")])
+    with pytest.raises(RuntimeError):
+        writer.close()
+
+@pytest.mark.parametrize("storage_cls, point_cls, score",
+                         [(HighQualityDataStorage, HighQualityDataPoint, 0.9),
+                          (LowQualityDataStorage, LowQualityDataPoint, 0.5)])
+def test_group_commit_storage_survives_reopen(tmp_path, storage_cls, point_cls, score):
+    storage = storage_cls(str(tmp_path))
+    storage.start_group_commit(batch_size=8, flush_interval=0.01, fsync=True)
+    points = [point_cls(f"record {i}", {"i": i}, score) for i in range(50)]
+    storage.add_data_points(points[:20])
+    for data_point in points[20:]:
+        storage.add_data_point(data_point)
+    assert storage.get_data_point(points[0].hash).data == "record 0"  # Visible before it is written
+    storage.remove_data_point(points[1].hash)
+    storage.close()
+
+    storage = storage_cls(str(tmp_path))
+    storage.load_from_disk()
+    expected = {dp.hash for dp in points} - {points[1].hash}
+    assert {dp.hash for dp in storage.iter_data_points()} == expected
+    assert storage.get_data_point(points[49].hash).data == "record 49"
+    storage.close()
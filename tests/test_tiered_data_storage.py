@@ -0,0 +1,74 @@
+from datetime import datetime
+
+import pytest
+
+from low_quality_data_storage import LowQualityDataPoint
+from storage_records import decode_header, decode_payload, encode_record, rescore_record
+from tiered_data_storage import TieredDataStorage
+
+@pytest.fixture(params=[{}, {"engine": "segment"}, {"record_format": "binary"}])
+def storage(tmp_path, request):
+    storage = TieredDataStorage(str(tmp_path), thresholds=(0.5, 0.8), retention_periods=(7, 30, None),
+                                metadata_indexes=["source"], **request.param)
+    yield storage
+    storage.close()
+
+def tier_counts(storage):
+    return [tier.get_data_point_count() for tier in storage.tiers]
+
+def test_routes_by_score(storage):
+    for i, score in enumerate((0.1, 0.6, 0.9)):
+        storage.add_data_point(LowQualityDataPoint(f"point {i}", {"source": "web"}, score))
+    assert tier_counts(storage) == [1, 1, 1]
+    assert len(storage.search_by_metadata({"source": "web"}, quality_range=(0.5, None))) == 2
+
+def test_duplicates_within_a_batch_are_stored_once(storage):
+    results = storage.add_data_points([LowQualityDataPoint("x", {}, 0.1), LowQualityDataPoint("x", {}, 0.9),
+                                       LowQualityDataPoint("y", {}, 0.9)])
+    assert results == [True, True, True]
+    assert tier_counts(storage) == [1, 0, 1]
+    report = storage.get_storage_report()
+    assert report["data_points"] == 2
+    assert report["references"] == 3
+
+def test_duplicate_of_stored_content_gains_a_reference(storage):
+    storage.add_data_point(LowQualityDataPoint("x", {}, 0.9))
+    storage.add_data_point(LowQualityDataPoint("x", {}, 0.1))
+    assert tier_counts(storage) == [0, 0, 1]
+    assert storage.get_storage_report()["references"] == 2
+
+def test_rescore_moves_without_rewriting(storage, tmp_path):
+    point = LowQualityDataPoint({"values": [1, 2, 3]}, {"source": "app"}, 0.2)
+    storage.add_data_point(point)
+    writes = []
+    for tier in storage.tiers:
+        tier._put_op = lambda data_point, put=tier._put_op: writes.append(data_point.hash) or put(data_point)
+    assert storage.update_quality_score(point.hash, 0.95)
+    assert writes == []
+    assert tier_counts(storage) == [0, 0, 1]
+    storage.close()
+
+    reopened = TieredDataStorage(str(tmp_path), thresholds=(0.5, 0.8), retention_periods=(7, 30, None),
+                                 metadata_indexes=["source"], engine=storage.tiers[-1].engine,
+                                 record_format=storage.tiers[-1].record_format)
+    reopened.load_from_disk()
+    moved = reopened.get_data_point(point.hash)
+    assert moved.quality_score == 0.95
+    assert moved.data == {"values": [1, 2, 3]}
+    assert tier_counts(reopened) == [0, 0, 1]
+    reopened.close()
+
+def test_rebalance_after_threshold_change(storage):
+    storage.add_data_points([LowQualityDataPoint(f"point {i}", {}, 0.75) for i in range(5)])
+    storage.set_thresholds((0.5, 0.7))
+    assert storage.rebalance() == 5
+    assert tier_counts(storage) == [0, 0, 5]
+
+@pytest.mark.parametrize("record_format", ["json", "binary"])
+def test_rescore_record_keeps_the_payload(record_format):
+    payload = encode_record("ab" * 32, {"quality_score": 0.1}, {"quality_score": 0.2}, 0.3, datetime(2024, 1, 1),
+                            record_format)
+    rescored = rescore_record(payload, 0.9)
+    assert decode_header(rescored)["quality_score"] == 0.9
+    assert decode_header(rescored)["metadata"] == {"quality_score": 0.2}
+    assert decode_payload(rescored) == {"quality_score": 0.1}
@@ -0,0 +1,69 @@
+import numpy as np
+import pytest
+
+from neuronet_core import RoundAggregator
+from update_compression import UpdateEncoder
+
+def global_weights():
+    rng = np.random.default_rng(0)
+    return {"a": rng.standard_normal((32, 16)), "b": rng.standard_normal((16, 1))}
+
+def perturbed(weights, rng, scale=0.01):
+    return {layer: w + rng.normal(scale=scale, size=w.shape) for layer, w in weights.items()}
+
+@pytest.mark.parametrize("mode, tolerance", [("int8", 2e-4), ("float16", 2e-5)])
+def test_quantized_round_trip(mode, tolerance):
+    weights = global_weights()
+    update = perturbed(weights, np.random.default_rng(1))
+    encoded = UpdateEncoder(mode).encode("c", update, weights)
+    decoded = encoded.decode(weights)
+    for layer in weights:
+        np.testing.assert_allclose(decoded[layer], update[layer], atol=tolerance)
+    assert encoded.nbytes < sum(w.nbytes for w in update.values()) / 3
+
+def test_topk_keeps_the_largest_entries():
+    weights = global_weights()
+    update = perturbed(weights, np.random.default_rng(2))
+    encoded = UpdateEncoder("topk", topk_ratio=0.1, error_feedback=False).encode("c", update, weights)
+    for layer, compressed in encoded.layers.items():
+        delta = (update[layer] - weights[layer]).reshape(-1)
+        k = max(1, int(delta.size * 0.1))
+        assert len(compressed.indices) == k
+        threshold = np.sort(np.abs(delta))[-k]
+        assert np.all(np.abs(delta[compressed.indices]) >= threshold)
+
+def test_error_feedback_carries_the_dropped_part():
+    weights = global_weights()
+    rng = np.random.default_rng(3)
+    encoder = UpdateEncoder("topk", topk_ratio=0.05)
+    sent = {layer: np.zeros_like(w) for layer, w in weights.items()}
+    true = {layer: np.zeros_like(w) for layer, w in weights.items()}
+    for _ in range(50):
+        update = perturbed(weights, rng)
+        encoded = encoder.encode("c", update, weights)
+        for layer in weights:
+            sent[layer] += encoded.layers[layer].decode()
+            true[layer] += update[layer] - weights[layer]
+    for layer in weights:
+        # Whatever was not sent yet is exactly the residual kept for the next round
+        np.testing.assert_allclose(true[layer] - sent[layer], encoder.residuals["c"][layer], atol=1e-5)
+    encoder.reset("c")
+    assert "c" not in encoder.residuals
+
+def test_encoded_updates_aggregate_like_dense():
+    weights = global_weights()
+    rng = np.random.default_rng(4)
+    updates = [perturbed(weights, rng) for _ in range(5)]
+    counts = [1, 2, 3, 4, 5]
+    dense, encoded = RoundAggregator(weights), RoundAggregator(weights)
+    encoder = UpdateEncoder("float16")
+    for i, (update, n) in enumerate(zip(updates, counts)):
+        dense.add_update(i, update, n)
+        encoded.add_update(i, encoder.encode(i, update, weights), n)
+    expected, result = dense.result(), encoded.result()
+    for layer in weights:
+        np.testing.assert_allclose(result[layer], expected[layer], atol=1e-4)
+
+def test_unknown_mode():
+    with pytest.raises(ValueError):
+        UpdateEncoder("int4")
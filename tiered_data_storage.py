@@ -0,0 +1,314 @@
+import os
+import threading
+from bisect import bisect_right
+from datetime import datetime, timedelta
+from typing import Dict, List, Any, Iterable, Optional, Sequence, Tuple, Union
+
+from data_digest import DEFAULT_ALGORITHM, content_digest
+from high_quality_data_storage import HighQualityDataPoint, HighQualityDataStorage
+from low_quality_data_storage import LowQualityDataPoint, LowQualityDataStorage
+from storage_records import rescore_record, rescore_record_file
+from storage_stats import QualityAggregate
+
+DataPoint = Union[HighQualityDataPoint, LowQualityDataPoint]
+
+class TieredDataStorage:
+    # Quality tiers split at ascending thresholds: every tier but the top is a LowQualityDataStorage (so it
+    # keeps the retention_period expiry), the top tier is a HighQualityDataStorage. Points are routed by
+    # quality_score, and moves between tiers hand over the stored record instead of re-encoding it.
+    def __init__(self, storage_path: str, thresholds: Sequence[float] = (0.8,),
+                 retention_periods: Sequence[Optional[int]] = (30, None), engine: str = "json",
+                 metadata_indexes: Iterable[str] = (), stats_keys: Iterable[str] = (),
+                 rebalance_interval: Optional[float] = None, record_format: str = "json",
+                 compression: Optional[str] = None, digest_algorithm: str = DEFAULT_ALGORITHM):
+        # Every tier is addressed with digest_algorithm, so a point keeps its hash when it changes tier
+        thresholds = list(thresholds)
+        if thresholds != sorted(set(thresholds)):
+            raise ValueError(f"Tier thresholds must be strictly increasing, got {thresholds}")
+        if len(retention_periods) != len(thresholds) + 1:
+            raise ValueError(f"{len(thresholds) + 1} tiers need {len(thresholds) + 1} retention periods")
+        self.storage_path = storage_path
+        self.thresholds = thresholds
+        self.retention_periods = list(retention_periods)
+        self.digest_algorithm = digest_algorithm
+        metadata_indexes = list(metadata_indexes)
+        stats_keys = list(stats_keys)
+
+        self.tiers: List[Union[LowQualityDataStorage, HighQualityDataStorage]] = []
+        for i in range(len(thresholds) + 1):
+            path = os.path.join(storage_path, f"tier_{i}")
+            os.makedirs(path, exist_ok=True)
+            if i < len(thresholds):
+                self.tiers.append(LowQualityDataStorage(
+                    path, retention_periods[i], metadata_indexes, ("quality_score",), stats_keys,
+                    quality_threshold=thresholds[i], record_format=record_format, compression=compression,
+                    digest_algorithm=digest_algorithm))
+            else:
+                range_indexes = ("quality_score",) if retention_periods[i] is None else ("quality_score", "timestamp")
+                self.tiers.append(HighQualityDataStorage(
+                    path, engine=engine, metadata_indexes=metadata_indexes, range_indexes=range_indexes,
+                    stats_keys=stats_keys, quality_threshold=thresholds[-1] if thresholds else float("-inf"),
+                    record_format=record_format, compression=compression, digest_algorithm=digest_algorithm))
+
+        self._lock = threading.RLock()
+        self._balanced = True  # False between a threshold change and the rebalance that follows it
+        self._rebalancer: Optional[threading.Thread] = None
+        self._stop_rebalance = threading.Event()
+        if rebalance_interval:
+            self.start_background_rebalance(rebalance_interval)
+
+    # --- routing ---
+
+    def _tier_for(self, quality_score: float) -> int:
+        return bisect_right(self.thresholds, quality_score)
+
+    def _bounds(self, tier: int) -> Tuple[float, float]:
+        lower = self.thresholds[tier - 1] if tier > 0 else float("-inf")
+        upper = self.thresholds[tier] if tier < len(self.thresholds) else float("inf")
+        return lower, upper
+
+    def _locate(self, hash_value: str) -> Optional[int]:
+        for i, tier in enumerate(self.tiers):
+            if hash_value in tier.index:
+                return i
+        return None
+
+    # --- data point API ---
+
+    def add_data_point(self, data_point: DataPoint) -> bool:
+        return self.add_data_points([data_point])[0]
+
+    def add_data_points(self, data_points: List[DataPoint]) -> List[bool]:
+        # Content already stored in any tier, or repeated within the batch, only gains a reference in the tier
+        # that holds it, whatever the new score. Returns whether each point was stored or referenced.
+        with self._lock:
+            results = [True] * len(data_points)
+            batches: Dict[int, List[int]] = {}  # Tier -> positions of the first occurrence of each new hash
+            first: Dict[str, int] = {}
+            repeats: List[Tuple[int, int]] = []  # (position, position of the first occurrence)
+            for i, data_point in enumerate(data_points):
+                data_point.readdress(self.digest_algorithm)
+                tier = self._locate(data_point.hash)
+                if tier is not None:
+                    self.tiers[tier].references.add(data_point.hash, 1)
+                elif data_point.hash in first:
+                    repeats.append((i, first[data_point.hash]))
+                else:
+                    first[data_point.hash] = i
+                    batches.setdefault(self._tier_for(data_point.quality_score), []).append(i)
+            for tier, positions in batches.items():
+                added = self.tiers[tier].add_data_points([data_points[i] for i in positions], timeout=None)
+                for i, ok in zip(positions, added):
+                    results[i] = ok
+            for i, original in repeats:
+                results[i] = results[original]
+                if results[i]:
+                    self.tiers[self._locate(data_points[i].hash)].references.add(data_points[i].hash, 1)
+            return results
+
+    def get_data_point(self, hash_value: str) -> Optional[DataPoint]:
+        with self._lock:
+            tier = self._locate(hash_value)
+            return self.tiers[tier].get_data_point(hash_value) if tier is not None else None
+
+    def update_data_point(self, hash_value: str, new_data: Any, new_metadata: Dict[str, Any]) -> bool:
+        with self._lock:
+            tier = self._locate(hash_value)
+            if tier is None:
+                return False
+            current = self.tiers[tier].get_data_point(hash_value)
+            new_hash = content_digest(new_data, {**current.metadata, **new_metadata}, self.digest_algorithm)
+            other = self._locate(new_hash)
+            if other is not None and other != tier:
+                # The new content already lives in another tier: reference it there instead
+                self.tiers[other].references.add(new_hash, 1)
+                return self.tiers[tier].remove_data_point(hash_value)
+            return self.tiers[tier].update_data_point(hash_value, new_data, new_metadata)
+
+    def update_quality_score(self, hash_value: str, quality_score: float) -> bool:
+        # Re-scores a point and moves it to the tier its new score belongs to; a move patches the score into
+        # the handed-over record instead of rewriting it in the source tier first
+        with self._lock:
+            tier = self._locate(hash_value)
+            if tier is None:
+                return False
+            target = self._tier_for(quality_score)
+            if target == tier:
+                return self.tiers[tier].update_quality_score(hash_value, quality_score)
+            self._move(hash_value, tier, target, quality_score)
+            return True
+
+    def remove_data_point(self, hash_value: str) -> bool:
+        with self._lock:
+            tier = self._locate(hash_value)
+            return self.tiers[tier].remove_data_point(hash_value) if tier is not None else False
+
+    # --- promotion and demotion ---
+
+    def _move(self, hash_value: str, source: int, target: int, quality_score: Optional[float] = None):
+        data_point, references, record = self.tiers[source].release_data_point(hash_value)
+        if quality_score is not None:
+            data_point.quality_score = quality_score
+            if isinstance(record, str):
+                rescore_record_file(record, quality_score)
+            else:
+                record = rescore_record(record, quality_score)
+        self.tiers[target].adopt_data_point(data_point, references, record)
+
+    def set_thresholds(self, thresholds: Sequence[float]):
+        # Retunes tier boundaries; points are moved by the next rebalance (background or explicit)
+        thresholds = list(thresholds)
+        if len(thresholds) != len(self.thresholds) or thresholds != sorted(set(thresholds)):
+            raise ValueError(f"Expected {len(self.thresholds)} strictly increasing thresholds, got {thresholds}")
+        with self._lock:
+            self.thresholds = thresholds
+            for i, tier in enumerate(self.tiers):
+                tier.quality_threshold = self._bounds(i)[1] if i < len(thresholds) else self._bounds(i)[0]
+            self._balanced = False
+
+    def rebalance(self) -> int:
+        # Moves every point whose score is outside its tier's bounds; returns the number moved
+        with self._lock:
+            moves = []
+            for i, tier in enumerate(self.tiers):
+                lower, upper = self._bounds(i)
+                below = tier.search_by_metadata({}, quality_range=(None, lower)) if lower > float("-inf") else []
+                above = tier.search_by_metadata({}, quality_range=(upper, None)) if upper < float("inf") else []
+                moves.extend((dp.hash, i, self._tier_for(dp.quality_score))
+                             for dp in below + above if not lower <= dp.quality_score < upper)
+            for hash_value, source, target in moves:
+                self._move(hash_value, source, target)
+            self._balanced = True
+            return len(moves)
+
+    def start_background_rebalance(self, interval: float = 60.0):
+        if self._rebalancer is not None:
+            return
+        self._stop_rebalance.clear()
+
+        def run():
+            while not self._stop_rebalance.wait(interval):
+                self.rebalance()
+                self.cleanup_expired_data()
+
+        self._rebalancer = threading.Thread(target=run, name="tier-rebalancer", daemon=True)
+        self._rebalancer.start()
+
+    def stop_background_rebalance(self):
+        if self._rebalancer is not None:
+            self._stop_rebalance.set()
+            self._rebalancer.join()
+            self._rebalancer = None
+
+    def cleanup_expired_data(self) -> int:
+        # Applies each tier's retention_period; the top tier expires through its timestamp range index
+        with self._lock:
+            removed = sum(tier.cleanup_expired_data() for tier in self.tiers[:-1])
+            retention = self.retention_periods[-1]
+            if retention is not None:
+                top = self.tiers[-1]
+                cutoff = datetime.now() - timedelta(days=retention + 1)
+                for data_point in top.search_by_metadata({}, time_range=(None, cutoff)):
+                    _, _, record = top.release_data_point(data_point.hash)
+                    if isinstance(record, str):
+                        os.remove(record)
+                    removed += 1
+            return removed
+
+    # --- queries ---
+
+    def search_by_metadata(self, query: Dict[str, Any], quality_range: Optional[Tuple[float, float]] = None,
+                           time_range: Optional[Tuple[datetime, datetime]] = None,
+                           limit: Optional[int] = None) -> List[DataPoint]:
+        # Plans the fan-out: tiers whose score bounds cannot meet quality_range are skipped (unless a
+        # threshold change is still being rebalanced), the rest are searched from the top tier down and
+        # their results concatenated until limit is reached
+        with self._lock:
+            results = []
+            for i in reversed(range(len(self.tiers))):
+                if quality_range is not None and self._balanced:
+                    lower, upper = self._bounds(i)
+                    low, high = quality_range
+                    if (high is not None and high < lower) or (low is not None and low >= upper):
+                        continue
+                results.extend(self.tiers[i].search_by_metadata(query, quality_range, time_range))
+                if limit is not None and len(results) >= limit:
+                    return results[:limit]
+            return results
+
+    def iter_data_points(self):
+        for tier in reversed(self.tiers):
+            yield from tier.iter_data_points()
+
+    # --- lifecycle and reporting ---
+
+    def load_from_disk(self, max_workers: int = None):
+        with self._lock:
+            for tier in self.tiers:
+                tier.load_from_disk(max_workers)
+
+    def close(self):
+        self.stop_background_rebalance()
+        with self._lock:
+            for tier in self.tiers:
+                tier.close()
+
+    def get_data_point_count(self) -> int:
+        return sum(tier.get_data_point_count() for tier in self.tiers)
+
+    def get_quality_stats(self) -> Dict[str, float]:
+        # Tier sketches are merged, so quantiles span the whole store
+        merged = QualityAggregate(self.tiers[0].stats.bins)
+        for tier in self.tiers:
+            aggregate = tier.stats.overall
+            merged.count += aggregate.count
+            merged.total += aggregate.total
+            merged.sketch = merged.sketch.merge(aggregate.sketch)
+        return {
+            "count": merged.count,
+            "average": merged.average,
+            "p50": merged.sketch.quantile(0.5),
+            "p90": merged.sketch.quantile(0.9),
+            "p99": merged.sketch.quantile(0.99),
+        }
+
+    def get_storage_report(self) -> Dict[str, Any]:
+        with self._lock:
+            tiers = []
+            for i, tier in enumerate(self.tiers):
+                report = tier.get_storage_report()
+                report["bounds"] = self._bounds(i)
+                report["retention_period"] = self.retention_periods[i]
+                tiers.append(report)
+            unique = sum(report["data_points"] for report in tiers)
+            references = sum(report["references"] for report in tiers)
+            return {
+                "data_points": unique,
+                "references": references,
+                "dedup_ratio": references / unique if unique else 1.0,
+                "tiers": tiers,
+            }
+
+# Example usage
+if __name__ == "__main__":
+    import random
+    import tempfile
+
+    storage = TieredDataStorage(tempfile.mkdtemp(), thresholds=(0.5, 0.8), retention_periods=(7, 30, None),
+                                metadata_indexes=["source"])
+    for i in range(1000):
+        storage.add_data_point(LowQualityDataPoint(
+            data=f"sample {i % 800}",  # Contributors resubmit: 200 duplicates
+            metadata={"source": "web" if i % 2 else "app"},
+            quality_score=random.random()
+        ))
+
+    # Lowering the top threshold promotes points without rewriting their payloads
+    storage.set_thresholds((0.5, 0.7))
+    print(f"Moved {storage.rebalance()} points between tiers")
+    print(f"High-quality web samples: {len(storage.search_by_metadata({'source': 'web'}, quality_range=(0.7, None)))}")
+
+    report = storage.get_storage_report()
+    print(f"{report['data_points']} stored, {report['references']} submitted, dedup ratio {report['dedup_ratio']:.2f}")
+    print(storage.get_quality_stats())
+    storage.close()
@@ -0,0 +1,115 @@
+from typing import Dict, Any, Optional
+import numpy as np
+
+from neuronet_core import FederatedModel
+
+class CompressedLayer:
+    # A layer delta stored either densely (quantized) or as top-k (indices, values) pairs
+    def __init__(self, shape: tuple, values: np.ndarray, scale: float = 1.0, indices: Optional[np.ndarray] = None):
+        self.shape = shape
+        self.values = values
+        self.scale = scale
+        self.indices = indices
+
+    @property
+    def nbytes(self) -> int:
+        return self.values.nbytes + (self.indices.nbytes if self.indices is not None else 0) + 8  # + scale
+
+    def accumulate_into(self, target: np.ndarray, weight: float):
+        # Adds weight * delta to target without materializing the dense float delta first
+        coefficient = weight * self.scale
+        if self.indices is None:
+            target += self.values * coefficient
+        else:
+            target.reshape(-1)[self.indices] += self.values * coefficient
+
+    def decode(self) -> np.ndarray:
+        delta = np.zeros(self.shape)
+        self.accumulate_into(delta, 1.0)
+        return delta
+
+class CompressedUpdate:
+    # Client update encoded as per-layer deltas against the global weights of the round
+    def __init__(self, mode: str, layers: Dict[str, CompressedLayer]):
+        self.mode = mode
+        self.layers = layers
+
+    @property
+    def nbytes(self) -> int:
+        return sum(layer.nbytes for layer in self.layers.values())
+
+    def accumulate_into(self, weighted_sums: Dict[str, np.ndarray], weight: float):
+        for name, layer in self.layers.items():
+            layer.accumulate_into(weighted_sums[name], weight)
+
+    def decode(self, global_weights: Dict[str, np.ndarray]) -> Dict[str, np.ndarray]:
+        return {name: global_weights[name] + layer.decode() for name, layer in self.layers.items()}
+
+class UpdateEncoder:
+    MODES = ("int8", "float16", "topk")
+
+    def __init__(self, mode: str = "int8", topk_ratio: float = 0.01, error_feedback: bool = True):
+        if mode not in self.MODES:
+            raise ValueError(f"Unknown update encoding mode: {mode}")
+        self.mode = mode
+        self.topk_ratio = topk_ratio
+        self.error_feedback = error_feedback
+        # Per-client residuals: whatever compression dropped last round is added back to the next delta
+        self.residuals: Dict[Any, Dict[str, np.ndarray]] = {}
+
+    def encode(self, client_id: Any, update: Dict[str, np.ndarray],
+               global_weights: Dict[str, np.ndarray]) -> CompressedUpdate:
+        residuals = self.residuals.get(client_id, {})
+        layers = {}
+        new_residuals = {}
+        for name, weights in update.items():
+            delta = weights - global_weights[name]
+            if name in residuals:
+                delta += residuals[name]
+            layer = self._encode_layer(delta)
+            layers[name] = layer
+            if self.error_feedback:
+                layer.accumulate_into(delta, -1.0)
+                new_residuals[name] = delta
+        if self.error_feedback:
+            self.residuals[client_id] = new_residuals
+        return CompressedUpdate(self.mode, layers)
+
+    def reset(self, client_id: Any = None):
+        if client_id is None:
+            self.residuals.clear()
+        else:
+            self.residuals.pop(client_id, None)
+
+    def _encode_layer(self, delta: np.ndarray) -> CompressedLayer:
+        if self.mode == "topk":
+            flat = delta.reshape(-1)
+            k = min(flat.size, max(1, int(flat.size * self.topk_ratio)))
+            indices = np.argpartition(np.abs(flat), flat.size - k)[flat.size - k:].astype(np.int32)
+            return CompressedLayer(delta.shape, flat[indices].astype(np.float32), indices=indices)
+
+        max_abs = float(np.max(np.abs(delta))) if delta.size else 0.0
+        if self.mode == "int8":
+            scale = max_abs / 127 if max_abs else 1.0
+            values = np.rint(delta / scale).astype(np.int8)
+        else:
+            scale = max_abs if max_abs else 1.0  # Normalize so float16 never overflows
+            values = (delta / scale).astype(np.float16)
+        return CompressedLayer(delta.shape, values, scale=scale)
+
+# Example usage; benchmarks.py ("update_compression") measures bytes and aggregation time per mode
+if __name__ == "__main__":
+    rng = np.random.default_rng(0)
+    model = FederatedModel({
+        "input_layer": (100, 64),
+        "hidden_layer_1": (64, 32),
+        "hidden_layer_2": (32, 16),
+        "output_layer": (16, 1)
+    })
+    update = {layer: w + rng.normal(scale=0.01, size=w.shape) for layer, w in model.global_weights.items()}
+    dense_bytes = sum(w.nbytes for w in update.values())
+    for mode in UpdateEncoder.MODES:
+        encoded = UpdateEncoder(mode).encode("client_1", update, model.global_weights)
+        decoded = encoded.decode(model.global_weights)
+        error = max(float(np.max(np.abs(decoded[layer] - w))) for layer, w in update.items())
+        print(f"{mode:>8}: {encoded.nbytes / 1e3:7.1f} kB (dense {dense_bytes / 1e3:.1f} kB), max error {error:.2e}")